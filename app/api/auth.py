@@ -4,7 +4,9 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from app.db.database import get_db
 from app.db.models import User
-from app.core.security import get_password_hash, verify_password, create_access_token
+from app.core.security import create_user_token, get_current_user, revoke_user_tokens
+from app.core.passwords import HashingBusy, password_hasher
+from app.core.concurrency import run_blocking
 from app.core.config import settings
 
 router = APIRouter(tags=["authentication"])
@@ -25,30 +27,28 @@ class UserResponse(BaseModel):
     message: str
 
 @router.post("/register", response_model=Token)
-def register(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     """Register a new user."""
     # Check if user already exists by email
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await run_blocking(find_user, db, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    # Create new user (bcrypt runs in the hashing pool, off the event loop)
+    hashed_password = await hash_or_busy(password_hasher.hash(user_data.password))
     new_user = User(
         email=user_data.email,
         hashed_password=hashed_password
     )
     
     try:
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await run_blocking(save_user, db, new_user)
         
         # Create access token for the new user
-        access_token = create_access_token(data={"sub": str(new_user.id)})
+        access_token = create_user_token(new_user)
         return {"access_token": access_token, "token_type": "bearer"}
     except Exception as e:
         db.rollback()
@@ -58,10 +58,10 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
         )
 
 @router.post("/login", response_model=Token)
-def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, db: Session = Depends(get_db)):
     """Login user and return access token."""
     # Find user by email
-    user = db.query(User).filter(User.email == user_data.email).first()
+    user = await run_blocking(find_user, db, user_data.email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -70,13 +70,71 @@ def login(user_data: UserLogin, db: Session = Depends(get_db)):
         )
     
     # Verify password
-    if not verify_password(user_data.password, user.hashed_password):
+    valid, new_hash = await hash_or_busy(password_hasher.verify(user_data.password, user.hashed_password))
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # The bcrypt cost setting changed since this hash was made
+    if new_hash is not None:
+        user.hashed_password = new_hash
+        await run_blocking(save_user, db, user)
+    
     # Create access token
-    access_token = create_access_token(data={"sub": str(user.id)})
-    return {"access_token": access_token, "token_type": "bearer"} 
\ No newline at end of file
+    access_token = create_user_token(user)
+    return {"access_token": access_token, "token_type": "bearer"}
+
+@router.post("/revoke", response_model=Token)
+async def revoke_tokens(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Sign out every session of the current user and return a fresh token."""
+    # Read before committing: a rollback expires the instance
+    user_id = current_user.id
+    user = await run_blocking(lambda: db.query(User).filter(User.id == user_id).first())
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    try:
+        user = await run_blocking(revoke_user_tokens, db, user)
+    except Exception as e:
+        await run_blocking(db.rollback)
+        print(f"Error revoking tokens of user {user_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error revoking tokens"
+        )
+    return {"access_token": create_user_token(user), "token_type": "bearer"}
+
+async def hash_or_busy(operation):
+    """Await a password hashing call, turning a full hashing queue into HTTP 429."""
+    try:
+        return await operation
+    except HashingBusy:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many sign-ins in progress, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+def find_user(db: Session, email: str):
+    """Look up a user by email and release the connection before hashing starts.
+    
+    Password hashing can queue for a while during a login storm; holding a
+    pooled connection meanwhile would starve every other request.
+    """
+    user = db.query(User).filter(User.email == email).first()
+    if user is not None:
+        db.expunge(user)
+    db.rollback()
+    return user
+
+def save_user(db: Session, user: User) -> None:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
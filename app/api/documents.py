@@ -1,23 +1,48 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-import PyPDF2
-import io
+import hashlib
 import uuid
 import os
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 from app.db.database import get_db
 from app.db.models import User, Document
 from app.core.security import get_current_user
-from app.core.llm_utils import generate_embeddings, split_text_into_chunks
-from app.services.vector_store import vector_store
+from app.core.config import settings
+from app.core.concurrency import run_blocking
+from app.core.metrics import request_stage_seconds, request_timer
+from app.services.ingestion import ingestion_queue, delete_document_chunks
+from app.services.bulk_upload import UploadError, stage_bulk_upload
 
 router = APIRouter(tags=["documents"])
 
 class UploadResponse(BaseModel):
     message: str
-    chunks_processed: int
+    document_id: int
+    job_id: str
+    status: str
+
+class BulkFileResult(BaseModel):
+    filename: str
+    status: str
+    document_id: Optional[int] = None
+    job_id: Optional[str] = None
+    detail: Optional[str] = None
+
+class BulkUploadResponse(BaseModel):
+    message: str
+    batch_id: Optional[str] = None
+    queued: int
+    unchanged: int
+    skipped: int
+    files: List[BulkFileResult]
+
+class DeleteResponse(BaseModel):
+    message: str
+    document_id: int
+    chunks_removed: int
 
 class DocumentInfo(BaseModel):
     id: int
@@ -25,6 +50,35 @@ class DocumentInfo(BaseModel):
     size: int
     uploaded_at: datetime
     chunks_count: int
+    status: str
+    job_id: Optional[str] = None
+
+class JobStatus(BaseModel):
+    job_id: str
+    document_id: int
+    filename: str
+    status: str
+    stage: str
+    progress: float
+    chunks_count: int
+    chunks_embedded: int = 0
+    chunks_removed: int = 0
+    error: Optional[str] = None
+
+class BulkJobStatus(BaseModel):
+    batch_id: str
+    status: str
+    files_total: int
+    files_ready: int
+    files_failed: int
+    chunks_count: int
+    chunks_embedded: int
+    bytes_total: int
+    elapsed_seconds: float
+    files_per_second: float
+    chunks_per_second: float
+    mb_per_second: float
+    files: List[JobStatus]
 
 @router.get("/", response_model=List[DocumentInfo])
 async def list_documents(
@@ -34,7 +88,9 @@ async def list_documents(
     """List all documents for the current user."""
     try:
         # Query actual documents from database
-        documents = db.query(Document).filter(Document.user_id == current_user.id).all()
+        documents = await run_blocking(
+            lambda: db.query(Document).filter(Document.user_id == current_user.id).all()
+        )
         
         return [
             DocumentInfo(
@@ -42,7 +98,9 @@ async def list_documents(
                 filename=doc.original_filename,
                 size=doc.file_size,
                 uploaded_at=doc.uploaded_at,
-                chunks_count=doc.chunks_count
+                chunks_count=doc.chunks_count,
+                status=doc.status,
+                job_id=doc.job_id
             )
             for doc in documents
         ]
@@ -58,7 +116,7 @@ async def upload_document(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Upload and process a document (PDF or TXT)."""
+    """Upload a document (PDF or TXT) and queue it for processing."""
     
     # Validate file type
     if not file.filename:
@@ -76,86 +134,91 @@ async def upload_document(
             detail=f"File type not supported. Allowed types: {', '.join(allowed_extensions)}"
         )
     
+    timer = request_timer()
     try:
-        # Read file content
-        content = await file.read()
-        file_size = len(content)
-        
-        # Parse content based on file type
-        if file_extension == 'pdf':
-            text_content = extract_pdf_text(content)
-        else:  # txt
-            text_content = content.decode('utf-8')
-        
-        if not text_content.strip():
+        # Read and persist the upload; parsing and indexing happen in the background
+        with timer.stage("read"):
+            content = await file.read()
+        if not content:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="File appears to be empty or could not be parsed"
             )
         
-        # Split text into chunks
-        chunks = split_text_into_chunks(text_content)
+        content_hash = hashlib.sha256(content).hexdigest()
         
-        if not chunks:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No content could be extracted from the file"
+        # Uploading a file name again replaces that document
+        with timer.stage("db_read"):
+            db_document = await run_blocking(
+                lambda: db.query(Document).filter(
+                    Document.user_id == current_user.id,
+                    Document.original_filename == file.filename
+                ).first()
             )
-        
-        # Generate embeddings for each chunk
-        embeddings = []
-        metadatas = []
-        ids = []
-        
-        for i, chunk in enumerate(chunks):
-            try:
-                embedding = generate_embeddings(chunk)
-                embeddings.append(embedding)
-                
-                # Create metadata
-                metadata = {
-                    "filename": file.filename,
-                    "user_id": current_user.id,
-                    "chunk_index": i,
-                    "total_chunks": len(chunks)
-                }
-                metadatas.append(metadata)
-                
-                # Create unique ID for the chunk
-                chunk_id = f"{current_user.id}_{file.filename}_{i}_{uuid.uuid4().hex[:8]}"
-                ids.append(chunk_id)
-                
-            except Exception as e:
+        if db_document is not None:
+            if db_document.status in ("queued", "processing"):
                 raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Error processing chunk {i}: {str(e)}"
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Document is still being processed"
+                )
+            if db_document.status == "ready" and db_document.content_hash == content_hash:
+                return UploadResponse(
+                    message="Document unchanged",
+                    document_id=db_document.id,
+                    job_id=db_document.job_id,
+                    status=db_document.status
                 )
         
-        # Add documents to vector store
-        vector_store.add_documents(
-            documents=chunks,
-            embeddings=embeddings,
-            metadatas=metadatas,
-            ids=ids
-        )
+        stored_filename = f"{uuid.uuid4().hex}_{os.path.basename(file.filename)}"
+        path = os.path.join(settings.upload_dir, stored_filename)
+        with timer.stage("save"):
+            await run_blocking(save_upload, path, content)
         
         # Save document info to database
-        db_document = Document(
-            filename=f"{uuid.uuid4().hex}_{file.filename}",
-            original_filename=file.filename,
-            file_size=file_size,
-            file_type=file_extension,
-            chunks_count=len(chunks),
-            user_id=current_user.id
-        )
+        job_id = uuid.uuid4().hex
+        previous_filename = None
+        if db_document is None:
+            message = "File accepted for processing"
+            db_document = Document(
+                original_filename=file.filename,
+                user_id=current_user.id
+            )
+        else:
+            # Re-ingestion only embeds chunks that changed
+            message = "File accepted for re-processing"
+            previous_filename = db_document.filename
+        db_document.filename = stored_filename
+        db_document.file_size = len(content)
+        db_document.file_type = file_extension
+        db_document.chunks_count = 0
+        db_document.status = "queued"
+        db_document.job_id = job_id
+        db_document.error = None
+        db_document.content_hash = content_hash
+        db_document.batch_id = None
+        
+        with timer.stage("db_write"):
+            try:
+                await run_blocking(save_document, db, db_document)
+            except IntegrityError:
+                # A concurrent upload of the same file name created the document first
+                await run_blocking(db.rollback)
+                await run_blocking(remove_upload, path)
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Document is still being processed"
+                )
+        if previous_filename:
+            await run_blocking(remove_upload, os.path.join(settings.upload_dir, previous_filename))
         
-        db.add(db_document)
-        db.commit()
-        db.refresh(db_document)
+        ingestion_queue.submit(db_document, path, job_id=job_id)
+        timer.observe(request_stage_seconds, route="upload")
         
         return UploadResponse(
-            message="File processed successfully",
-            chunks_processed=len(chunks)
+            message=message,
+            document_id=db_document.id,
+            job_id=job_id,
+            status=db_document.status
         )
         
     except HTTPException:
@@ -166,16 +229,206 @@ async def upload_document(
             detail=f"Error processing file: {str(e)}"
         )
 
-def extract_pdf_text(pdf_content: bytes) -> str:
-    """Extract text from PDF content."""
+@router.post("/upload/bulk", response_model=BulkUploadResponse)
+async def upload_documents_bulk(
+    files: List[UploadFile] = File(...),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Upload many documents, or zip/tar archives of them, as one ingestion batch.
+    
+    Archive entries are streamed one by one into the upload directory. All
+    document rows are committed together, and the batch is ingested with
+    chunks from every file pooled into shared embedding and index calls.
+    Progress and throughput are reported at ``/documents/bulk/{batch_id}``.
+    Only the first ``BULK_MAX_SKIPPED_LISTED`` skipped files are listed.
+    """
+    batch_id = uuid.uuid4().hex
     try:
-        pdf_file = io.BytesIO(pdf_content)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        
-        return text.strip()
+        results, staged, bytes_total, skipped = await run_blocking(
+            stage_bulk_upload,
+            db,
+            current_user.id,
+            [(file.filename or "", file.file) for file in files],
+            batch_id
+        )
+    except UploadError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error reading upload: {str(e)}"
+        )
+    except IntegrityError:
+        # A concurrent upload created one of these documents first
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Document is still being processed"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing upload: {str(e)}"
+        )
+    
+    if staged:
+        ingestion_queue.submit_bulk(staged, bytes_total=bytes_total, batch_id=batch_id)
+    
+    counts = {state: sum(1 for result in results if result["status"] == state) for state in ("queued", "unchanged")}
+    return BulkUploadResponse(
+        message=f"{counts['queued']} files accepted for processing",
+        batch_id=batch_id if staged else None,
+        skipped=skipped,
+        files=[BulkFileResult(**result) for result in results],
+        **counts
+    )
+
+@router.get("/bulk/{batch_id}", response_model=BulkJobStatus)
+async def get_bulk_status(
+    batch_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Per-file status and aggregate throughput of a bulk upload.
+    
+    Progress and throughput are tracked by the worker ingesting the batch;
+    other workers (and later processes) report it from its document rows.
+    """
+    bulk = ingestion_queue.get_bulk(batch_id)
+    if bulk is not None and bulk.user_id == current_user.id:
+        return BulkJobStatus(**bulk.to_dict())
+    
+    documents = await run_blocking(
+        lambda: db.query(Document).filter(
+            Document.batch_id == batch_id,
+            Document.user_id == current_user.id
+        ).order_by(Document.id).all()
+    )
+    if not documents:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Batch not found"
+        )
+    jobs = [job_status_from_document(document) for document in documents]
+    ready = [job for job in jobs if job.status == "ready"]
+    if all(job.status in ("ready", "failed") for job in jobs):
+        batch_status = "done"
+    elif any(job.status == "processing" for job in jobs):
+        batch_status = "processing"
+    else:
+        batch_status = "queued"
+    return BulkJobStatus(
+        batch_id=batch_id,
+        status=batch_status,
+        files_total=len(jobs),
+        files_ready=len(ready),
+        files_failed=sum(1 for job in jobs if job.status == "failed"),
+        chunks_count=sum(job.chunks_count for job in ready),
+        chunks_embedded=0,
+        bytes_total=sum(document.file_size for document in documents),
+        elapsed_seconds=0.0,
+        files_per_second=0.0,
+        chunks_per_second=0.0,
+        mb_per_second=0.0,
+        files=jobs
+    )
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job_status(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the stage and progress of a document ingestion job."""
+    job = ingestion_queue.get(job_id)
+    if job is not None and job.user_id == current_user.id:
+        return JobStatus(**job.to_dict())
+    
+    # Jobs of another worker or an earlier process are only known through their document row
+    document = await run_blocking(
+        lambda: db.query(Document).filter(
+            Document.job_id == job_id,
+            Document.user_id == current_user.id
+        ).first()
+    )
+    if document is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job_status_from_document(document)
+
+def job_status_from_document(document: Document) -> JobStatus:
+    """A job's status as recorded on its document row (no stage progress)."""
+    finished = document.status in ("ready", "failed")
+    return JobStatus(
+        job_id=document.job_id,
+        document_id=document.id,
+        filename=document.original_filename,
+        status=document.status,
+        stage="done" if finished else document.status,
+        progress=100.0 if finished else 0.0,
+        chunks_count=document.chunks_count or 0,
+        error=document.error
+    )
+
+@router.delete("/{document_id}", response_model=DeleteResponse)
+async def delete_document(
+    document_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Delete a document, its stored file and all of its indexed chunks."""
+    document = await run_blocking(
+        lambda: db.query(Document).filter(
+            Document.id == document_id,
+            Document.user_id == current_user.id
+        ).first()
+    )
+    if document is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+    if document.status in ("queued", "processing"):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Document is still being processed"
+        )
+    
+    try:
+        chunks_removed = await run_blocking(delete_document_chunks, current_user.id, document.id)
+        await run_blocking(remove_upload, os.path.join(settings.upload_dir, document.filename))
+        await run_blocking(delete_document_row, db, document)
+        return DeleteResponse(
+            message="Document deleted",
+            document_id=document_id,
+            chunks_removed=chunks_removed
+        )
     except Exception as e:
-        raise Exception(f"Error extracting PDF text: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error deleting document: {str(e)}"
+        )
+
+def save_upload(path: str, content: bytes) -> None:
+    """Write an uploaded file to the upload directory."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+
+def save_document(db: Session, document: Document) -> None:
+    """Insert a document row and refresh it with generated fields."""
+    db.add(document)
+    db.commit()
+    db.refresh(document)
+
+def remove_upload(path: str) -> None:
+    """Delete a stored upload if it is still there."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def delete_document_row(db: Session, document: Document) -> None:
+    """Delete a document row."""
+    db.delete(document)
+    db.commit()
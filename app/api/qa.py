@@ -1,13 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+import json
 import time
 from datetime import datetime
-from app.db.database import get_db
-from app.db.models import User, QueryLog
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from app.db.models import User, QUERY_LOG_STAGES
 from app.core.security import get_current_user
-from app.core.llm_utils import generate_embeddings, get_llm_response
-from app.services.vector_store import vector_store
+from app.core.llm_utils import agenerate_embeddings, aget_llm_response, astream_llm_response
+from app.core.concurrency import run_blocking
+from app.core.metrics import StageTimer, request_stage_seconds, request_timer
+from app.services.vector_store import SearchResult
+from app.services.retrieval import hybrid_search
+from app.services.context_builder import Context, build_context
+from app.services.reranking import rerank
+from app.services.answer_cache import answer_cache
+from app.services.query_logger import query_logger
 from app.core.config import settings
 
 router = APIRouter(tags=["question-answering"])
@@ -17,60 +25,226 @@ class QuestionRequest(BaseModel):
 
 class QuestionResponse(BaseModel):
     answer: str
+    timings: Optional[Dict[str, float]] = None
+
+class RetrievalResult:
+    """What retrieval found for a question, plus any reusable cached answer."""
+
+    def __init__(
+        self,
+        embedding: Optional[List[float]] = None,
+        results: Optional[List[SearchResult]] = None,
+        cached_answer: Optional[str] = None,
+        packed: Optional[Context] = None,
+        generation: Optional[int] = None
+    ):
+        self.embedding = embedding
+        self.results = results or []
+        self.cached_answer = cached_answer
+        self.packed = packed
+        # The user's answer cache generation when retrieval started
+        self.generation = generation
+
+    @property
+    def chunk_ids(self) -> List[str]:
+        if self.packed is not None:
+            return self.packed.chunk_ids
+        return [result.id for result in self.results]
+
+    @property
+    def context(self) -> str:
+        # Prepare context from retrieved documents
+        if self.packed is not None and self.packed.passages:
+            return self.packed.text
+        if self.packed is None and self.results:
+            return "\n\n".join(result.text for result in self.results)
+        return "No relevant documents found."
 
 @router.post("/ask", response_model=QuestionResponse)
 async def ask_question(
     question_data: QuestionRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ):
     """Ask a question and get an answer based on uploaded documents."""
     
     start_time = time.time()
+    timer = request_timer()
     
     try:
-        # Generate embedding for the question
-        question_embedding = generate_embeddings(question_data.question)
+        retrieval = await retrieve(question_data.question, current_user.id, timer)
         
-        # Search for similar documents
-        similar_docs = vector_store.similarity_search(
-            query_embedding=question_embedding,
-            k=settings.similarity_search_k,
-            user_id=current_user.id
-        )
-        
-        # Prepare context from retrieved documents
-        if similar_docs:
-            context = "\n\n".join(similar_docs)
+        if retrieval.cached_answer is not None:
+            llm_response = retrieval.cached_answer
         else:
-            context = "No relevant documents found."
-        
-        # Get LLM response
-        llm_response = get_llm_response(question_data.question, context)
+            # Get LLM response
+            with timer.stage("llm"):
+                llm_response = await aget_llm_response(question_data.question, retrieval.context)
+            await remember_answer(current_user.id, question_data.question, retrieval, llm_response)
         
         # Calculate response time
         response_time = time.time() - start_time
         
-        # Log the query
-        query_log = QueryLog(
-            user_id=current_user.id,
-            time_to_respond=response_time,
-            question=question_data.question,
-            llm_response=llm_response
-        )
-        
-        try:
-            db.add(query_log)
-            db.commit()
-        except Exception as e:
-            # Log error but don't fail the request
-            print(f"Error logging query: {str(e)}")
-            db.rollback()
+        # Log the query (buffered; the query logger inserts it with others in one batch)
+        with timer.stage("db_write"):
+            query_logger.log(
+                user_id=current_user.id,
+                time_to_respond=response_time,
+                question=question_data.question,
+                llm_response=llm_response,
+                **stage_columns(timer)
+            )
+        timer.observe(request_stage_seconds, route="ask")
         
-        return QuestionResponse(answer=llm_response)
+        return QuestionResponse(answer=llm_response, timings=timer.durations)
         
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error processing question: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+@router.post("/ask/stream")
+async def ask_question_stream(
+    question_data: QuestionRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """Ask a question and stream the answer as server-sent events.
+    
+    Emits ``token`` events as the LLM produces output, then a ``done`` event
+    with the full answer and timings (or an ``error`` event).
+    """
+    return StreamingResponse(
+        stream_answer(question_data.question, current_user.id, request_timer()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/cache/stats")
+async def answer_cache_stats(current_user: User = Depends(get_current_user)):
+    """Hit-rate metrics of the current user's answer cache."""
+    return answer_cache.stats(current_user.id)
+
+async def answer_cache_call(function, *args):
+    """Call an answer cache method; with shared generations it's a store server round-trip, so off the event loop."""
+    if answer_cache.generations is not None:
+        return await run_blocking(function, *args)
+    return function(*args)
+
+async def retrieve(question: str, user_id: int, timer: Optional[StageTimer] = None) -> RetrievalResult:
+    """Embed the question and find the user's closest chunks, reusing cached answers when possible."""
+    timer = timer or StageTimer()
+    generation = None
+    if settings.answer_cache_enabled:
+        # Read first: an upload landing after this makes the answer stale, and put() then skips it
+        generation = await answer_cache_call(answer_cache.generation, user_id)
+        cached = await answer_cache_call(answer_cache.get_exact, user_id, question)
+        if cached is not None:
+            return RetrievalResult(cached_answer=cached)
+    
+    # Generate embedding for the question
+    with timer.stage("embedding"):
+        question_embedding = await agenerate_embeddings(question)
+    
+    # Search for similar documents (vector search fused with BM25), rerank and pack them
+    results, packed = await run_blocking(search_and_pack, question, question_embedding, user_id, timer)
+    retrieval = RetrievalResult(embedding=question_embedding, results=results, packed=packed, generation=generation)
+    
+    if settings.answer_cache_enabled:
+        retrieval.cached_answer = await answer_cache_call(
+            answer_cache.get_semantic, user_id, question_embedding, retrieval.chunk_ids
+        )
+    return retrieval
+
+def search_and_pack(
+    question: str,
+    question_embedding: List[float],
+    user_id: int,
+    timer: Optional[StageTimer] = None
+) -> Tuple[List[SearchResult], Optional[Context]]:
+    """Retrieve candidate chunks, optionally rerank them and pack them into the context token budget."""
+    timer = timer or StageTimer()
+    packing = settings.context_max_tokens > 0
+    k = max(settings.similarity_search_k, settings.context_candidates) if packing else settings.similarity_search_k
+    
+    with timer.stage("search"):
+        results = hybrid_search(
+            question, question_embedding, max(k, settings.rerank_candidates) if settings.rerank_enabled else k, user_id
+        )
+    
+    if settings.rerank_enabled:
+        with timer.stage("rerank"):
+            results = rerank(question, results)[:k]
+    
+    if not packing:
+        return results, None
+    with timer.stage("context"):
+        packed = build_context(results, settings.context_max_tokens)
+    return results, packed
+
+async def remember_answer(user_id: int, question: str, retrieval: RetrievalResult, answer: str) -> None:
+    """Store a freshly generated answer in the answer cache."""
+    if settings.answer_cache_enabled:
+        await answer_cache_call(
+            answer_cache.put, user_id, question, retrieval.embedding, retrieval.chunk_ids, answer, retrieval.generation
+        )
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_answer(question: str, user_id: int, timer: Optional[StageTimer] = None) -> AsyncIterator[str]:
+    """Retrieve context, forward LLM tokens as SSE and log the query when finished."""
+    start_time = time.time()
+    timer = timer or StageTimer()
+    time_to_first_token = None
+    parts = []
+    
+    try:
+        retrieval = await retrieve(question, user_id, timer)
+        if retrieval.cached_answer is not None:
+            tokens = async_iter([retrieval.cached_answer])
+        else:
+            tokens = astream_llm_response(question, retrieval.context)
+        llm_start = time.perf_counter()
+        async for token in tokens:
+            if time_to_first_token is None:
+                time_to_first_token = time.time() - start_time
+            parts.append(token)
+            yield sse_event("token", {"token": token})
+    except Exception as e:
+        yield sse_event("error", {"detail": f"Error processing question: {str(e)}"})
+        return
+    
+    if retrieval.cached_answer is None:
+        timer.record("llm", time.perf_counter() - llm_start)
+    llm_response = "".join(parts)
+    if retrieval.cached_answer is None:
+        await remember_answer(user_id, question, retrieval, llm_response)
+    response_time = time.time() - start_time
+    
+    # Logged before the final event: a client that disconnects closes the stream at that yield
+    with timer.stage("db_write"):
+        query_logger.log(
+            user_id=user_id,
+            time_to_respond=response_time,
+            time_to_first_token=time_to_first_token,
+            question=question,
+            llm_response=llm_response,
+            **stage_columns(timer)
+        )
+    timer.observe(request_stage_seconds, route="ask_stream")
+    yield sse_event("done", {
+        "answer": llm_response,
+        "time_to_first_token": time_to_first_token,
+        "time_to_respond": response_time,
+        "timings": timer.durations
+    })
+
+async def async_iter(items: List[str]) -> AsyncIterator[str]:
+    """Yield items from a list as an async iterator."""
+    for item in items:
+        yield item
+
+def stage_columns(timer: StageTimer) -> Dict[str, float]:
+    """QueryLog ``<stage>_time`` values for the stages that ran."""
+    return {f"{stage}_time": timer.durations[stage] for stage in QUERY_LOG_STAGES if stage in timer.durations}
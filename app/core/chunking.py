@@ -0,0 +1,319 @@
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+from app.core.config import settings
+
+class Chunk(NamedTuple):
+    """A chunk of document text and its character offsets in the source."""
+    text: str
+    start: int
+    end: int
+    token_count: int
+
+class Segment(NamedTuple):
+    """A run of source text between two boundaries (sentence or paragraph)."""
+    text: str
+    start: int
+    token_count: int
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.text)
+
+# Tokenizers
+
+class RegexTokenizer:
+    """Dependency-free approximation of a BPE tokenizer.
+
+    Words are counted in pieces of up to 8 letters, numbers in groups of up
+    to 3 digits, and runs of punctuation as one token, each with an optional
+    leading space. That tracks cl100k_base counts closely on English prose.
+    """
+
+    name = "regex"
+    _pattern = re.compile(r" ?[^\W\d_]{1,8}| ?\d{1,3}| ?[^\w\s]+|\s+|_")
+
+    def count(self, text: str) -> int:
+        return sum(1 for _ in self._pattern.finditer(text))
+
+    def split(self, text: str, max_tokens: int) -> List[str]:
+        """Split text into consecutive pieces of at most ``max_tokens`` tokens."""
+        pieces = []
+        piece_start = 0
+        tokens = 0
+        for match in self._pattern.finditer(text):
+            if tokens == max_tokens:
+                pieces.append(text[piece_start:match.start()])
+                piece_start = match.start()
+                tokens = 0
+            tokens += 1
+        pieces.append(text[piece_start:])
+        return [piece for piece in pieces if piece]
+
+class TiktokenTokenizer:
+    """Exact token counts using tiktoken (optional dependency)."""
+
+    name = "tiktoken"
+
+    def __init__(self, encoding_name: str = "cl100k_base"):
+        import tiktoken
+        self._encoding = tiktoken.get_encoding(encoding_name)
+
+    def count(self, text: str) -> int:
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+    def split(self, text: str, max_tokens: int) -> List[str]:
+        tokens = self._encoding.encode(text, disallowed_special=())
+        pieces = [
+            self._encoding.decode(tokens[i:i + max_tokens])
+            for i in range(0, len(tokens), max_tokens)
+        ]
+        # Token slices can split multi-byte characters; fall back to the regex
+        # tokenizer rather than lose text
+        if "".join(pieces) != text:
+            return RegexTokenizer().split(text, max_tokens)
+        return pieces
+
+_tokenizer = None
+
+def get_tokenizer():
+    """Tokenizer selected by ``chunk_tokenizer`` ("auto" prefers tiktoken when installed)."""
+    global _tokenizer
+    if _tokenizer is None or (settings.chunk_tokenizer != "auto" and _tokenizer.name != settings.chunk_tokenizer):
+        if settings.chunk_tokenizer in ("auto", "tiktoken"):
+            try:
+                _tokenizer = TiktokenTokenizer()
+            except Exception:
+                if settings.chunk_tokenizer == "tiktoken":
+                    raise
+                _tokenizer = RegexTokenizer()
+        else:
+            _tokenizer = RegexTokenizer()
+    return _tokenizer
+
+# Segmentation
+
+SENTENCE_BOUNDARY = re.compile(r"[.!?]+[\"')\]]*\s+|\n[ \t]*\n\s*")
+PARAGRAPH_BOUNDARY = re.compile(r"\n[ \t]*\n\s*")
+
+# Characters that can form part of a boundary match
+BOUNDARY_CHARS = frozenset(".!?\"')] \t\n\r\f\v")
+
+def iter_segments(
+    pieces: Iterable[str],
+    boundary: re.Pattern,
+    tokenizer,
+    max_segment_chars: int
+) -> Iterator[Segment]:
+    """Cut a stream of text into segments ending at ``boundary`` matches.
+
+    A boundary is only accepted once text follows it, so results don't
+    depend on how the stream was split into pieces. Boundary-free runs
+    longer than ``max_segment_chars`` are cut at the last space before the
+    limit. Text is scanned once, apart from a possible partial boundary at
+    the end of the buffer, which is rescanned when the next piece arrives.
+    """
+    pending = ""
+    pos = 0  # start of the next segment in pending
+    offset = 0  # source offset of pending[0]
+    scan_from = 0  # no boundary starts between pos and this position
+
+    def emit(cut: int) -> Segment:
+        nonlocal pos, scan_from
+        text = pending[pos:cut]
+        segment = Segment(text, offset + pos, tokenizer.count(text))
+        pos = scan_from = cut
+        return segment
+
+    for piece in pieces:
+        # Drop emitted text only when new text arrives, so each character is copied once
+        pending = pending[pos:] + piece
+        offset += pos
+        scan_from -= pos
+        pos = 0
+        while True:
+            limit = pos + max_segment_chars
+            match = boundary.search(pending, scan_from)
+            if match and match.end() < len(pending) and match.end() <= limit:
+                yield emit(match.end())
+            elif len(pending) > limit:
+                cut = pending.rfind(" ", pos, limit) + 1 or limit
+                yield emit(cut)
+            else:
+                # Resume at the start of whatever might be an incomplete boundary
+                scan_from = len(pending)
+                while scan_from > pos and pending[scan_from - 1] in BOUNDARY_CHARS:
+                    scan_from -= 1
+                break
+
+    if pos < len(pending):
+        yield emit(len(pending))
+
+# Chunkers
+
+class BoundaryChunker:
+    """Token-budgeted chunker that packs whole segments in one forward pass.
+
+    Segments (sentences or paragraphs) are added to the current chunk until
+    the next one would exceed ``max_tokens``; the chunk is emitted and its
+    trailing segments that fit in ``overlap_tokens`` start the next chunk.
+    Segments larger than the budget are re-split with ``fallback`` boundaries
+    and, failing that, at token boundaries.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        overlap_tokens: int,
+        boundary: re.Pattern = SENTENCE_BOUNDARY,
+        fallback: Optional[re.Pattern] = None,
+        tokenizer=None
+    ):
+        if max_tokens <= 0:
+            raise ValueError("max_tokens must be positive")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+        self.boundary = boundary
+        self.fallback = fallback
+        self.tokenizer = tokenizer or get_tokenizer()
+
+    def chunk_text(self, text: str) -> List[Chunk]:
+        return list(self.iter_chunks([text]))
+
+    def iter_chunks(self, pieces: Iterable[str]) -> Iterator[Chunk]:
+        """Chunk a stream of text pieces, yielding chunks as soon as they are complete."""
+        current: List[Segment] = []
+        tokens = 0
+
+        for segment in self._iter_fitting_segments(pieces):
+            if not segment.text.strip():
+                continue
+            if current and tokens + segment.token_count > self.max_tokens:
+                yield self._make_chunk(current)
+                # Keep trailing segments as overlap, as long as the new segment still fits
+                while current and (
+                    tokens > self.overlap_tokens
+                    or tokens + segment.token_count > self.max_tokens
+                ):
+                    tokens -= current.pop(0).token_count
+            current.append(segment)
+            tokens += segment.token_count
+
+        if current:
+            chunk = self._make_chunk(current)
+            if chunk.text:
+                yield chunk
+
+    def _iter_fitting_segments(self, pieces: Iterable[str]) -> Iterator[Segment]:
+        """Segments no larger than the token budget."""
+        max_chars = max(self.max_tokens * 16, 1024)
+        for segment in iter_segments(pieces, self.boundary, self.tokenizer, max_chars):
+            if segment.token_count <= self.max_tokens:
+                yield segment
+            elif self.fallback is not None:
+                for part in iter_segments([segment.text], self.fallback, self.tokenizer, max_chars):
+                    yield from self._split_oversized(part, segment.start)
+            else:
+                yield from self._split_oversized(segment, 0)
+
+    def _split_oversized(self, segment: Segment, base: int) -> Iterator[Segment]:
+        start = base + segment.start
+        if segment.token_count <= self.max_tokens:
+            yield Segment(segment.text, start, segment.token_count)
+            return
+        for piece in self.tokenizer.split(segment.text, self.max_tokens):
+            yield Segment(piece, start, self.tokenizer.count(piece))
+            start += len(piece)
+
+    def _make_chunk(self, segments: List[Segment]) -> Chunk:
+        raw = "".join(segment.text for segment in segments)
+        text = raw.strip()
+        start = segments[0].start + (len(raw) - len(raw.lstrip()))
+        return Chunk(text, start, start + len(text), self.tokenizer.count(text))
+
+class CharacterChunker:
+    """Fixed-size character windows preferring a '.' in the last 100 characters.
+
+    This is the original chunking behaviour, driven by ``chunk_size`` and
+    ``chunk_overlap``, except that every chunk now starts after the previous
+    one, so a sentence break close to the chunk start can't stall the loop.
+    """
+
+    def __init__(self, chunk_size: int, chunk_overlap: int, tokenizer=None):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.tokenizer = tokenizer or get_tokenizer()
+
+    def chunk_text(self, text: str) -> List[Chunk]:
+        return list(self.iter_chunks([text]))
+
+    def iter_chunks(self, pieces: Iterable[str]) -> Iterator[Chunk]:
+        buffer = ""
+        offset = 0  # source offset of buffer[0]
+        start = 0
+
+        for piece in pieces:
+            buffer = buffer[start:] + piece
+            offset += start
+            start = 0
+            # Only chunks with text beyond them are final before the stream ends
+            while start + self.chunk_size < len(buffer):
+                end = self._chunk_end(buffer, start)
+                chunk = self._make_chunk(buffer, start, end, offset)
+                if chunk:
+                    yield chunk
+                start = self._next_start(start, end)
+
+        while start < len(buffer):
+            end = self._chunk_end(buffer, start)
+            chunk = self._make_chunk(buffer, start, end, offset)
+            if chunk:
+                yield chunk
+            if end >= len(buffer):
+                break
+            start = self._next_start(start, end)
+
+    def _chunk_end(self, text: str, start: int) -> int:
+        end = start + self.chunk_size
+        # If this is not the last chunk, try to break at a sentence boundary
+        if end < len(text):
+            search_start = max(start, end - 100)
+            sentence_end = text.rfind('.', search_start, end)
+            if sentence_end > start:
+                end = sentence_end + 1
+        return end
+
+    def _next_start(self, start: int, end: int) -> int:
+        next_start = end - self.chunk_overlap
+        return next_start if next_start > start else end
+
+    def _make_chunk(self, buffer: str, start: int, end: int, offset: int) -> Optional[Chunk]:
+        raw = buffer[start:end]
+        text = raw.strip()
+        if not text:
+            return None
+        chunk_start = offset + start + (len(raw) - len(raw.lstrip()))
+        return Chunk(text, chunk_start, chunk_start + len(text), self.tokenizer.count(text))
+
+# Strategy registry
+
+CHUNKERS: Dict[str, Callable[[], object]] = {
+    "sentences": lambda: BoundaryChunker(
+        settings.chunk_max_tokens, settings.chunk_overlap_tokens, SENTENCE_BOUNDARY
+    ),
+    "paragraphs": lambda: BoundaryChunker(
+        settings.chunk_max_tokens, settings.chunk_overlap_tokens, PARAGRAPH_BOUNDARY, fallback=SENTENCE_BOUNDARY
+    ),
+    "characters": lambda: CharacterChunker(settings.chunk_size, settings.chunk_overlap),
+}
+
+def register_chunker(name: str, factory: Callable[[], object]) -> None:
+    """Make a chunking strategy selectable through ``chunk_strategy``."""
+    CHUNKERS[name] = factory
+
+def get_chunker(strategy: Optional[str] = None):
+    """Chunker for the given (or configured) strategy."""
+    strategy = strategy or settings.chunk_strategy
+    try:
+        return CHUNKERS[strategy]()
+    except KeyError:
+        raise ValueError(f"Unknown chunk strategy '{strategy}'. Available: {', '.join(CHUNKERS)}")
@@ -0,0 +1,50 @@
+import asyncio
+import functools
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from app.core.config import settings
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+def get_blocking_executor() -> ThreadPoolExecutor:
+    """Executor for blocking work (SQLite, Chroma, file IO) called from async handlers."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.blocking_workers,
+            thread_name_prefix="blocking"
+        )
+    return _executor
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """Run a blocking callable on the sized executor without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_blocking_executor(),
+        functools.partial(func, *args, **kwargs)
+    )
+
+def shutdown_blocking_executor() -> None:
+    """Release the executor's threads (used on application shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+def claim_once(task: str) -> bool:
+    """Whether this process should run a once-per-deployment startup ``task``.
+    
+    Always true for a single process. Workers started together share a
+    ``worker_group_id``; the first of them to claim the task gets it, and
+    workers restarted later in the same deployment don't run it again.
+    """
+    if not settings.worker_group_id:
+        return True
+    marker = os.path.join(tempfile.gettempdir(), f"twerlo-{settings.worker_group_id}-{task}")
+    try:
+        os.close(os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        return False
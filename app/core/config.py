@@ -8,19 +8,171 @@ load_dotenv()
 class Settings(BaseSettings):
     # OpenAI Configuration
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
+    openai_base_url: Optional[str] = os.getenv("OPENAI_BASE_URL") or None
     
     # Security
     secret_key: str = os.getenv("SECRET_KEY", "your-secret-key-change-this")
     algorithm: str = "HS256"
     access_token_expire_minutes: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
     
+    # "stateless" trusts signed token claims and checks revocations against a
+    # periodically synced in-process list; "database" loads the user per request
+    auth_mode: str = os.getenv("AUTH_MODE", "stateless")
+    auth_revocation_refresh_seconds: float = float(os.getenv("AUTH_REVOCATION_REFRESH_SECONDS", "5"))
+    auth_user_cache_size: int = int(os.getenv("AUTH_USER_CACHE_SIZE", "1024"))
+    auth_user_cache_ttl_seconds: float = float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "60"))
+    
     # Database Configuration
     chroma_db_path: str = os.getenv("CHROMA_DB_PATH", "data/chroma_db")
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///./data/twerlo.db")
     
+    # Connection pool (per process) and SQLite tuning - WAL lets reads run during
+    # a write, the busy timeout makes concurrent writers wait instead of failing
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    db_pool_timeout: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    sqlite_journal_mode: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    sqlite_synchronous: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    sqlite_busy_timeout_ms: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    
+    # Query log - rows are buffered in memory and bulk inserted once
+    # query_log_batch_size are waiting or every query_log_flush_seconds (rows beyond
+    # query_log_max_pending are dropped); rows older than query_log_retention_days
+    # are compacted into daily per-user aggregates by app.db.rollup_query_logs
+    query_log_batch_size: int = int(os.getenv("QUERY_LOG_BATCH_SIZE", "200"))
+    query_log_flush_seconds: float = float(os.getenv("QUERY_LOG_FLUSH_SECONDS", "1.0"))
+    query_log_max_pending: int = int(os.getenv("QUERY_LOG_MAX_PENDING", "10000"))
+    query_log_retention_days: int = int(os.getenv("QUERY_LOG_RETENTION_DAYS", "30"))
+    
+    # Multiple workers - run.py starts ``workers`` processes and, above one, a store
+    # server listening on store_server_address that owns the vector store and lexical
+    # index (the workers use the "remote" backend); worker_group_id marks the workers
+    # of one deployment. Per-process pools below default to their share of the CPUs
+    workers: int = max(1, int(os.getenv("WORKERS", "1")))
+    store_server_address: str = os.getenv("STORE_SERVER_ADDRESS", "data/store_server.sock")
+    worker_group_id: str = os.getenv("WORKER_GROUP_ID", "")
+    
+    # Vector store layout - "shared" (one collection filtered by user_id),
+    # "per_user" (one collection per user) or "sharded" (user_id % shards)
+    vector_store_partitioning: str = os.getenv("VECTOR_STORE_PARTITIONING", "shared")
+    vector_store_shards: int = int(os.getenv("VECTOR_STORE_SHARDS", "16"))
+    
+    # Vector store backend - "chroma" or "numpy" (exact search over memory-mapped
+    # matrices, segments compacted once a collection has more than max_segments)
+    vector_store_backend: str = os.getenv("VECTOR_STORE_BACKEND", "chroma")
+    numpy_index_path: str = os.getenv("NUMPY_INDEX_PATH", "data/numpy_index")
+    numpy_index_max_segments: int = int(os.getenv("NUMPY_INDEX_MAX_SEGMENTS", "8"))
+    # "int8" scans per-vector scaled int8 codes, then reranks rerank_factor * k
+    # candidates with the float32 vectors kept on disk
+    numpy_index_quantization: str = os.getenv("NUMPY_INDEX_QUANTIZATION", "none")
+    numpy_index_rerank_factor: int = int(os.getenv("NUMPY_INDEX_RERANK_FACTOR", "4"))
+    
     # LLM Configuration - Using optimized models
     llm_model: str = os.getenv("LLM_MODEL", "gpt-4o-mini")  # Cost-effective GPT-4 model
     embedding_model: str = os.getenv("EMBEDDING_MODEL", "text-embedding-3-large")  # High-quality embedding model
+    # Truncate embeddings to this many dimensions (0 = model default); re-index after changing
+    embedding_dimensions: int = int(os.getenv("EMBEDDING_DIMENSIONS", "0"))
+    
+    # Providers - "openai" talks to any OpenAI-compatible server (llm_base_url and
+    # embedding_base_url default to OPENAI_BASE_URL); "echo" and "hash" are
+    # deterministic local stand-ins for offline runs and load tests. Each provider
+    # has its own timeout, connection pool and cap on in-flight requests (0 = no cap)
+    llm_provider: str = os.getenv("LLM_PROVIDER", "openai")
+    llm_base_url: Optional[str] = os.getenv("LLM_BASE_URL") or None
+    llm_max_concurrency: int = int(os.getenv("LLM_MAX_CONCURRENCY", "0"))
+    embedding_provider: str = os.getenv("EMBEDDING_PROVIDER", "openai")
+    embedding_base_url: Optional[str] = os.getenv("EMBEDDING_BASE_URL") or None
+    embedding_timeout: float = float(os.getenv("EMBEDDING_TIMEOUT", "60"))
+    embedding_max_connections: int = int(os.getenv("EMBEDDING_MAX_CONNECTIONS", "100"))
+    embedding_request_concurrency: int = int(os.getenv("EMBEDDING_REQUEST_CONCURRENCY", "0"))
+    hash_embedding_dimensions: int = int(os.getenv("HASH_EMBEDDING_DIMENSIONS", "256"))
+    
+    # Embedding batching - inputs and estimated tokens per request, parallel requests and retries
+    embedding_batch_size: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    embedding_batch_max_tokens: int = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "100000"))
+    embedding_max_concurrency: int = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+    embedding_max_retries: int = int(os.getenv("EMBEDDING_MAX_RETRIES", "5"))
+    embedding_retry_base_delay: float = float(os.getenv("EMBEDDING_RETRY_BASE_DELAY", "0.5"))
+    
+    # Embedding cache - SQLite store with an in-process LRU in front
+    embedding_cache_enabled: bool = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    embedding_cache_path: str = os.getenv("EMBEDDING_CACHE_PATH", "data/embedding_cache.db")
+    embedding_cache_max_entries: int = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+    embedding_cache_memory_entries: int = int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", "10000"))
+    
+    # Ingestion - where uploads are kept, how many are processed at once and how
+    # many chunks of a document are read before they are embedded and indexed.
+    # Finished jobs stay in memory for a TTL, capped in number; after that their
+    # status is read from the document row
+    upload_dir: str = os.getenv("UPLOAD_DIR", "data/uploads")
+    ingestion_workers: int = int(os.getenv("INGESTION_WORKERS", "2"))
+    ingestion_batch_chunks: int = int(os.getenv("INGESTION_BATCH_CHUNKS", "512"))
+    ingestion_job_ttl_seconds: float = float(os.getenv("INGESTION_JOB_TTL_SECONDS", "3600"))
+    ingestion_max_finished_jobs: int = int(os.getenv("INGESTION_MAX_FINISHED_JOBS", "1000"))
+    
+    # Bulk upload - files per request, size cap per file (archive entries included),
+    # skipped files listed in the response (all are counted) and how many new
+    # chunks are pooled across files per embedding/index flush
+    bulk_max_files: int = int(os.getenv("BULK_MAX_FILES", "10000"))
+    bulk_max_file_mb: int = int(os.getenv("BULK_MAX_FILE_MB", "100"))
+    bulk_max_skipped_listed: int = int(os.getenv("BULK_MAX_SKIPPED_LISTED", "100"))
+    bulk_batch_chunks: int = int(os.getenv("BULK_BATCH_CHUNKS", "2048"))
+    
+    # PDF extraction - large files are split into page ranges across a process pool
+    pdf_workers: int = int(os.getenv("PDF_WORKERS", str(max(1, (os.cpu_count() or 1) // workers))))
+    pdf_parallel_min_pages: int = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "64"))
+    pdf_pages_per_task: int = int(os.getenv("PDF_PAGES_PER_TASK", "64"))
+    
+    # Password hashing - bcrypt runs in a dedicated process pool (0 = blocking thread
+    # pool); logins beyond password_hash_max_pending queued hashes get HTTP 429
+    bcrypt_rounds: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    password_hash_workers: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 1) // 2 // workers))))
+    password_hash_max_pending: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+    password_hash_nice: int = int(os.getenv("PASSWORD_HASH_NICE", "10"))
+    
+    # Concurrency - threads for blocking work and pooled connections to the LLM API
+    blocking_workers: int = int(os.getenv("BLOCKING_WORKERS", "32"))
+    llm_max_connections: int = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+    llm_timeout: float = float(os.getenv("LLM_TIMEOUT", "60"))
+    
+    # Answer cache - per-user exact and semantic reuse of previous answers
+    answer_cache_enabled: bool = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    answer_cache_ttl_seconds: float = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+    answer_cache_similarity_threshold: float = float(os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", "0.95"))
+    answer_cache_max_entries_per_user: int = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES_PER_USER", "256"))
+    
+    # Chunking - "sentences" and "paragraphs" pack whole segments into a token
+    # budget; "characters" keeps the original chunk_size/chunk_overlap windows
+    chunk_strategy: str = os.getenv("CHUNK_STRATEGY", "sentences")
+    chunk_max_tokens: int = int(os.getenv("CHUNK_MAX_TOKENS", "128"))
+    chunk_overlap_tokens: int = int(os.getenv("CHUNK_OVERLAP_TOKENS", "16"))
+    chunk_tokenizer: str = os.getenv("CHUNK_TOKENIZER", "auto")
+    
+    # Hybrid retrieval - BM25 over each user's chunks fused with vector search (RRF)
+    hybrid_search_enabled: bool = os.getenv("HYBRID_SEARCH_ENABLED", "true").lower() == "true"
+    hybrid_candidates: int = int(os.getenv("HYBRID_CANDIDATES", "20"))
+    hybrid_rrf_k: int = int(os.getenv("HYBRID_RRF_K", "60"))
+    lexical_index_path: str = os.getenv("LEXICAL_INDEX_PATH", "data/lexical_index.db")
+    lexical_index_memory_users: int = int(os.getenv("LEXICAL_INDEX_MEMORY_USERS", "256"))
+    
+    # Reranking - rescore the top rerank_candidates before building the context;
+    # "overlap" is a local lexical scorer, "cross-encoder" needs sentence-transformers
+    rerank_enabled: bool = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+    rerank_scorer: str = os.getenv("RERANK_SCORER", "overlap")
+    rerank_candidates: int = int(os.getenv("RERANK_CANDIDATES", "20"))
+    rerank_model: str = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+    rerank_batch_size: int = int(os.getenv("RERANK_BATCH_SIZE", "32"))
+    
+    # Context assembly - neighbouring chunks are merged (overlap removed) and packed
+    # into a prompt token budget; 0 joins the top similarity_search_k chunks as-is
+    context_max_tokens: int = int(os.getenv("CONTEXT_MAX_TOKENS", "320"))
+    context_candidates: int = int(os.getenv("CONTEXT_CANDIDATES", "8"))
+    
+    # Startup - heavy clients (vector store, SQLite caches, LLM connections,
+    # tokenizer) are created on first use; warm-up opens them ahead of the first
+    # request: "background" (while serving), "blocking" (before serving) or "off"
+    warmup_mode: str = os.getenv("WARMUP_MODE", "background")
     
     # Application Configuration
     chunk_size: int = 500
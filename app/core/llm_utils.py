@@ -1,67 +1,248 @@
-import openai
-from typing import List
+import asyncio
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import random
+import numpy as np
 import re
+import time
 from app.core.config import settings
+from app.core.concurrency import run_blocking
+from app.core.chunking import get_chunker
+from app.core.providers import EmbeddingProvider, get_chat_provider, get_embedding_provider
+from app.services.embedding_cache import embedding_cache, cache_key
 
-# Configure OpenAI client
-openai.api_key = settings.openai_api_key
+def retryable_errors() -> tuple:
+    """Errors worth retrying: rate limiting, server-side failures and transport problems.
+    
+    Resolved when an error is raised, so importing this module doesn't load openai.
+    """
+    import openai
+    return (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError)
 
 def generate_embeddings(text: str) -> List[float]:
-    """Generate embeddings for given text using OpenAI."""
+    """Generate embeddings for given text with the configured embedding provider."""
+    provider = get_embedding_provider()
+    key = cache_key(provider.model, text)
+    if settings.embedding_cache_enabled:
+        cached = embedding_cache.get(key)
+        if cached is not None:
+            return shorten_embedding(cached)
+    
     try:
-        response = openai.embeddings.create(
-            input=text,
-            model=settings.embedding_model
-        )
-        return response.data[0].embedding
+        embedding = _embed_batch_with_retry(provider, [text])[0]
     except Exception as e:
         raise Exception(f"Error generating embeddings: {str(e)}")
+    
+    if settings.embedding_cache_enabled:
+        embedding_cache.put(key, embedding)
+    return shorten_embedding(embedding)
 
-def get_llm_response(question: str, context: str) -> str:
-    """Get LLM response using OpenAI with context."""
+def shorten_embedding(embedding: List[float], dimensions: Optional[int] = None) -> List[float]:
+    """Keep the first ``embedding_dimensions`` values and re-normalize.
+    
+    text-embedding-3 models are trained so that a truncated prefix is itself
+    a usable embedding (Matryoshka representation). Full vectors stay in the
+    embedding cache, so the setting can change without re-embedding.
+    """
+    dimensions = settings.embedding_dimensions if dimensions is None else dimensions
+    if not dimensions or dimensions >= len(embedding):
+        return embedding
+    head = np.asarray(embedding[:dimensions], dtype=np.float64)
+    norm = np.linalg.norm(head)
+    return (head / norm if norm else head).tolist()
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used to bound request sizes."""
+    return len(text) // 4 + 1
+
+def make_embedding_batches(
+    texts: List[str],
+    batch_size: int = None,
+    max_tokens: int = None
+) -> List[List[int]]:
+    """Group text indices into batches bounded by input count and estimated tokens."""
+    batch_size = batch_size or settings.embedding_batch_size
+    max_tokens = max_tokens or settings.embedding_batch_max_tokens
+    
+    batches = []
+    current = []
+    current_tokens = 0
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (len(current) >= batch_size or current_tokens + tokens > max_tokens):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def retry_delay(attempt: int) -> float:
+    """Exponential backoff with jitter for the given retry attempt."""
+    delay = settings.embedding_retry_base_delay * (2 ** attempt)
+    return delay + random.uniform(0, delay / 2)
+
+def _embed_batch_with_retry(provider: EmbeddingProvider, batch: List[str]) -> List[List[float]]:
+    """Embed one batch, retrying with exponential backoff on 429/5xx/connection errors."""
+    attempt = 0
+    while True:
+        try:
+            return provider.embed(batch)
+        except retryable_errors():
+            if attempt >= settings.embedding_max_retries:
+                raise
+            time.sleep(retry_delay(attempt))
+            attempt += 1
+
+async def _aembed_batch_with_retry(provider: EmbeddingProvider, batch: List[str]) -> List[List[float]]:
+    """Async variant of _embed_batch_with_retry."""
+    attempt = 0
+    while True:
+        try:
+            return await provider.aembed(batch)
+        except retryable_errors():
+            if attempt >= settings.embedding_max_retries:
+                raise
+            await asyncio.sleep(retry_delay(attempt))
+            attempt += 1
+
+def generate_embeddings_batch(
+    texts: List[str],
+    batch_size: int = None,
+    max_tokens: int = None,
+    max_concurrency: int = None,
+    on_progress: Optional[Callable[[int, int], None]] = None
+) -> List[List[float]]:
+    """Generate embeddings for many texts using batched, concurrent requests.
+    
+    Texts already in the embedding cache (or repeated within ``texts``) are
+    not sent again. Results are returned in the same order as ``texts``.
+    ``on_progress(done, total)`` is called as batches complete.
+    """
+    if not texts:
+        return []
+    
+    keys = [cache_key(get_embedding_provider().model, text) for text in texts]
+    cached = embedding_cache.get_many(keys) if settings.embedding_cache_enabled else {}
+    
+    # Embed each distinct missing text once
+    missing: Dict[str, str] = {}
+    for key, text in zip(keys, texts):
+        if key not in cached and key not in missing:
+            missing[key] = text
+    
+    if missing:
+        already_done = len(keys) - len(missing)
+        progress = None
+        if on_progress:
+            progress = lambda done, total: on_progress(already_done + done, len(keys))
+        fresh = _embed_uncached(list(missing.values()), batch_size, max_tokens, max_concurrency, progress)
+        fresh_by_key = dict(zip(missing.keys(), fresh))
+        if settings.embedding_cache_enabled:
+            embedding_cache.put_many(fresh_by_key)
+        cached.update(fresh_by_key)
+    
+    if on_progress:
+        on_progress(len(keys), len(keys))
+    return [shorten_embedding(cached[key]) for key in keys]
+
+def _embed_uncached(
+    texts: List[str],
+    batch_size: int = None,
+    max_tokens: int = None,
+    max_concurrency: int = None,
+    on_progress: Optional[Callable[[int, int], None]] = None
+) -> List[List[float]]:
+    """Send texts to the embedding provider in bounded, concurrent batches."""
+    batches = make_embedding_batches(texts, batch_size, max_tokens)
+    max_concurrency = max_concurrency or settings.embedding_max_concurrency
+    provider = get_embedding_provider()
+    
+    embeddings: List[List[float]] = [None] * len(texts)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(batches)))) as executor:
+            futures = {
+                executor.submit(_embed_batch_with_retry, provider, [texts[i] for i in batch]): batch
+                for batch in batches
+            }
+            done = 0
+            for future in as_completed(futures):
+                batch = futures[future]
+                for i, vector in zip(batch, future.result()):
+                    embeddings[i] = vector
+                done += len(batch)
+                if on_progress:
+                    on_progress(done, len(texts))
+    except Exception as e:
+        raise Exception(f"Error generating embeddings: {str(e)}")
+    
+    return embeddings
+
+async def agenerate_embeddings(text: str) -> List[float]:
+    """Async variant of generate_embeddings."""
+    provider = get_embedding_provider()
+    key = cache_key(provider.model, text)
+    if settings.embedding_cache_enabled:
+        cached = await run_blocking(embedding_cache.get, key)
+        if cached is not None:
+            return shorten_embedding(cached)
+    
     try:
-        prompt = f"""You are a helpful assistant. Use the following context to answer the question. If you don't know the answer, say you don't know.
+        embedding = (await _aembed_batch_with_retry(provider, [text]))[0]
+    except Exception as e:
+        raise Exception(f"Error generating embeddings: {str(e)}")
+    
+    if settings.embedding_cache_enabled:
+        await run_blocking(embedding_cache.put, key, embedding)
+    return shorten_embedding(embedding)
+
+def build_messages(question: str, context: str) -> List[Dict[str, str]]:
+    """Chat messages asking the LLM to answer ``question`` from ``context``."""
+    prompt = f"""You are a helpful assistant. Use the following context to answer the question. If you don't know the answer, say you don't know.
 
 Context: {context}
 
 Question: {question}"""
 
-        response = openai.chat.completions.create(
-            model=settings.llm_model,
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that answers questions based on provided context."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=1000,
-            temperature=0.7
-        )
-        return response.choices[0].message.content
+    return [
+        {"role": "system", "content": "You are a helpful assistant that answers questions based on provided context."},
+        {"role": "user", "content": prompt}
+    ]
+
+def get_llm_response(question: str, context: str) -> str:
+    """Get LLM response from the configured chat provider with context."""
+    try:
+        return get_chat_provider().complete(build_messages(question, context), max_tokens=1000, temperature=0.7)
+    except Exception as e:
+        raise Exception(f"Error getting LLM response: {str(e)}")
+
+async def aget_llm_response(question: str, context: str) -> str:
+    """Async variant of get_llm_response."""
+    try:
+        return await get_chat_provider().acomplete(build_messages(question, context), max_tokens=1000, temperature=0.7)
+    except Exception as e:
+        raise Exception(f"Error getting LLM response: {str(e)}")
+
+async def astream_llm_response(question: str, context: str) -> AsyncIterator[str]:
+    """Stream the LLM answer, yielding text deltas as they arrive."""
+    try:
+        stream = get_chat_provider().astream(build_messages(question, context), max_tokens=1000, temperature=0.7)
+        async for token in stream:
+            yield token
     except Exception as e:
         raise Exception(f"Error getting LLM response: {str(e)}")
 
 def split_text_into_chunks(text: str) -> List[str]:
     """Split text into chunks with overlap."""
-    chunks = []
-    start = 0
-    
-    while start < len(text):
-        end = start + settings.chunk_size
-        
-        # If this is not the last chunk, try to break at a sentence boundary
-        if end < len(text):
-            # Look for sentence endings within the last 100 characters of the chunk
-            search_start = max(start, end - 100)
-            sentence_end = text.rfind('.', search_start, end)
-            if sentence_end > start:
-                end = sentence_end + 1
-        
-        chunk = text[start:end].strip()
-        if chunk:  # Only add non-empty chunks
-            chunks.append(chunk)
-        
-        # Move start position with overlap
-        start = end - settings.chunk_overlap
-        if start >= len(text):
-            break
+    return list(iter_text_chunks([text]))
+
+def iter_text_chunks(pieces: Iterable[str]) -> Iterator[str]:
+    """Split a stream of text pieces (e.g. PDF pages) into chunks with overlap.
     
-    return chunks 
\ No newline at end of file
+    Uses the configured ``chunk_strategy``; see ``app.core.chunking`` for
+    chunks with character offsets and token counts.
+    """
+    for chunk in get_chunker().iter_chunks(pieces):
+        yield chunk.text
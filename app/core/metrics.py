@@ -0,0 +1,127 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Upper bounds in seconds; covers sub-millisecond local stages up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class Histogram:
+    """Thread-safe Prometheus-style histogram with fixed buckets and labels."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...], buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # per-bucket counts (last one is +Inf), sum
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Tuple[List[int], float]]:
+        """Per label values: cumulative bucket counts (last is the total) and sum."""
+        with self._lock:
+            series = {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+        return {
+            key: ([sum(counts[:i + 1]) for i in range(len(counts))], total)
+            for key, (counts, total) in series.items()
+        }
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, (cumulative, total) in sorted(self.snapshot().items()):
+            labels = ",".join(f'{name}="{value}"' for name, value in zip(self.labelnames, key))
+            bounds = [repr(float(bound)) for bound in self.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, cumulative):
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative[-1]}")
+        return "\n".join(lines) + "\n"
+
+class StageTimer:
+    """Seconds spent in each named stage of one request or job."""
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.durations[stage] = self.durations.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timed_iter(self, stage: str, items: Iterable[T]) -> Iterator[T]:
+        """Yield from ``items``, counting only the time spent producing them towards ``stage``."""
+        iterator = iter(items)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.record(stage, time.perf_counter() - start)
+                return
+            self.record(stage, time.perf_counter() - start)
+            yield item
+
+    def observe(self, histogram: Histogram, **labels) -> None:
+        """Add every recorded stage to ``histogram`` (which must have a ``stage`` label)."""
+        for stage, seconds in self.durations.items():
+            histogram.observe(seconds, stage=stage, **labels)
+
+# Stage timer of the request being handled; started by get_current_user
+_request_timer: ContextVar[Optional[StageTimer]] = ContextVar("request_timer", default=None)
+
+def start_request_timer() -> StageTimer:
+    timer = StageTimer()
+    _request_timer.set(timer)
+    return timer
+
+def request_timer() -> StageTimer:
+    """The current request's stage timer, started if none is running."""
+    return _request_timer.get() or start_request_timer()
+
+# Metrics exported on /metrics
+
+request_stage_seconds = Histogram(
+    "twerlo_request_stage_seconds",
+    "Time spent in each stage of an API request.",
+    ("route", "stage")
+)
+
+ingestion_stage_seconds = Histogram(
+    "twerlo_ingestion_stage_seconds",
+    "Time spent in each stage of document ingestion.",
+    ("stage",)
+)
+
+REGISTRY = [request_stage_seconds, ingestion_stage_seconds]
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return "".join(metric.render() for metric in REGISTRY)
@@ -0,0 +1,105 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Optional, Tuple
+from app.core.config import settings
+from app.core.concurrency import get_blocking_executor
+
+class HashingBusy(Exception):
+    """Raised when the password hashing queue is full."""
+
+def hash_password(password: str, rounds: int) -> str:
+    """bcrypt hash of ``password`` at the given cost (runs in pool workers)."""
+    from passlib.hash import bcrypt
+    return bcrypt.using(rounds=rounds).hash(password)
+
+def verify_and_update(password: str, hashed_password: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    """Check a password; if it matches but was hashed at another cost, also return a new hash."""
+    from passlib.hash import bcrypt
+    if not bcrypt.verify(password, hashed_password):
+        return False, None
+    if hash_rounds(hashed_password) != rounds:
+        return True, hash_password(password, rounds)
+    return True, None
+
+def hash_rounds(hashed_password: str) -> Optional[int]:
+    """Cost factor of a bcrypt hash such as ``$2b$12$...``."""
+    try:
+        return int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+def _lower_priority() -> None:
+    # Hashing is CPU-bound; let request handling win when they compete for a core
+    try:
+        os.nice(settings.password_hash_nice)
+    except (AttributeError, OSError):
+        pass
+
+class PasswordHasher:
+    """Runs bcrypt off the event loop with a bounded queue.
+
+    Work goes to a dedicated process pool (``password_hash_workers``
+    processes; 0 uses the blocking thread pool instead). At most
+    ``max_pending`` hashes may be queued or running; beyond that calls fail
+    fast with HashingBusy so a login storm cannot pile up unbounded work.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pending = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> Executor:
+        if self.workers <= 0:
+            return get_blocking_executor()
+        with self._lock:
+            if self._pool is None:
+                # bcrypt holds the GIL; separate lower-priority processes keep it off the request path
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_lower_priority
+                )
+            return self._pool
+
+    async def _submit(self, func, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HashingBusy("Too many password operations in progress")
+            self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor(), functools.partial(func, *args))
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(hash_password, password, settings.bcrypt_rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Whether the password matches, plus a replacement hash when the cost setting changed."""
+        return await self._submit(verify_and_update, password, hashed_password, settings.bcrypt_rounds)
+
+    def shutdown(self) -> None:
+        """Stop the hashing worker processes."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+# Global password hasher instance
+password_hasher = PasswordHasher(
+    workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending
+)
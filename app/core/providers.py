@@ -0,0 +1,350 @@
+import asyncio
+import re
+import threading
+import weakref
+import zlib
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Dict, List, Optional
+import numpy as np
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    import httpx
+    import openai
+
+class ConcurrencyLimit:
+    """Caps in-flight requests of one provider (0 = no cap).
+
+    Usable as ``with`` from threads and ``async with`` from any event loop;
+    each loop gets its own semaphore, so sync and async callers have
+    separate budgets of ``limit`` requests.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphore = threading.BoundedSemaphore(limit) if limit > 0 else None
+        self._async_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def __enter__(self):
+        if self._semaphore is not None:
+            self._semaphore.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+    def _loop_semaphore(self) -> Optional[asyncio.Semaphore]:
+        if self.limit <= 0:
+            return None
+        loop = asyncio.get_running_loop()
+        semaphore = self._async_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._async_semaphores[loop] = asyncio.Semaphore(self.limit)
+        return semaphore
+
+    async def __aenter__(self):
+        semaphore = self._loop_semaphore()
+        if semaphore is not None:
+            await semaphore.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        semaphore = self._loop_semaphore()
+        if semaphore is not None:
+            semaphore.release()
+
+class OpenAICompatible:
+    """Pooled sync and async clients for an OpenAI-compatible HTTP server.
+
+    ``base_url`` defaults to the global ``openai.base_url``, then
+    ``OPENAI_BASE_URL``, so a local model server only needs its URL. Clients
+    are rebuilt when the API key or URL changes; async clients are kept per
+    event loop because httpx connections cannot be shared across loops.
+    The ``openai`` package is only imported once a client is needed.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str],
+        timeout: float,
+        max_connections: int,
+        max_concurrency: int,
+        max_retries: Optional[int] = None
+    ):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.limit = ConcurrencyLimit(max_concurrency)
+        self._client = None
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _config(self) -> tuple:
+        import openai
+        # Values set on the openai module take precedence over the settings
+        base_url = self.base_url or openai.base_url or settings.openai_base_url
+        return (openai.api_key or settings.openai_api_key, str(base_url) if base_url else None)
+
+    def _max_retries(self) -> int:
+        import openai
+        return openai.DEFAULT_MAX_RETRIES if self.max_retries is None else self.max_retries
+
+    def _limits(self) -> "httpx.Limits":
+        import httpx
+        return httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+
+    def client(self) -> "openai.OpenAI":
+        import httpx
+        import openai
+        config = self._config()
+        with self._lock:
+            if self._client is None or self._client[0] != config:
+                client = openai.OpenAI(
+                    api_key=config[0],
+                    base_url=config[1],
+                    max_retries=self._max_retries(),
+                    http_client=httpx.Client(limits=self._limits(), timeout=self.timeout)
+                )
+                self._client = (config, client)
+            return self._client[1]
+
+    def async_client(self) -> "openai.AsyncOpenAI":
+        import httpx
+        import openai
+        loop = asyncio.get_running_loop()
+        config = self._config()
+        entry = self._async_clients.get(loop)
+        if entry is None or entry[0] != config:
+            client = openai.AsyncOpenAI(
+                api_key=config[0],
+                base_url=config[1],
+                max_retries=self._max_retries(),
+                http_client=httpx.AsyncClient(limits=self._limits(), timeout=self.timeout)
+            )
+            entry = (config, client)
+            self._async_clients[loop] = entry
+        return entry[1]
+
+    async def awarm_up(self) -> None:
+        """Open a pooled connection of this loop's client ahead of the first request.
+
+        Any response will do, so servers without ``/models`` are fine; errors
+        are ignored and the first real request simply connects itself.
+        """
+        try:
+            await self.async_client().with_options(max_retries=0).models.list()
+        except Exception:
+            pass
+
+class EmbeddingProvider:
+    """Turns texts into embedding vectors.
+
+    ``model`` names the vector space; it is part of embedding cache keys, so
+    providers must not share a name unless their vectors are interchangeable.
+    """
+
+    model: str = ""
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """One request's worth of embeddings, in input order (no retries)."""
+        raise NotImplementedError
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+    async def awarm_up(self) -> None:
+        """Prepare for the first request on the running loop (connections, models)."""
+
+class ChatProvider:
+    """Answers chat messages, whole or streamed as text deltas."""
+
+    def complete(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float) -> str:
+        raise NotImplementedError
+
+    async def acomplete(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float) -> str:
+        raise NotImplementedError
+
+    def astream(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+    async def awarm_up(self) -> None:
+        """Prepare for the first request on the running loop (connections, models)."""
+
+class OpenAIEmbeddings(EmbeddingProvider):
+    """Embeddings endpoint of an OpenAI-compatible server."""
+
+    def __init__(self):
+        # Retries with backoff are done by the callers in llm_utils
+        self.http = OpenAICompatible(
+            settings.embedding_base_url,
+            timeout=settings.embedding_timeout,
+            max_connections=settings.embedding_max_connections,
+            max_concurrency=settings.embedding_request_concurrency,
+            max_retries=0
+        )
+
+    @property
+    def model(self) -> str:
+        return settings.embedding_model
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        with self.http.limit:
+            response = self.http.client().embeddings.create(input=texts, model=self.model)
+        return ordered_embeddings(response)
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        async with self.http.limit:
+            response = await self.http.async_client().embeddings.create(input=texts, model=self.model)
+        return ordered_embeddings(response)
+
+    async def awarm_up(self) -> None:
+        await self.http.awarm_up()
+
+def ordered_embeddings(response) -> List[List[float]]:
+    # The API reports the input index of each vector; don't rely on response order
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+class OpenAIChat(ChatProvider):
+    """Chat completions endpoint of an OpenAI-compatible server."""
+
+    def __init__(self):
+        self.http = OpenAICompatible(
+            settings.llm_base_url,
+            timeout=settings.llm_timeout,
+            max_connections=settings.llm_max_connections,
+            max_concurrency=settings.llm_max_concurrency
+        )
+
+    def complete(self, messages, max_tokens, temperature) -> str:
+        with self.http.limit:
+            response = self.http.client().chat.completions.create(
+                model=settings.llm_model, messages=messages, max_tokens=max_tokens, temperature=temperature
+            )
+        return response.choices[0].message.content
+
+    async def acomplete(self, messages, max_tokens, temperature) -> str:
+        async with self.http.limit:
+            response = await self.http.async_client().chat.completions.create(
+                model=settings.llm_model, messages=messages, max_tokens=max_tokens, temperature=temperature
+            )
+        return response.choices[0].message.content
+
+    async def astream(self, messages, max_tokens, temperature) -> AsyncIterator[str]:
+        # The slot is held until the whole answer has streamed
+        async with self.http.limit:
+            stream = await self.http.async_client().chat.completions.create(
+                model=settings.llm_model, messages=messages, max_tokens=max_tokens, temperature=temperature,
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+    async def awarm_up(self) -> None:
+        await self.http.awarm_up()
+
+class HashEmbeddings(EmbeddingProvider):
+    """Deterministic local embeddings: the normalized sum of a fixed random vector per token.
+
+    Texts sharing terms land close together, which is enough to exercise
+    retrieval offline and in load tests without any model or network.
+    """
+
+    # Token vectors are cached up to this many distinct tokens
+    max_cached_tokens = 100000
+
+    def __init__(self, dimensions: Optional[int] = None):
+        self.dimensions = dimensions or settings.hash_embedding_dimensions
+        self._vectors: Dict[str, np.ndarray] = {}
+
+    @property
+    def model(self) -> str:
+        return f"hash-{self.dimensions}"
+
+    def _token_vector(self, token: str) -> np.ndarray:
+        vector = self._vectors.get(token)
+        if vector is None:
+            if len(self._vectors) >= self.max_cached_tokens:
+                self._vectors.clear()
+            rng = np.random.default_rng(zlib.crc32(token.encode("utf-8")))
+            vector = self._vectors[token] = rng.standard_normal(self.dimensions).astype(np.float32)
+        return vector
+
+    def vector(self, text: str) -> np.ndarray:
+        """Embedding of one text as a float32 array."""
+        from app.services.lexical_index import tokenize
+        embedding = np.zeros(self.dimensions, dtype=np.float32)
+        for token in tokenize(text):
+            embedding += self._token_vector(token)
+        return embedding / max(float(np.linalg.norm(embedding)), 1e-9)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return [self.vector(text).tolist() for text in texts]
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        return self.embed(texts)
+
+WORD_PATTERN = re.compile(r"\S+\s*")
+
+class EchoChat(ChatProvider):
+    """Deterministic local stand-in that answers with the first ``max_tokens`` words of the prompt."""
+
+    def complete(self, messages, max_tokens, temperature) -> str:
+        return "".join(WORD_PATTERN.findall(messages[-1]["content"])[:max_tokens]).strip()
+
+    async def acomplete(self, messages, max_tokens, temperature) -> str:
+        return self.complete(messages, max_tokens, temperature)
+
+    async def astream(self, messages, max_tokens, temperature) -> AsyncIterator[str]:
+        for word in WORD_PATTERN.findall(self.complete(messages, max_tokens, temperature)):
+            yield word
+
+EMBEDDING_PROVIDERS: Dict[str, Callable[[], EmbeddingProvider]] = {
+    "openai": OpenAIEmbeddings,
+    "hash": HashEmbeddings,
+}
+
+CHAT_PROVIDERS: Dict[str, Callable[[], ChatProvider]] = {
+    "openai": OpenAIChat,
+    "echo": EchoChat,
+}
+
+_embedding_providers: Dict[str, EmbeddingProvider] = {}
+_chat_providers: Dict[str, ChatProvider] = {}
+
+def register_embedding_provider(name: str, factory: Callable[[], EmbeddingProvider]) -> None:
+    """Make an embedding backend selectable through ``embedding_provider``."""
+    EMBEDDING_PROVIDERS[name] = factory
+    _embedding_providers.pop(name, None)
+
+def register_chat_provider(name: str, factory: Callable[[], ChatProvider]) -> None:
+    """Make a chat backend selectable through ``llm_provider``."""
+    CHAT_PROVIDERS[name] = factory
+    _chat_providers.pop(name, None)
+
+def get_embedding_provider(name: Optional[str] = None) -> EmbeddingProvider:
+    """Shared instance of the given (or configured) embedding provider."""
+    name = name or settings.embedding_provider
+    provider = _embedding_providers.get(name)
+    if provider is None:
+        try:
+            factory = EMBEDDING_PROVIDERS[name]
+        except KeyError:
+            raise ValueError(f"Unknown embedding provider '{name}'. Available: {', '.join(EMBEDDING_PROVIDERS)}")
+        provider = _embedding_providers[name] = factory()
+    return provider
+
+def get_chat_provider(name: Optional[str] = None) -> ChatProvider:
+    """Shared instance of the given (or configured) chat provider."""
+    name = name or settings.llm_provider
+    provider = _chat_providers.get(name)
+    if provider is None:
+        try:
+            factory = CHAT_PROVIDERS[name]
+        except KeyError:
+            raise ValueError(f"Unknown LLM provider '{name}'. Available: {', '.join(CHAT_PROVIDERS)}")
+        provider = _chat_providers[name] = factory()
+    return provider
@@ -1,30 +1,41 @@
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from typing import Dict, Optional, Tuple
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from app.db.database import get_db
+from app.db.database import SessionLocal
 from app.db.models import User
 from app.core.config import settings
+from app.core.concurrency import run_blocking
+from app.core.metrics import start_request_timer
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing context, created on first use (request handlers hash through app.core.passwords instead)
+_pwd_context = None
+
+def get_pwd_context():
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
+    return _pwd_context
 
 # JWT token scheme
 security = HTTPBearer()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     """Generate password hash."""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token."""
+    from jose import jwt
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -35,38 +46,189 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
-def verify_token(token: str) -> str:
-    """Verify and decode JWT token, return user ID."""
+def credentials_exception(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def create_user_token(user: User) -> str:
+    """Access token carrying the user's id, email and current token version."""
+    return create_access_token(data={"sub": str(user.id), "email": user.email, "ver": user.token_version or 0})
+
+def decode_token(token: str) -> Dict:
+    """Verify and decode JWT token, return its claims."""
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        return user_id
+        if payload.get("sub") is None:
+            raise credentials_exception("Could not validate credentials")
+        return payload
     except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user from JWT token."""
+        raise credentials_exception("Could not validate credentials")
+
+def verify_token(token: str) -> str:
+    """Verify and decode JWT token, return user ID."""
+    return decode_token(token)["sub"]
+
+class RevocationList:
+    """Token versions of users who revoked their tokens, synced from the database.
+    
+    Each process re-reads the users revoked since its last sync at most every
+    ``refresh_seconds``, so checking a token costs no query; a revocation made
+    by another process takes effect within that interval.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._versions: Dict[int, int] = {}
+        self._synced_at: Optional[datetime] = None
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def is_revoked(self, user_id: int, version: int) -> bool:
+        return version < self._versions.get(user_id, 0)
+
+    def needs_refresh(self) -> bool:
+        return time.monotonic() >= self._next_refresh
+
+    def refresh(self, db: Session) -> None:
+        """Pick up revocations committed since the previous sync."""
+        with self._lock:
+            if not self.needs_refresh():
+                return
+            now = datetime.utcnow()
+            query = db.query(User.id, User.token_version)
+            if self._synced_at is None:
+                query = query.filter(User.token_version > 0)
+            else:
+                # Overlap the previous sync to allow for commit delays and clock skew
+                query = query.filter(User.tokens_revoked_at >= self._synced_at - timedelta(seconds=self.refresh_seconds))
+            rows = query.all()
+            db.rollback()
+            for user_id, version in rows:
+                self.note(user_id, version)
+            self._synced_at = now
+            self._next_refresh = time.monotonic() + self.refresh_seconds
+
+    def note(self, user_id: int, version: int) -> None:
+        if version > self._versions.get(user_id, 0):
+            self._versions[user_id] = version
+
+    def clear(self) -> None:
+        with self._lock:
+            self._versions.clear()
+            self._synced_at = None
+            self._next_refresh = 0.0
+
+class UserCache:
+    """Small LRU of user rows, each kept for at most ``ttl_seconds``."""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._users: "OrderedDict[int, Tuple[User, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[User]:
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._users[user_id]
+                return None
+            self._users.move_to_end(user_id)
+            return entry[0]
+
+    def put(self, user: User) -> None:
+        with self._lock:
+            self._users[user.id] = (user, time.monotonic() + self.ttl_seconds)
+            self._users.move_to_end(user.id)
+            while len(self._users) > self.max_size:
+                self._users.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+
+# Global auth state instances
+revocation_list = RevocationList(refresh_seconds=settings.auth_revocation_refresh_seconds)
+user_cache = UserCache(max_size=settings.auth_user_cache_size, ttl_seconds=settings.auth_user_cache_ttl_seconds)
+
+def revoke_user_tokens(db: Session, user: User) -> User:
+    """Invalidate every token issued to ``user`` so far."""
+    user.token_version = (user.token_version or 0) + 1
+    user.tokens_revoked_at = datetime.utcnow()
+    db.commit()
+    db.refresh(user)
+    revocation_list.note(user.id, user.token_version)
+    user_cache.invalidate(user.id)
+    return user
+
+def load_user(db: Session, user_id: int) -> Optional[User]:
+    """Load a user and release the session's connection before returning.
+    
+    Handlers keep the session open while awaiting slow I/O (LLM calls), so the
+    read transaction is ended here instead of holding a pooled connection.
+    """
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is not None:
+        db.expunge(user)
+    db.rollback()
+    return user
+
+def with_session(function, *args):
+    """Run ``function(db, *args)`` with a short-lived session."""
+    db = SessionLocal()
+    try:
+        return function(db, *args)
+    finally:
+        db.close()
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
+    """Get current authenticated user from JWT token.
+    
+    In ``stateless`` auth mode the user is built from the token claims (id,
+    email, token version) without loading the row; depend on
+    ``get_current_user_record`` where the full row is needed.
+    """
     token = credentials.credentials
-    user_id = verify_token(token)
     
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    # Every authenticated request times its stages from here on
+    with start_request_timer().stage("auth"):
+        claims = decode_token(token)
+        user_id = int(claims["sub"])
+        version = claims.get("ver", 0)
+        if settings.auth_mode == "database":
+            user = await run_blocking(with_session, load_user, user_id)
+            if user is None:
+                raise credentials_exception("User not found")
+            if version < (user.token_version or 0):
+                raise credentials_exception("Token has been revoked")
+            return user
+        
+        if revocation_list.needs_refresh():
+            await run_blocking(with_session, revocation_list.refresh)
+        if revocation_list.is_revoked(user_id, version):
+            raise credentials_exception("Token has been revoked")
+        return User(id=user_id, email=claims.get("email"), token_version=version)
+
+async def get_current_user_record(current_user: User = Depends(get_current_user)) -> User:
+    """The authenticated user's full database row, served from a short-lived cache."""
+    if settings.auth_mode == "database":
+        return current_user
+    user = user_cache.get(current_user.id)
     if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        user = await run_blocking(with_session, load_user, current_user.id)
+        if user is None:
+            raise credentials_exception("User not found")
+        user_cache.put(user)
+    if current_user.token_version < (user.token_version or 0):
+        raise credentials_exception("Token has been revoked")
     return user 
\ No newline at end of file
@@ -0,0 +1,83 @@
+import asyncio
+import importlib
+import time
+from typing import Callable, Dict, List, Tuple
+from app.core.config import settings
+from app.core.concurrency import run_blocking
+
+WARMUP_MODES = ("background", "blocking", "off")
+
+def open_vector_store() -> None:
+    from app.services.vector_store import vector_store
+    vector_store.open()
+
+def open_caches() -> None:
+    if settings.embedding_cache_enabled:
+        from app.services.embedding_cache import embedding_cache
+        embedding_cache.open()
+    if settings.hybrid_search_enabled:
+        from app.services.lexical_index import lexical_index
+        lexical_index.open()
+
+def load_tokenizer() -> None:
+    from app.core.chunking import get_tokenizer
+    get_tokenizer().count("warm up")
+
+def load_reranker() -> None:
+    if settings.rerank_enabled:
+        from app.services.reranking import get_scorer
+        # Scoring once loads models that are created lazily (cross-encoder)
+        get_scorer().score("warm up", ["warm up"])
+
+def prepare_auth() -> None:
+    # Token checks import jose on first use; the revocation list syncs on first check
+    importlib.import_module("jose.jwt")
+    from app.core.security import revocation_list, with_session
+    if revocation_list.needs_refresh():
+        with_session(revocation_list.refresh)
+
+def import_clients() -> None:
+    # Loaded on first use by the providers and PDF extraction
+    for module in ("openai", "PyPDF2"):
+        importlib.import_module(module)
+
+# Blocking steps, run one after another on the blocking executor
+BLOCKING_STEPS: List[Tuple[str, Callable[[], None]]] = [
+    ("vector_store", open_vector_store),
+    ("caches", open_caches),
+    ("tokenizer", load_tokenizer),
+    ("reranker", load_reranker),
+    ("auth", prepare_auth),
+    ("clients", import_clients),
+]
+
+async def connect_providers() -> None:
+    from app.core.providers import get_chat_provider, get_embedding_provider
+    await asyncio.gather(get_embedding_provider().awarm_up(), get_chat_provider().awarm_up())
+
+async def warm_up() -> Dict[str, float]:
+    """Open what the first requests would otherwise open; returns seconds per step.
+
+    Steps are best-effort: a failing step is reported and skipped, and the
+    request that needs it opens it as usual. Provider connections are made
+    on the running loop, which is the one serving requests.
+    """
+    timings = {}
+    for name, step in BLOCKING_STEPS:
+        start = time.perf_counter()
+        try:
+            await run_blocking(step)
+        except Exception as e:
+            print(f"Warm-up step {name} failed: {str(e)}")
+        timings[name] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    try:
+        await connect_providers()
+    except Exception as e:
+        print(f"Warm-up step providers failed: {str(e)}")
+    timings["providers"] = time.perf_counter() - start
+
+    steps = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in timings.items())
+    print(f"Warm-up finished in {sum(timings.values()):.2f}s ({steps})")
+    return timings
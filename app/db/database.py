@@ -1,16 +1,110 @@
-from sqlalchemy import create_engine
+from typing import Dict, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
+# Async drivers used when the configured URL names none
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+def server_pool_args() -> Dict:
+    """Pool settings for server databases such as Postgres."""
+    return dict(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=True
+    )
+
+def configure_sqlite(engine: Engine, journal_mode: str, synchronous: str, busy_timeout_ms: int) -> None:
+    """Apply journal mode, synchronous mode and busy timeout to every new SQLite connection."""
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={synchronous}")
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        cursor.close()
+
+def create_db_engine(
+    url: Optional[str] = None,
+    journal_mode: Optional[str] = None,
+    synchronous: Optional[str] = None,
+    busy_timeout_ms: Optional[int] = None
+) -> Engine:
+    """Create the configured engine for ``url`` (default: ``settings.database_url``).
+
+    SQLite connections get WAL journaling, so readers never block the writer,
+    a busy timeout, so concurrent writers wait instead of failing with
+    "database is locked", and a tunable synchronous mode. Server databases
+    (Postgres) get a sized, pre-pinged and recycled connection pool.
+    """
+    url = url or settings.database_url
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return create_engine(url, **server_pool_args())
+
+    busy_timeout_ms = settings.sqlite_busy_timeout_ms if busy_timeout_ms is None else busy_timeout_ms
+    pool_args = {}
+    if parsed.database not in (None, "", ":memory:"):
+        pool_args = dict(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout
+        )
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": busy_timeout_ms / 1000},
+        **pool_args
+    )
+    configure_sqlite(
+        engine,
+        journal_mode or settings.sqlite_journal_mode,
+        synchronous or settings.sqlite_synchronous,
+        busy_timeout_ms
+    )
+    return engine
+
+def async_database_url(url: str) -> str:
+    """``url`` with an async driver, e.g. ``postgresql://`` -> ``postgresql+asyncpg://``."""
+    parsed = make_url(url)
+    if parsed.get_driver_name() in ASYNC_DRIVERS.values():
+        return url
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for '{backend}'. Available: {', '.join(ASYNC_DRIVERS)}")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+def create_async_db_engine(url: Optional[str] = None):
+    """Async engine for the configured database, on asyncpg (Postgres) or aiosqlite (SQLite)."""
+    from sqlalchemy.ext.asyncio import create_async_engine
+    url = async_database_url(url or settings.database_url)
+    if make_url(url).get_backend_name() != "sqlite":
+        return create_async_engine(url, **server_pool_args())
+    engine = create_async_engine(url, connect_args={"timeout": settings.sqlite_busy_timeout_ms / 1000})
+    configure_sqlite(
+        engine.sync_engine, settings.sqlite_journal_mode, settings.sqlite_synchronous, settings.sqlite_busy_timeout_ms
+    )
+    return engine
+
 # Create SQLAlchemy engine
-engine = create_engine(
-    settings.database_url, connect_args={"check_same_thread": False}
-)
+engine = create_db_engine()
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The async engine is created on first use, so processes without async sessions open none
+_async_sessionmaker = None
+
+def get_async_sessionmaker():
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        _async_sessionmaker = async_sessionmaker(create_async_db_engine(), expire_on_commit=False)
+    return _async_sessionmaker
+
 # Create Base class
 Base = declarative_base()
 
@@ -20,4 +114,9 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    """Dependency to get an async database session."""
+    async with get_async_sessionmaker()() as db:
+        yield db
@@ -1,4 +1,7 @@
-from sqlalchemy import create_engine
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateIndex
+from app.db.database import engine
 from app.db.models import Base
 from app.core.config import settings
 import os
@@ -9,13 +12,57 @@ def init_database():
     data_dir = os.path.join(os.getcwd(), "data")
     os.makedirs(data_dir, exist_ok=True)
     
-    # Create database engine
-    engine = create_engine(settings.database_url, connect_args={"check_same_thread": False})
-    
     # Create all tables
     Base.metadata.create_all(bind=engine)
     
+    # Bring tables created by older versions up to date
+    add_missing_columns(engine)
+    add_missing_indexes(engine)
+    
     print(f"Database initialized at: {settings.database_url}")
 
+def add_missing_columns(engine) -> None:
+    """Add model columns (and their indexes) that are missing from existing tables.
+    
+    ``create_all`` only creates missing tables, so columns added to a model
+    after its table exists are added here with ALTER TABLE.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            added = set()
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                default = ""
+                if column.default is not None and column.default.is_scalar:
+                    value = column.default.arg
+                    default = f" DEFAULT '{value}'" if isinstance(value, str) else f" DEFAULT {value}"
+                connection.execute(text(
+                    f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}{default}'
+                ))
+                added.add(column.name)
+            for index in table.indexes:
+                if added & {column.name for column in index.columns}:
+                    connection.execute(CreateIndex(index, if_not_exists=True))
+
+def add_missing_indexes(engine) -> None:
+    """Create model indexes that existing tables do not have yet.
+    
+    A unique index that existing rows violate is reported and skipped, so the
+    app still starts; it is created once the duplicates are removed.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                with engine.begin() as connection:
+                    connection.execute(CreateIndex(index, if_not_exists=True))
+            except IntegrityError as e:
+                print(f"Could not create unique index {index.name}, existing rows violate it: {str(e)}")
+
 if __name__ == "__main__":
     init_database() 
\ No newline at end of file
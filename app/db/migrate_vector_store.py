@@ -0,0 +1,92 @@
+"""Move chunks from the shared "documents" collection into the configured layout.
+
+Run once, with the API stopped, after switching VECTOR_STORE_PARTITIONING
+(and/or VECTOR_STORE_BACKEND):
+
+    VECTOR_STORE_PARTITIONING=per_user python -m app.db.migrate_vector_store
+    VECTOR_STORE_BACKEND=numpy python -m app.db.migrate_vector_store --from-backend chroma
+
+Chunks are upserted under their original ids, so an interrupted run can
+simply be repeated. The source collection is kept unless --delete-source
+is given.
+"""
+import argparse
+from typing import Dict, Optional
+from app.core.config import settings
+from app.services.vector_store import VectorStore
+
+def migrate_vector_store(
+    store: VectorStore,
+    source_name: str = "documents",
+    batch_size: int = 1000,
+    delete_source: bool = False,
+    source: Optional[VectorStore] = None
+) -> Dict[str, int]:
+    """Copy every chunk of ``source_name`` into the collection its user maps to in ``store``.
+
+    ``source`` is the store to read from when moving between backends; by
+    default chunks move between collections of ``store`` itself.
+    """
+    source = source or store
+    if source is store and store.partitioning == "shared":
+        raise ValueError("Target layout is 'shared'; set VECTOR_STORE_PARTITIONING to per_user or sharded")
+
+    if not source.backend.has_collection(source_name):
+        print(f"No '{source_name}' collection found, nothing to migrate")
+        return {"migrated": 0, "skipped": 0, "collections": 0}
+
+    migrated = 0
+    skipped = 0
+    targets = set()
+    offset = 0
+    while True:
+        batch = source.backend.get(source_name, limit=batch_size, offset=offset)
+        if not batch["ids"]:
+            break
+        offset += len(batch["ids"])
+
+        groups: Dict[str, list] = {}
+        for i, metadata in enumerate(batch["metadatas"]):
+            if not metadata or "user_id" not in metadata:
+                skipped += 1
+                continue
+            groups.setdefault(store.collection_name_for(metadata["user_id"], source_name), []).append(i)
+
+        for name, indices in groups.items():
+            store.backend.upsert(
+                name,
+                ids=[batch["ids"][i] for i in indices],
+                documents=[batch["documents"][i] for i in indices],
+                embeddings=[batch["embeddings"][i] for i in indices],
+                metadatas=[batch["metadatas"][i] for i in indices]
+            )
+            migrated += len(indices)
+            targets.add(name)
+        print(f"Migrated {migrated} chunks into {len(targets)} collections")
+
+    if delete_source and not skipped:
+        source.delete_collection(source_name)
+        print(f"Deleted source collection '{source_name}'")
+    elif delete_source:
+        print(f"Kept '{source_name}': {skipped} chunks had no user_id")
+
+    return {"migrated": migrated, "skipped": skipped, "collections": len(targets)}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--partitioning", default=settings.vector_store_partitioning, choices=["shared", "per_user", "sharded"])
+    parser.add_argument("--shards", type=int, default=settings.vector_store_shards)
+    parser.add_argument("--backend", default=settings.vector_store_backend, choices=["chroma", "numpy"])
+    parser.add_argument("--from-backend", choices=["chroma", "numpy"], help="read the shared collection from this backend")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--delete-source", action="store_true", help="drop the shared collection afterwards")
+    args = parser.parse_args()
+
+    store = VectorStore(partitioning=args.partitioning, shards=args.shards, backend=args.backend)
+    source = None
+    if args.from_backend and args.from_backend != args.backend:
+        source = VectorStore(partitioning="shared", backend=args.from_backend)
+    migrate_vector_store(store, batch_size=args.batch_size, delete_source=args.delete_source, source=source)
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, Float, Text, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.database import Base
@@ -10,12 +10,20 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     
+    # Bumped to revoke every token issued before; tokens carry it as "ver"
+    token_version = Column(Integer, default=0, nullable=False)
+    tokens_revoked_at = Column(DateTime, index=True, nullable=True)
+    
     # Relationships
     query_logs = relationship("QueryLog", back_populates="user")
     documents = relationship("Document", back_populates="user")
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        # Uploading a file name again replaces that document; concurrent uploads can't both insert it
+        Index("uq_documents_user_id_original_filename", "user_id", "original_filename", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String, nullable=False)
@@ -24,20 +32,66 @@ class Document(Base):
     file_type = Column(String, nullable=False)
     chunks_count = Column(Integer, default=0)
     uploaded_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    
+    # Ingestion state: queued -> processing -> ready | failed
+    status = Column(String, default="ready", nullable=False)
+    job_id = Column(String, index=True, nullable=True)
+    error = Column(Text, nullable=True)
+    
+    # Bulk upload the document was last uploaded in, for batch status on any worker
+    batch_id = Column(String, index=True, nullable=True)
+    
+    # SHA-256 of the uploaded file, to skip re-uploads of identical content
+    content_hash = Column(String, nullable=True)
     
     # Relationship to User
     user = relationship("User", back_populates="documents")
 
+# Request stages stored as <stage>_time columns of QueryLog
+QUERY_LOG_STAGES = ("auth", "embedding", "search", "rerank", "context", "llm")
+
 class QueryLog(Base):
     __tablename__ = "query_logs"
+    __table_args__ = (
+        # A user's recent queries, and time-range reports
+        Index("ix_query_logs_user_id_timestamp", "user_id", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     time_to_respond = Column(Float, nullable=False)  # Response time in seconds
+    time_to_first_token = Column(Float, nullable=True)  # Streaming only, in seconds
     question = Column(Text, nullable=False)
     llm_response = Column(Text, nullable=False)
     
+    # Seconds spent per stage (null when the stage did not run, e.g. a cached answer)
+    auth_time = Column(Float, nullable=True)
+    embedding_time = Column(Float, nullable=True)
+    search_time = Column(Float, nullable=True)
+    rerank_time = Column(Float, nullable=True)
+    context_time = Column(Float, nullable=True)
+    llm_time = Column(Float, nullable=True)
+    
     # Relationship to User
-    user = relationship("User", back_populates="query_logs") 
\ No newline at end of file
+    user = relationship("User", back_populates="query_logs") 
+    
+class QueryLogDaily(Base):
+    """Per-user daily summary of query logs compacted by the retention job."""
+    __tablename__ = "query_log_daily"
+    __table_args__ = (
+        UniqueConstraint("user_id", "day", name="uq_query_log_daily_user_id_day"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    query_count = Column(Integer, nullable=False)
+    
+    # time_to_respond statistics in seconds
+    time_to_respond_mean = Column(Float, nullable=False)
+    time_to_respond_p50 = Column(Float, nullable=False)
+    time_to_respond_p95 = Column(Float, nullable=False)
+    time_to_respond_p99 = Column(Float, nullable=False)
+    time_to_respond_max = Column(Float, nullable=False)
\ No newline at end of file
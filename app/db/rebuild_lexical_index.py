@@ -0,0 +1,43 @@
+"""Rebuild the BM25 lexical index from the chunks stored in the vector store.
+
+    python -m app.db.rebuild_lexical_index
+
+Use after enabling hybrid search on existing data, or if the index file
+was lost. The whole index is dropped and re-created from every collection.
+"""
+import argparse
+from typing import Dict
+from app.services.lexical_index import LexicalIndex, lexical_index
+from app.services.vector_store import VectorStore, vector_store
+
+def rebuild_lexical_index(store: VectorStore, index: LexicalIndex, batch_size: int = 1000) -> Dict[str, int]:
+    """Replace ``index`` with the chunks of every collection in ``store``."""
+    index.clear()
+    indexed = 0
+    skipped = 0
+    for name in store.get_collection_names():
+        offset = 0
+        while True:
+            batch = store.backend.get(name, limit=batch_size, offset=offset)
+            if not batch["ids"]:
+                break
+            offset += len(batch["ids"])
+            keep = [i for i, metadata in enumerate(batch["metadatas"]) if metadata and "user_id" in metadata]
+            skipped += len(batch["ids"]) - len(keep)
+            index.add(
+                [batch["ids"][i] for i in keep],
+                [batch["documents"][i] for i in keep],
+                [batch["metadatas"][i] for i in keep]
+            )
+            indexed += len(keep)
+        print(f"Indexed {indexed} chunks (through collection '{name}')")
+    return {"indexed": indexed, "skipped": skipped}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    rebuild_lexical_index(vector_store, lexical_index, batch_size=args.batch_size)
+
+if __name__ == "__main__":
+    main()
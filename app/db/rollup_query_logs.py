@@ -0,0 +1,93 @@
+"""Compact old query logs into daily per-user aggregates.
+
+    python -m app.db.rollup_query_logs --days 30
+
+Query logs from whole UTC days older than ``--days`` (default
+``QUERY_LOG_RETENTION_DAYS``) are summarised into ``query_log_daily`` (query
+count plus mean, p50/p95/p99 and max ``time_to_respond``) and deleted, one
+day per transaction. Safe to rerun, e.g. nightly from cron.
+"""
+import argparse
+from datetime import date, datetime, time, timedelta
+from typing import Dict
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.models import QueryLog, QueryLogDaily
+
+PERCENTILES = (50, 95, 99)
+
+def summarize(times: np.ndarray) -> Dict[str, float]:
+    """QueryLogDaily statistics for one user's response times on one day."""
+    stats = {"query_count": len(times), "time_to_respond_mean": float(times.mean())}
+    for percentile, value in zip(PERCENTILES, np.percentile(times, PERCENTILES)):
+        stats[f"time_to_respond_p{percentile}"] = float(value)
+    stats["time_to_respond_max"] = float(times.max())
+    return stats
+
+def merge_into(existing: QueryLogDaily, stats: Dict[str, float]) -> None:
+    """Fold late rows into an existing aggregate.
+
+    Count, mean and max stay exact; percentiles become the count-weighted
+    average of both parts, an approximation once raw rows are gone.
+    """
+    total = existing.query_count + stats["query_count"]
+    for name in ["time_to_respond_mean"] + [f"time_to_respond_p{p}" for p in PERCENTILES]:
+        merged = (getattr(existing, name) * existing.query_count + stats[name] * stats["query_count"]) / total
+        setattr(existing, name, merged)
+    existing.time_to_respond_max = max(existing.time_to_respond_max, stats["time_to_respond_max"])
+    existing.query_count = total
+
+def rollup_day(db: Session, day: date) -> int:
+    """Aggregate and delete one day's query logs; returns the number of rows compacted."""
+    start = datetime.combine(day, time.min)
+    in_day = (QueryLog.timestamp >= start, QueryLog.timestamp < start + timedelta(days=1))
+    rows = db.query(QueryLog.user_id, QueryLog.time_to_respond).filter(*in_day).all()
+    if not rows:
+        return 0
+
+    user_ids = np.array([row[0] for row in rows])
+    times = np.array([row[1] for row in rows], dtype=np.float64)
+    existing = {
+        aggregate.user_id: aggregate
+        for aggregate in db.query(QueryLogDaily).filter(QueryLogDaily.day == day).all()
+    }
+    for user_id in np.unique(user_ids):
+        stats = summarize(times[user_ids == user_id])
+        if int(user_id) in existing:
+            merge_into(existing[int(user_id)], stats)
+        else:
+            db.add(QueryLogDaily(day=day, user_id=int(user_id), **stats))
+
+    db.query(QueryLog).filter(*in_day).delete(synchronize_session=False)
+    db.commit()
+    return len(rows)
+
+def rollup_query_logs(db: Session, retention_days: int) -> Dict[str, int]:
+    """Compact every day that ended more than ``retention_days`` days ago."""
+    cutoff = datetime.combine(datetime.utcnow().date() - timedelta(days=retention_days), time.min)
+    days = rows = 0
+    while True:
+        first = db.query(func.min(QueryLog.timestamp)).filter(QueryLog.timestamp < cutoff).scalar()
+        if first is None:
+            break
+        rows += rollup_day(db, first.date())
+        days += 1
+    return {"days": days, "rows": rows}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=settings.query_log_retention_days, help="days of raw logs to keep")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        result = rollup_query_logs(db, args.days)
+    finally:
+        db.close()
+    print(f"Compacted {result['rows']} query logs from {result['days']} days")
+
+if __name__ == "__main__":
+    main()
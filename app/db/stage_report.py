@@ -0,0 +1,68 @@
+"""Print latency percentiles per request stage from the query log.
+
+    python -m app.db.stage_report --hours 24
+
+Covers the stages stored on each QueryLog row plus the end-to-end
+``time_to_respond`` and, for streamed answers, ``time_to_first_token``.
+"""
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy.orm import Session
+from app.db.database import SessionLocal
+from app.db.models import QueryLog, QUERY_LOG_STAGES
+
+PERCENTILES = (50, 90, 95, 99)
+COLUMNS = [f"{stage}_time" for stage in QUERY_LOG_STAGES] + ["time_to_first_token", "time_to_respond"]
+
+def stage_percentiles(db: Session, since: Optional[datetime] = None, user_id: Optional[int] = None) -> Dict[str, Dict]:
+    """Count, mean and percentiles in milliseconds for every logged stage with data."""
+    query = db.query(*(getattr(QueryLog, column) for column in COLUMNS))
+    if since is not None:
+        query = query.filter(QueryLog.timestamp >= since)
+    if user_id is not None:
+        query = query.filter(QueryLog.user_id == user_id)
+    rows = query.all()
+
+    report = {}
+    for i, column in enumerate(COLUMNS):
+        values = np.array([row[i] for row in rows if row[i] is not None], dtype=np.float64) * 1000
+        if not len(values):
+            continue
+        stats = {"count": len(values), "mean_ms": round(float(values.mean()), 2)}
+        for percentile, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+            stats[f"p{percentile}_ms"] = round(float(value), 2)
+        report[column.replace("_time", "") if column.endswith("_time") else column] = stats
+    return report
+
+def format_report(report: Dict[str, Dict]) -> str:
+    headers = ["stage", "count", "mean_ms"] + [f"p{p}_ms" for p in PERCENTILES]
+    rows: List[List[str]] = [headers]
+    for stage, stats in report.items():
+        rows.append([stage] + [str(stats[header]) for header in headers[1:]])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(headers))]
+    return "\n".join(
+        "  ".join(cell.ljust(width) if i == 0 else cell.rjust(width) for i, (cell, width) in enumerate(zip(row, widths)))
+        for row in rows
+    )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, help="only queries from the last N hours")
+    parser.add_argument("--user-id", type=int)
+    args = parser.parse_args()
+
+    since = datetime.utcnow() - timedelta(hours=args.hours) if args.hours else None
+    db = SessionLocal()
+    try:
+        report = stage_percentiles(db, since=since, user_id=args.user_id)
+    finally:
+        db.close()
+    if not report:
+        print("No queries logged")
+        return
+    print(format_report(report))
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,41 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import auth, documents, qa
-from app.db.database import engine
-from app.db.models import Base
 from app.db.init_db import init_database
+from app.services.ingestion import ingestion_queue
+from app.core.concurrency import claim_once, shutdown_blocking_executor
+from app.core.metrics import render_metrics
+from app.services.text_extraction import shutdown_pdf_pool
+from app.core.passwords import password_hasher
+from app.services.query_logger import query_logger
+from app.core.config import settings
+from app.core.warmup import WARMUP_MODES, warm_up
 import os
 
-# Initialize database
-init_database()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Prepare the database and warm up on startup; drain background work on shutdown."""
+    if settings.warmup_mode not in WARMUP_MODES:
+        raise ValueError(f"Unknown warm-up mode '{settings.warmup_mode}'. Available: {', '.join(WARMUP_MODES)}")
+    init_database()
+    resume_ingestion()
+    
+    warmup_task = None
+    if settings.warmup_mode == "blocking":
+        await warm_up()
+    elif settings.warmup_mode == "background":
+        warmup_task = asyncio.create_task(warm_up())
+    
+    yield
+    
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    stop_background_work()
 
-app = FastAPI(title="Twerlo API", version="1.0.0")
+app = FastAPI(title="Twerlo API", version="1.0.0", lifespan=lifespan)
 
 # Get CORS origins from environment or use defaults
 cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://127.0.0.1:3000").split(",")
@@ -24,6 +50,25 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
+def resume_ingestion():
+    """Pick up uploads that were still being processed when the server stopped.
+    
+    With several workers only one of them does this, so no job runs twice.
+    """
+    if not claim_once("resume_ingestion"):
+        return
+    resumed = ingestion_queue.resume_pending()
+    if resumed:
+        print(f"Resumed {resumed} pending ingestion jobs")
+
+def stop_background_work():
+    """Let running ingestion jobs finish before exiting."""
+    ingestion_queue.shutdown(wait=True)
+    query_logger.shutdown()
+    shutdown_blocking_executor()
+    shutdown_pdf_pool()
+    password_hasher.shutdown()
+
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["authentication"])
 app.include_router(documents.router, prefix="/documents", tags=["documents"])
@@ -37,6 +82,11 @@ async def root():
 async def health_check():
     return {"status": "healthy", "message": "Twerlo API is operational"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Per-stage latency histograms in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.get("/cors-test")
 async def cors_test():
     return {"message": "CORS is working correctly"} 
\ No newline at end of file
@@ -0,0 +1,189 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+from app.core.config import settings
+
+def normalize_question(question: str) -> str:
+    """Normalize a question for exact matching (case, whitespace, trailing punctuation)."""
+    question = re.sub(r"\s+", " ", question.lower()).strip()
+    return question.rstrip("?!. ")
+
+class CachedAnswer:
+    """An answer together with what it was derived from."""
+
+    def __init__(
+        self, answer: str, embedding: List[float], chunk_ids: List[str], expires_at: float, generation: int = 0
+    ):
+        self.answer = answer
+        self.embedding = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(self.embedding)
+        if norm:
+            self.embedding /= norm
+        self.chunk_ids = list(chunk_ids)
+        self.expires_at = expires_at
+        self.generation = generation
+
+class AnswerCache:
+    """Per-user answer cache with an exact tier and a semantic tier.
+
+    The exact tier is keyed on the normalized question and can be checked
+    before any embedding or retrieval work. The semantic tier reuses an
+    answer when a new question's embedding is within ``similarity_threshold``
+    (cosine) of a cached one *and* retrieval returned the same chunk ids.
+    Entries expire after ``ttl_seconds``; a user's entries are dropped when
+    their documents change. Each such change bumps the user's generation;
+    entries cached under an older generation are ignored, and an answer is
+    only cached if the generation is still the one its retrieval ran under.
+    With several worker processes, ``generations`` (shared per-user counters
+    with ``get`` and ``bump``) carries the changes to the other workers' caches.
+    """
+
+    def __init__(self, ttl_seconds: float, similarity_threshold: float, max_entries_per_user: int, generations=None):
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.max_entries_per_user = max_entries_per_user
+        self.generations = generations
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        # Exact hits, semantic hits and misses of each user
+        self._user_counts: Dict[int, List[int]] = {}
+        self._entries: Dict[int, "OrderedDict[str, CachedAnswer]"] = {}
+        # Generations of this process's users when none are shared
+        self._local_generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, user_id: int, outcome: int) -> None:
+        self._user_counts.setdefault(user_id, [0, 0, 0])[outcome] += 1
+
+    def generation(self, user_id: int) -> int:
+        """The user's current generation; capture it before retrieval and pass it to ``put``."""
+        if self.generations is not None:
+            return self.generations.get(user_id)
+        return self._local_generations.get(user_id, 0)
+
+    def _live_entries(self, user_id: int, generation: int = 0) -> "OrderedDict[str, CachedAnswer]":
+        entries = self._entries.get(user_id)
+        if entries is None:
+            return OrderedDict()
+        now = time.time()
+        for key in [
+            key for key, entry in entries.items() if entry.expires_at <= now or entry.generation != generation
+        ]:
+            del entries[key]
+        return entries
+
+    def get_exact(self, user_id: int, question: str) -> Optional[str]:
+        """Answer for an identical (normalized) question, if cached."""
+        generation = self.generation(user_id)
+        with self._lock:
+            entries = self._live_entries(user_id, generation)
+            entry = entries.get(normalize_question(question))
+            if entry is None:
+                return None
+            entries.move_to_end(normalize_question(question))
+            self.exact_hits += 1
+            self._count(user_id, 0)
+            return entry.answer
+
+    def get_semantic(self, user_id: int, embedding: List[float], chunk_ids: List[str]) -> Optional[str]:
+        """Answer for the most similar cached question retrieved from the same chunks."""
+        generation = self.generation(user_id)
+        with self._lock:
+            entries = self._live_entries(user_id, generation)
+            candidates = [
+                (key, entry) for key, entry in entries.items()
+                if entry.chunk_ids == list(chunk_ids)
+            ]
+            if candidates:
+                query = np.asarray(embedding, dtype=np.float32)
+                norm = np.linalg.norm(query)
+                if norm:
+                    query /= norm
+                matrix = np.stack([entry.embedding for _, entry in candidates])
+                scores = matrix @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity_threshold:
+                    key, entry = candidates[best]
+                    entries.move_to_end(key)
+                    self.semantic_hits += 1
+                    self._count(user_id, 1)
+                    return entry.answer
+            self.misses += 1
+            self._count(user_id, 2)
+            return None
+
+    def put(
+        self,
+        user_id: int,
+        question: str,
+        embedding: List[float],
+        chunk_ids: List[str],
+        answer: str,
+        generation: Optional[int] = None
+    ) -> None:
+        """Cache an answer, evicting the user's least recently used entries over the cap.
+
+        ``generation`` is the user's generation when retrieval ran (default:
+        now); the answer is dropped if their documents changed since.
+        """
+        current = self.generation(user_id)
+        if generation is None:
+            generation = current
+        if generation != current:
+            return
+        with self._lock:
+            entries = self._entries.setdefault(user_id, OrderedDict())
+            key = normalize_question(question)
+            entries[key] = CachedAnswer(answer, embedding, chunk_ids, time.time() + self.ttl_seconds, generation)
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries_per_user:
+                entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop every cached answer for a user (their documents changed)."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+            if self.generations is None:
+                self._local_generations[user_id] = self._local_generations.get(user_id, 0) + 1
+        if self.generations is not None:
+            self.generations.bump(user_id)
+
+    def stats(self, user_id: Optional[int] = None) -> Dict[str, float]:
+        """Hit counters and hit rate across all users, or of one user."""
+        with self._lock:
+            if user_id is None:
+                exact_hits, semantic_hits, misses = self.exact_hits, self.semantic_hits, self.misses
+            else:
+                exact_hits, semantic_hits, misses = self._user_counts.get(user_id, (0, 0, 0))
+            lookups = exact_hits + semantic_hits + misses
+            stats = {
+                "exact_hits": exact_hits,
+                "semantic_hits": semantic_hits,
+                "misses": misses,
+                "hit_rate": (exact_hits + semantic_hits) / lookups if lookups else 0.0
+            }
+            if user_id is None:
+                stats["users"] = len(self._entries)
+                stats["entries"] = sum(len(entries) for entries in self._entries.values())
+            else:
+                stats["entries"] = len(self._entries.get(user_id, ()))
+            return stats
+
+def shared_generations():
+    """Generation counters shared by the workers (the store server's), if there are several."""
+    if settings.vector_store_backend == "remote":
+        from app.services.store_server import RemoteGenerations, get_store_client
+        return RemoteGenerations(get_store_client())
+    return None
+
+# Global answer cache instance
+answer_cache = AnswerCache(
+    ttl_seconds=settings.answer_cache_ttl_seconds,
+    similarity_threshold=settings.answer_cache_similarity_threshold,
+    max_entries_per_user=settings.answer_cache_max_entries_per_user,
+    generations=shared_generations()
+)
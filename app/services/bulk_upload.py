@@ -0,0 +1,188 @@
+import gzip
+import hashlib
+import lzma
+import os
+import tarfile
+import uuid
+import zipfile
+import zlib
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.models import Document
+
+SUPPORTED_TYPES = ("pdf", "txt")
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+COPY_BUFFER_BYTES = 1024 * 1024
+# Raised while reading a corrupt, truncated or unsupported archive
+ARCHIVE_ERRORS = (
+    zipfile.BadZipFile, zipfile.LargeZipFile, tarfile.TarError, gzip.BadGzipFile,
+    lzma.LZMAError, zlib.error, EOFError, NotImplementedError
+)
+
+class UploadError(ValueError):
+    """Raised when an upload can't be read as the files or archives it claims to be."""
+
+def is_archive(filename: str) -> bool:
+    return filename.lower().endswith(ARCHIVE_SUFFIXES)
+
+def iter_upload_entries(filename: str, fileobj: BinaryIO) -> Iterator[Tuple[str, BinaryIO]]:
+    """``(name, stream)`` for an uploaded file, or for each file inside an archive.
+
+    Archive entries are read one at a time straight from the upload stream;
+    each stream must be consumed before the next entry is requested.
+    """
+    if not is_archive(filename):
+        yield filename, fileobj
+        return
+    if filename.lower().endswith(".zip"):
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                with archive.open(info) as entry:
+                    yield info.filename, entry
+        return
+    # "r|*" reads the tar as a forward-only stream, whatever its compression
+    with tarfile.open(fileobj=fileobj, mode="r|*") as archive:
+        for member in archive:
+            if member.isfile():
+                yield member.name, archive.extractfile(member)
+
+def save_stream(fileobj: BinaryIO, path: str, max_bytes: int) -> Tuple[int, str]:
+    """Copy a stream to ``path`` in bounded chunks; returns its size and SHA-256."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(path, "wb") as f:
+            while True:
+                block = fileobj.read(COPY_BUFFER_BYTES)
+                if not block:
+                    break
+                size += len(block)
+                if size > max_bytes:
+                    raise ValueError(f"File is larger than {max_bytes // (1024 * 1024)} MB")
+                digest.update(block)
+                f.write(block)
+    except Exception:
+        remove_file(path)
+        raise
+    return size, digest.hexdigest()
+
+def remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def stage_bulk_upload(
+    db: Session,
+    user_id: int,
+    uploads: List[Tuple[str, BinaryIO]],
+    batch_id: str
+) -> Tuple[List[Dict], List[Tuple[Document, str]], int, int]:
+    """Store every supported file of a bulk upload and create or update its document row.
+
+    Files replace the user's documents of the same name, like single uploads;
+    identical content is reported as unchanged. All rows are committed in one
+    transaction and tagged with ``batch_id``. Returns per-file results, the
+    ``(document, path)`` pairs to ingest, the total bytes stored and the number
+    of skipped files; only the first ``bulk_max_skipped_listed`` skipped files
+    are listed in the results.
+    Unreadable archives raise ``UploadError``.
+    """
+    existing = {
+        document.original_filename: document
+        for document in db.query(Document).filter(Document.user_id == user_id).all()
+    }
+    max_bytes = settings.bulk_max_file_mb * 1024 * 1024
+    results: List[Dict] = []
+    staged: List[Tuple[Document, str, Dict]] = []
+    replaced_files: List[str] = []
+    seen = set()
+    bytes_total = 0
+    skipped = 0
+
+    def skip(name: str, detail: str) -> None:
+        nonlocal skipped
+        skipped += 1
+        if skipped <= settings.bulk_max_skipped_listed:
+            results.append({"filename": name, "status": "skipped", "document_id": None, "job_id": None, "detail": detail})
+
+    try:
+        for upload_name, upload_file in uploads:
+            try:
+                for name, stream in iter_upload_entries(upload_name, upload_file):
+                    file_type = name.lower().rsplit(".", 1)[-1]
+                    if file_type not in SUPPORTED_TYPES:
+                        skip(name, f"File type not supported. Allowed types: {', '.join('.' + t for t in SUPPORTED_TYPES)}")
+                        continue
+                    if name in seen:
+                        skip(name, "Duplicate file name in this upload")
+                        continue
+                    if len(staged) >= settings.bulk_max_files:
+                        skip(name, f"More than {settings.bulk_max_files} files in one upload")
+                        continue
+                    seen.add(name)
+                    document = existing.get(name)
+                    if document is not None and document.status in ("queued", "processing"):
+                        skip(name, "Document is still being processed")
+                        continue
+
+                    stored_filename = f"{uuid.uuid4().hex}_{os.path.basename(name)}"
+                    path = os.path.join(settings.upload_dir, stored_filename)
+                    try:
+                        size, content_hash = save_stream(stream, path, max_bytes)
+                    except ValueError as e:
+                        skip(name, str(e))
+                        continue
+                    if size == 0:
+                        remove_file(path)
+                        skip(name, "File is empty")
+                        continue
+                    result = {"filename": name, "status": "queued", "document_id": None, "job_id": None, "detail": None}
+                    results.append(result)
+                    if document is not None and document.status == "ready" and document.content_hash == content_hash:
+                        remove_file(path)
+                        result.update(status="unchanged", document_id=document.id, job_id=document.job_id)
+                        continue
+
+                    if document is None:
+                        document = Document(original_filename=name, user_id=user_id)
+                        db.add(document)
+                    else:
+                        replaced_files.append(document.filename)
+                    document.filename = stored_filename
+                    document.file_size = size
+                    document.file_type = file_type
+                    document.chunks_count = 0
+                    document.status = "queued"
+                    document.job_id = uuid.uuid4().hex
+                    document.error = None
+                    document.content_hash = content_hash
+                    document.batch_id = batch_id
+                    staged.append((document, path, result))
+                    bytes_total += size
+            except ARCHIVE_ERRORS as e:
+                raise UploadError(f"Could not read {upload_name}: {str(e)}") from e
+
+        # One flush assigns ids to new rows; one commit persists the whole batch,
+        # keeping the rows loaded so queueing them doesn't reload each one
+        db.flush()
+        for document, _, result in staged:
+            result.update(document_id=document.id, job_id=document.job_id)
+        expire_on_commit, db.expire_on_commit = db.expire_on_commit, False
+        try:
+            db.commit()
+        finally:
+            db.expire_on_commit = expire_on_commit
+    except Exception:
+        db.rollback()
+        for _, path, _ in staged:
+            remove_file(path)
+        raise
+
+    for filename in replaced_files:
+        remove_file(os.path.join(settings.upload_dir, filename))
+    return results, [(document, path) for document, path, _ in staged], bytes_total, skipped
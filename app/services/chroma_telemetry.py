@@ -0,0 +1,13 @@
+from chromadb.telemetry.product import ProductTelemetryClient, ProductTelemetryEvent
+from overrides import override
+
+class NoopTelemetry(ProductTelemetryClient):
+    """Telemetry client that drops events.
+    
+    Chroma's default client batches events in an unsynchronized dict and
+    fails under concurrent queries from the blocking executor.
+    """
+    
+    @override
+    def capture(self, event: ProductTelemetryEvent) -> None:
+        pass
@@ -0,0 +1,132 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from app.core.chunking import get_tokenizer
+from app.services.vector_store import SearchResult
+
+# Shortest text shared by consecutive chunks that counts as overlap when
+# chunks carry no character offsets (ingested before offsets were stored)
+MIN_TEXT_OVERLAP = 16
+
+class Passage(NamedTuple):
+    """Consecutive chunks of one document merged into a single span."""
+    document: str
+    chunk_ids: List[str]
+    text: str
+    rank: int  # best retrieval rank among the chunks (0 = most relevant)
+    token_count: int
+
+class Context(NamedTuple):
+    """Passages packed into the prompt, in the order they appear."""
+    text: str
+    passages: List[Passage]
+    token_count: int
+
+    @property
+    def chunk_ids(self) -> List[str]:
+        return [chunk_id for passage in self.passages for chunk_id in passage.chunk_ids]
+
+class _Span:
+    """A passage under construction."""
+
+    def __init__(self, result: SearchResult, rank: int):
+        self.chunk_ids = [result.id]
+        self.text = result.text
+        self.rank = rank
+        self.last_index = result.metadata.get("chunk_index")
+        self.end = result.metadata.get("end_char")
+
+    def follows(self, result: SearchResult) -> bool:
+        """Whether ``result`` continues this span (next chunk or overlapping offsets)."""
+        metadata = result.metadata
+        start = metadata.get("start_char")
+        if self.end is not None and start is not None and start <= self.end:
+            return True
+        index = metadata.get("chunk_index")
+        return index is not None and self.last_index is not None and index == self.last_index + 1
+
+    def extend(self, result: SearchResult, rank: int) -> None:
+        metadata = result.metadata
+        start = metadata.get("start_char")
+        end = metadata.get("end_char")
+        if self.end is not None and start is not None and end is not None:
+            if end > self.end:
+                self.text += result.text[self.end - start:] if start <= self.end else " " + result.text
+        else:
+            self.text += text_after_overlap(self.text, result.text)
+        self.chunk_ids.append(result.id)
+        self.rank = min(self.rank, rank)
+        self.last_index = metadata.get("chunk_index")
+        self.end = max(self.end, end) if self.end is not None and end is not None else end
+
+def text_after_overlap(previous: str, text: str) -> str:
+    """``text`` minus any prefix that repeats the end of ``previous``, with a joining space."""
+    probe = text[:MIN_TEXT_OVERLAP]
+    if len(probe) == MIN_TEXT_OVERLAP:
+        position = previous.find(probe, max(0, len(previous) - len(text)))
+        while position != -1:
+            if text.startswith(previous[position:]):
+                return text[len(previous) - position:]
+            position = previous.find(probe, position + 1)
+    return " " + text
+
+def merge_adjacent_chunks(results: List[SearchResult], tokenizer=None) -> List[Passage]:
+    """Merge retrieved chunks that are neighbours in the same document.
+
+    Chunks are grouped by document and ordered by ``chunk_index``; runs of
+    consecutive or overlapping chunks become one passage with the overlap
+    removed (using ``start_char``/``end_char`` when present). Passages are
+    returned best-ranked first, where rank is the position in ``results``.
+    """
+    tokenizer = tokenizer or get_tokenizer()
+    ranks = {}
+    documents: Dict[str, List[SearchResult]] = {}
+    for rank, result in enumerate(results):
+        if result.id in ranks:
+            continue
+        ranks[result.id] = rank
+        metadata = result.metadata
+        document = str(metadata.get("document_id", metadata.get("filename", result.id)))
+        documents.setdefault(document, []).append(result)
+
+    passages = []
+    for document, chunks in documents.items():
+        chunks.sort(key=lambda r: (r.metadata.get("chunk_index", 0), r.metadata.get("start_char", 0)))
+        span: Optional[_Span] = None
+        for result in chunks:
+            if span is not None and span.follows(result):
+                span.extend(result, ranks[result.id])
+                continue
+            if span is not None:
+                passages.append(_finish(document, span, tokenizer))
+            span = _Span(result, ranks[result.id])
+        passages.append(_finish(document, span, tokenizer))
+    passages.sort(key=lambda passage: passage.rank)
+    return passages
+
+def _finish(document: str, span: _Span, tokenizer) -> Passage:
+    return Passage(document, span.chunk_ids, span.text, span.rank, tokenizer.count(span.text))
+
+def build_context(results: List[SearchResult], max_tokens: int, tokenizer=None) -> Context:
+    """Pack the best passages from ``results`` into ``max_tokens`` prompt tokens.
+
+    Passages are taken in rank order and skipped when they don't fit; a
+    merged passage that is too long is trimmed from whichever end holds the
+    worse-ranked chunk until it fits.
+    """
+    tokenizer = tokenizer or get_tokenizer()
+    packed: List[Passage] = []
+    used = 0
+    ranks: Dict[str, Tuple[int, SearchResult]] = {}
+    for rank, result in enumerate(results):
+        ranks.setdefault(result.id, (rank, result))
+    for passage in merge_adjacent_chunks(results, tokenizer):
+        chunks = [ranks[chunk_id] for chunk_id in passage.chunk_ids]
+        while used + passage.token_count > max_tokens and len(chunks) > 1:
+            chunks.pop(0 if chunks[0][0] > chunks[-1][0] else -1)
+            passage = merge_adjacent_chunks([result for _, result in chunks], tokenizer)[0]._replace(
+                rank=min(rank for rank, _ in chunks)
+            )
+        if used + passage.token_count > max_tokens:
+            continue
+        packed.append(passage)
+        used += passage.token_count
+    return Context("\n\n".join(passage.text for passage in packed), packed, used)
@@ -0,0 +1,212 @@
+import sqlite3
+import hashlib
+import threading
+import time
+import unicodedata
+import re
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+from app.core.config import settings
+
+def normalize_text(text: str) -> str:
+    """Normalize chunk text so trivially different copies share a cache key."""
+    text = unicodedata.normalize("NFC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+def cache_key(model: str, text: str) -> str:
+    """Content address of an embedding: model name plus sha256 of the normalized text."""
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{model}:{digest}"
+
+class EmbeddingCache:
+    """Two-tier embedding cache: in-process LRU in front of a SQLite store.
+
+    Vectors are stored as float32 blobs. The SQLite tier is capped at
+    ``max_entries`` and evicts the least recently used rows; recency is
+    refreshed whenever a row is read from disk.
+
+    Lookups stay read-only: the recency of disk hits is buffered and written
+    with the next put (or once ``touch_batch`` keys are pending). The row
+    count is kept in memory and only recounted when it passes the cap, which
+    then evicts an extra ``max_entries // 20`` rows so the next puts don't
+    evict again.
+    """
+
+    touch_batch = 256
+
+    def __init__(self, path: str, max_entries: int, memory_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        # Last read time of disk hits not yet written to last_used
+        self._touched: Dict[str, float] = {}
+        # Rows in the SQLite tier; other processes sharing the file are only seen on a recount
+        self._count = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(
+                self.path, check_same_thread=False, timeout=settings.sqlite_busy_timeout_ms / 1000
+            )
+            # Worker processes share the file; WAL lets them read while one of them writes
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key TEXT PRIMARY KEY,"
+                " vector BLOB NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)"
+            )
+            self._conn.commit()
+            self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return self._conn
+
+    def open(self) -> None:
+        """Open the SQLite file ahead of the first lookup."""
+        with self._lock:
+            self._connection()
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Return cached vectors for the given keys; missing keys are omitted."""
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            pending = []
+            for key in keys:
+                if key in found:
+                    continue
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                    self.memory_hits += 1
+                else:
+                    pending.append(key)
+
+            if pending:
+                conn = self._connection()
+                unique = list(dict.fromkeys(pending))
+                for start in range(0, len(unique), 500):
+                    part = unique[start:start + 500]
+                    rows = conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})",
+                        part
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = np.frombuffer(blob, dtype=np.float32).tolist()
+                        found[key] = vector
+                        self._remember(key, vector)
+                now = time.time()
+                for key in unique:
+                    if key in found:
+                        self._touched[key] = now
+                if len(self._touched) >= self.touch_batch:
+                    self._write_touched(conn)
+                    conn.commit()
+                self.hits += sum(1 for key in pending if key in found)
+                self.misses += sum(1 for key in pending if key not in found)
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        """Store vectors and evict the least recently used rows over the cap."""
+        if not items:
+            return
+        with self._lock:
+            conn = self._connection()
+            now = time.time()
+            changes = conn.total_changes
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [
+                    (key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+                    for key, vector in items.items()
+                ]
+            )
+            # Replaced rows count as changes too, so this can only overestimate until the next recount
+            self._count += conn.total_changes - changes
+            for key, vector in items.items():
+                self._remember(key, np.asarray(vector, dtype=np.float32).tolist())
+                self._touched.pop(key, None)
+            self._write_touched(conn)
+            if self._count > self.max_entries:
+                self._evict(conn)
+            conn.commit()
+
+    def _write_touched(self, conn: sqlite3.Connection) -> None:
+        """Write the buffered recency of disk hits (the caller commits)."""
+        if self._touched:
+            conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Recount the rows and evict the least recently used ones down to below the cap."""
+        self._count = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        overflow = self._count - self.max_entries
+        if overflow > 0:
+            overflow += self.max_entries // 20
+            conn.execute(
+                "DELETE FROM embeddings WHERE key IN ("
+                " SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                (overflow,)
+            )
+            self.evictions += overflow
+            self._count -= overflow
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """Return a single cached vector or None."""
+        return self.get_many([key]).get(key)
+
+    def put(self, key: str, vector: List[float]) -> None:
+        """Store a single vector."""
+        self.put_many({key: vector})
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters for monitoring."""
+        with self._lock:
+            lookups = self.memory_hits + self.hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "hit_rate": (self.memory_hits + self.hits) / lookups if lookups else 0.0
+            }
+
+    def clear(self) -> None:
+        """Drop every cached vector from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            conn = self._connection()
+            conn.execute("DELETE FROM embeddings")
+            conn.commit()
+            self._count = 0
+
+# Global embedding cache instance
+embedding_cache = EmbeddingCache(
+    path=settings.embedding_cache_path,
+    max_entries=settings.embedding_cache_max_entries,
+    memory_entries=settings.embedding_cache_memory_entries
+)
@@ -0,0 +1,508 @@
+import hashlib
+import os
+import uuid
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.core.config import settings
+from app.core.chunking import Chunk, get_chunker
+from app.core.llm_utils import generate_embeddings_batch
+from app.core.metrics import StageTimer, ingestion_stage_seconds
+from app.services.text_extraction import iter_document_text
+from app.db.database import SessionLocal
+from app.db.models import Document
+from app.services.vector_store import vector_store
+from app.services.lexical_index import lexical_index
+from app.services.answer_cache import answer_cache
+
+# Share of overall progress reached at the end of each pipeline stage; a document
+# streams through parsing, chunking and embedding together, so reading it
+# advances progress up to the end of embedding
+STAGE_PROGRESS = {
+    "queued": 0,
+    "parsing": 10,
+    "chunking": 20,
+    "embedding": 85,
+    "indexing": 100,
+}
+
+class IngestionJob:
+    """Progress of one document moving through parse -> chunk -> embed -> index."""
+
+    def __init__(self, job_id: str, document_id: int, user_id: int, path: str, filename: str, file_type: str):
+        self.job_id = job_id
+        self.document_id = document_id
+        self.user_id = user_id
+        self.path = path
+        self.filename = filename
+        self.file_type = file_type
+        self.status = "queued"
+        self.stage = "queued"
+        self.progress = 0.0
+        self.chunks_count = 0
+        self.chunks_embedded = 0
+        self.chunks_removed = 0
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.job_id,
+            "document_id": self.document_id,
+            "filename": self.filename,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 1),
+            "chunks_count": self.chunks_count,
+            "chunks_embedded": self.chunks_embedded,
+            "chunks_removed": self.chunks_removed,
+            "error": self.error
+        }
+
+class BulkJob:
+    """A batch of documents from one bulk upload, ingested together."""
+
+    def __init__(self, batch_id: str, user_id: int, jobs: List[IngestionJob], bytes_total: int):
+        self.batch_id = batch_id
+        self.user_id = user_id
+        self.jobs = jobs
+        self.bytes_total = bytes_total
+        self.status = "queued"
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict:
+        elapsed = 0.0
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+        ready = [job for job in self.jobs if job.status == "ready"]
+        chunks = sum(job.chunks_count for job in ready)
+        return {
+            "batch_id": self.batch_id,
+            "status": self.status,
+            "files_total": len(self.jobs),
+            "files_ready": len(ready),
+            "files_failed": sum(1 for job in self.jobs if job.status == "failed"),
+            "chunks_count": chunks,
+            "chunks_embedded": sum(job.chunks_embedded for job in ready),
+            "bytes_total": self.bytes_total,
+            "elapsed_seconds": round(elapsed, 3),
+            "files_per_second": round(len(ready) / elapsed, 2) if elapsed else 0.0,
+            "chunks_per_second": round(chunks / elapsed, 2) if elapsed else 0.0,
+            "mb_per_second": round(self.bytes_total / 1e6 / elapsed, 3) if elapsed else 0.0,
+            "files": [job.to_dict() for job in self.jobs]
+        }
+
+class IngestionQueue:
+    """Bounded pool of background workers running the ingestion pipeline.
+    
+    Finished jobs stay queryable for ``finished_ttl_seconds``, and at most
+    ``max_finished`` of them are kept; after that a job's status comes from
+    its document row.
+    """
+
+    def __init__(self, max_workers: int, finished_ttl_seconds: float = 3600.0, max_finished: int = 1000):
+        self.max_workers = max_workers
+        self.finished_ttl_seconds = finished_ttl_seconds
+        self.max_finished = max_finished
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[str, IngestionJob] = {}
+        self._bulk_jobs: Dict[str, BulkJob] = {}
+        # Finish time of finished jobs and batches by id, oldest first
+        self._finished: "OrderedDict[str, float]" = OrderedDict()
+        self._finished_bulk: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="ingest"
+                )
+            return self._executor
+
+    def submit(self, document: Document, path: str, job_id: Optional[str] = None) -> IngestionJob:
+        """Queue a persisted upload for processing and return its job."""
+        job = IngestionJob(
+            job_id=job_id or uuid.uuid4().hex,
+            document_id=document.id,
+            user_id=document.user_id,
+            path=path,
+            filename=document.original_filename,
+            file_type=document.file_type
+        )
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._finished.pop(job.job_id, None)
+        self._get_executor().submit(self._run, job)
+        return job
+
+    def submit_bulk(
+        self, documents: List[Tuple[Document, str]], bytes_total: int = 0, batch_id: Optional[str] = None
+    ) -> BulkJob:
+        """Queue many persisted uploads as one batch sharing embedding and index calls."""
+        jobs = [
+            IngestionJob(
+                job_id=document.job_id or uuid.uuid4().hex,
+                document_id=document.id,
+                user_id=document.user_id,
+                path=path,
+                filename=document.original_filename,
+                file_type=document.file_type
+            )
+            for document, path in documents
+        ]
+        bulk = BulkJob(batch_id or uuid.uuid4().hex, jobs[0].user_id if jobs else 0, jobs, bytes_total)
+        with self._lock:
+            for job in jobs:
+                self._jobs[job.job_id] = job
+                self._finished.pop(job.job_id, None)
+            self._bulk_jobs[bulk.batch_id] = bulk
+        self._get_executor().submit(self._run_bulk, bulk)
+        return bulk
+
+    def get_bulk(self, batch_id: str) -> Optional[BulkJob]:
+        """Look up an in-memory bulk job by id."""
+        with self._lock:
+            self._evict_finished()
+            return self._bulk_jobs.get(batch_id)
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        """Look up an in-memory job by id."""
+        with self._lock:
+            self._evict_finished()
+            return self._jobs.get(job_id)
+
+    def resume_pending(self) -> int:
+        """Re-queue documents left queued or processing by a previous process."""
+        db = SessionLocal()
+        try:
+            pending = db.query(Document).filter(Document.status.in_(["queued", "processing"])).all()
+            for document in pending:
+                path = os.path.join(settings.upload_dir, document.filename)
+                if os.path.exists(path):
+                    self.submit(document, path, job_id=document.job_id)
+                else:
+                    document.status = "failed"
+                    document.error = "Uploaded file is missing"
+            db.commit()
+            return len(pending)
+        finally:
+            db.close()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting jobs and optionally wait for running ones."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+
+    def _retire(self, jobs: List[IngestionJob], bulk: Optional[BulkJob] = None) -> None:
+        """Start the eviction clock of finished jobs (and their batch)."""
+        now = time.time()
+        with self._lock:
+            for job in jobs:
+                self._finished[job.job_id] = now
+                self._finished.move_to_end(job.job_id)
+            if bulk is not None:
+                self._finished_bulk[bulk.batch_id] = now
+            self._evict_finished()
+
+    def _evict_finished(self) -> None:
+        """Drop finished jobs past their TTL or beyond the cap (the lock must be held)."""
+        expiry = time.time() - self.finished_ttl_seconds
+        for finished, jobs in ((self._finished, self._jobs), (self._finished_bulk, self._bulk_jobs)):
+            while finished:
+                key, finished_at = next(iter(finished.items()))
+                if finished_at > expiry and len(finished) <= self.max_finished:
+                    break
+                finished.popitem(last=False)
+                jobs.pop(key, None)
+
+    def _set_stage(self, job: IngestionJob, stage: str) -> None:
+        job.stage = stage
+        job.progress = float(STAGE_PROGRESS[_previous_stage(stage)])
+
+    def _run(self, job: IngestionJob) -> None:
+        db = SessionLocal()
+        try:
+            job.status = "processing"
+            self._update_document(db, job, status="processing")
+            self._ingest(db, [job], settings.ingestion_batch_chunks)
+        finally:
+            # New chunks can change answers to questions asked before
+            answer_cache.invalidate_user(job.user_id)
+            db.close()
+            self._retire([job])
+
+    def _run_bulk(self, bulk: BulkJob) -> None:
+        """Process many documents, pooling their chunks into shared embedding and index batches."""
+        db = SessionLocal()
+        bulk.status = "processing"
+        bulk.started_at = time.time()
+        try:
+            for job in bulk.jobs:
+                job.status = "processing"
+            self._update_documents(db, [(job, {"status": "processing"}) for job in bulk.jobs])
+            self._ingest(db, bulk.jobs, settings.bulk_batch_chunks)
+        finally:
+            answer_cache.invalidate_user(bulk.user_id)
+            bulk.finished_at = time.time()
+            bulk.status = "done"
+            db.close()
+            self._retire(bulk.jobs, bulk)
+
+    def _ingest(self, db, jobs: List[IngestionJob], batch_chunks: int) -> None:
+        """Stream the documents' chunks through embedding and indexing in batches of ``batch_chunks``.
+        
+        Chunks of consecutive documents share a batch. A document is marked
+        ready (and its stale chunks dropped) once its last batch is written.
+        """
+        batch: List[PendingChunk] = []
+        finished: List[DocumentStream] = []
+        for job in jobs:
+            stream = DocumentStream(job)
+            chunks = stream.chunks()
+            try:
+                for chunk in chunks:
+                    batch.append(chunk)
+                    if len(batch) >= batch_chunks:
+                        self._flush(db, batch, finished)
+                        batch, finished = [], []
+                        if stream.failed:
+                            break
+            except Exception as e:
+                batch = [chunk for chunk in batch if chunk.stream is not stream]
+                self._fail(db, stream, e)
+            finally:
+                chunks.close()
+            if not stream.failed:
+                finished.append(stream)
+        if batch or finished:
+            self._flush(db, batch, finished)
+
+    def _flush(self, db, batch: List["PendingChunk"], finished: List["DocumentStream"]) -> None:
+        """Embed and index a batch, then finish the documents that have been read completely."""
+        streams = list({id(chunk.stream): chunk.stream for chunk in batch}.values())
+        try:
+            self._write_batch(streams, batch)
+        except Exception as e:
+            for stream in streams + finished:
+                self._fail(db, stream, e)
+            return
+
+        done = []
+        for stream in finished:
+            try:
+                self._set_stage(stream.job, "indexing")
+                # Stale chunks go last, so a document never disappears from search
+                stale = [id_ for id_ in stream.existing if id_ not in stream.ids]
+                with ingestion_stage_seconds.time(stage="index"):
+                    if stale:
+                        vector_store.delete_chunks(stream.job.user_id, stale)
+                    lexical_index.delete(stale)
+            except Exception as e:
+                self._fail(db, stream, e)
+                continue
+            stream.job.chunks_count = len(stream.ids)
+            stream.job.chunks_removed = len(stale)
+            done.append(stream.job)
+        self._update_documents(db, [
+            (job, {"status": "ready", "chunks_count": job.chunks_count, "error": None}) for job in done
+        ])
+        for job in done:
+            _mark_ready(job)
+
+    def _write_batch(self, streams: List["DocumentStream"], batch: List["PendingChunk"]) -> None:
+        """Embed a batch's new chunks, then store them, update moved ones and index everything."""
+        if not batch:
+            return
+        # Only new or changed chunks are embedded
+        new = [chunk for chunk in batch if chunk.id not in chunk.stream.existing]
+        moved = [
+            chunk for chunk in batch
+            if chunk.id in chunk.stream.existing and _metadata_changed(chunk.stream.existing[chunk.id], chunk.metadata)
+        ]
+        for stream in streams:
+            stream.job.stage = "embedding"
+        with ingestion_stage_seconds.time(stage="embed"):
+            embeddings = generate_embeddings_batch([chunk.text for chunk in new])
+
+        for stream in streams:
+            stream.job.stage = "indexing"
+        for chunk in new:
+            # Recorded before writing, so a failed write is rolled back too
+            chunk.stream.added.append(chunk.id)
+        with ingestion_stage_seconds.time(stage="index"):
+            if new:
+                vector_store.add_documents(
+                    documents=[chunk.text for chunk in new],
+                    embeddings=embeddings,
+                    metadatas=[chunk.metadata for chunk in new],
+                    ids=[chunk.id for chunk in new]
+                )
+            for stream in streams:
+                stream_moved = [chunk for chunk in moved if chunk.stream is stream]
+                if stream_moved:
+                    vector_store.update_metadatas(
+                        stream.job.user_id,
+                        [chunk.id for chunk in stream_moved],
+                        [chunk.metadata for chunk in stream_moved]
+                    )
+            lexical_index.add(
+                [chunk.id for chunk in batch],
+                [chunk.text for chunk in batch],
+                [chunk.metadata for chunk in batch]
+            )
+        for chunk in new:
+            chunk.stream.job.chunks_embedded += 1
+
+    def _fail(self, db, stream: "DocumentStream", error: Exception) -> None:
+        """Mark a document failed and remove the chunks this run added for it."""
+        if stream.failed:
+            return
+        stream.failed = True
+        if stream.added:
+            try:
+                vector_store.delete_chunks(stream.job.user_id, stream.added)
+                lexical_index.delete(stream.added)
+            except Exception as e:
+                print(f"Error removing chunks of failed document {stream.job.document_id}: {str(e)}")
+        _mark_failed(stream.job, error)
+        self._update_document(db, stream.job, status="failed", error=str(error))
+
+    def _update_document(self, db, job: IngestionJob, **fields) -> None:
+        self._update_documents(db, [(job, fields)])
+
+    def _update_documents(self, db, updates: List[Tuple[IngestionJob, Dict]]) -> None:
+        """Apply document row updates in a single transaction."""
+        if not updates:
+            return
+        try:
+            with ingestion_stage_seconds.time(stage="db_write"):
+                for job, fields in updates:
+                    db.query(Document).filter(Document.id == job.document_id).update(fields)
+                db.commit()
+        except Exception as e:
+            print(f"Error updating documents {[job.document_id for job, _ in updates]}: {str(e)}")
+            db.rollback()
+
+class PendingChunk:
+    """A chunk read from a document, waiting in a batch to be embedded and indexed."""
+
+    def __init__(self, stream: "DocumentStream", id_: str, text: str, metadata: Dict):
+        self.stream = stream
+        self.id = id_
+        self.text = text
+        self.metadata = metadata
+
+class DocumentStream:
+    """A document's chunks, read lazily and diffed against what is already stored.
+    
+    Texts leave with each batch; only the ids read so far (for dropping
+    stale chunks at the end) and the ids added by this run (for rolling
+    back a failure) stay in memory.
+    """
+
+    def __init__(self, job: IngestionJob):
+        self.job = job
+        self.existing: Dict[str, Dict] = {}
+        self.ids = set()
+        self.added: List[str] = []
+        self.failed = False
+
+    def chunks(self) -> Iterator[PendingChunk]:
+        """Parse and chunk the file as it is read; raises if it yields no text."""
+        job = self.job
+        job.chunks_count = job.chunks_embedded = job.chunks_removed = 0
+        job.stage, job.progress = "parsing", float(STAGE_PROGRESS["queued"])
+        with ingestion_stage_seconds.time(stage="diff"):
+            self.existing = vector_store.get_document_chunks(job.user_id, job.document_id)
+
+        end = STAGE_PROGRESS["embedding"]
+        def on_read(fraction: float) -> None:
+            if job.stage == "parsing":
+                job.stage = "chunking"
+            job.progress = end * fraction
+        timer = StageTimer()
+        pages = timer.timed_iter("parse", iter_document_text(job.path, job.file_type, on_read))
+        chunk_ids = ChunkIds(job.document_id)
+        for index, chunk in enumerate(timer.timed_iter("read", get_chunker().iter_chunks(pages))):
+            chunk_id = chunk_ids.next(chunk.text)
+            self.ids.add(chunk_id)
+            yield PendingChunk(self, chunk_id, chunk.text, build_chunk_metadata(job, index, chunk))
+        timer.record("chunk", timer.durations.pop("read") - timer.durations.get("parse", 0.0))
+        timer.observe(ingestion_stage_seconds)
+        if not self.ids:
+            raise Exception("File appears to be empty or could not be parsed")
+
+def _mark_ready(job: IngestionJob) -> None:
+    job.stage = "done"
+    job.status = "ready"
+    job.progress = 100.0
+
+def _mark_failed(job: IngestionJob, error: Exception) -> None:
+    job.status = "failed"
+    job.error = str(error)
+    print(f"Ingestion job {job.job_id} failed: {str(error)}")
+
+def _previous_stage(stage: str) -> str:
+    """Stage whose end marks the start of ``stage``."""
+    stages = list(STAGE_PROGRESS)
+    return stages[max(0, stages.index(stage) - 1)]
+
+class ChunkIds:
+    """Deterministic chunk ids: the document id plus a hash of the chunk text.
+    
+    Unchanged chunks keep their id when a document is re-ingested; a text
+    repeated within the document gets a numbered suffix.
+    """
+
+    def __init__(self, document_id: int):
+        self.document_id = document_id
+        self._seen: Dict[str, int] = {}
+
+    def next(self, text: str) -> str:
+        """Id of the document's next chunk."""
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:20]
+        occurrence = self._seen.get(digest, 0)
+        self._seen[digest] = occurrence + 1
+        return f"doc{self.document_id}_{digest}" + (f"_{occurrence}" if occurrence else "")
+
+def chunk_ids_for(document_id: int, texts: List[str]) -> List[str]:
+    """Ids of a document's chunks, in order (see ChunkIds)."""
+    chunk_ids = ChunkIds(document_id)
+    return [chunk_ids.next(text) for text in texts]
+
+def delete_document_chunks(user_id: int, document_id: int) -> int:
+    """Remove a document's chunks from the vector store and lexical index."""
+    ids = vector_store.delete_document(user_id, document_id)
+    lexical_index.delete(ids)
+    # Answers may have been drawn from the removed chunks
+    answer_cache.invalidate_user(user_id)
+    return len(ids)
+
+def build_chunk_metadata(job: IngestionJob, index: int, chunk: Chunk) -> Dict:
+    """Vector store metadata for one chunk of a document."""
+    return {
+        "filename": job.filename,
+        "user_id": job.user_id,
+        "document_id": job.document_id,
+        "chunk_index": index,
+        "start_char": chunk.start,
+        "end_char": chunk.end,
+        "token_count": chunk.token_count
+    }
+
+def _metadata_changed(stored: Dict, metadata: Dict) -> bool:
+    # Keys that are no longer written (such as total_chunks) are ignored
+    return any(stored.get(key) != value for key, value in metadata.items())
+
+# Global ingestion queue instance
+ingestion_queue = IngestionQueue(
+    max_workers=settings.ingestion_workers,
+    finished_ttl_seconds=settings.ingestion_job_ttl_seconds,
+    max_finished=settings.ingestion_max_finished_jobs
+)
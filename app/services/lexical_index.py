@@ -0,0 +1,295 @@
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+from app.services.vector_store import SearchResult
+
+# Words, numbers and identifiers such as "ERR-4012", "clause 7.3.1" or "A113/B"
+TOKEN_PATTERN = re.compile(r"[^\W_]+(?:[-_./:#][^\W_]+)*")
+PART_PATTERN = re.compile(r"[^\W_]+")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms; compound identifiers also yield their parts."""
+    terms = []
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        token = match.group()
+        terms.append(token)
+        if not token.isalnum():
+            terms.extend(PART_PATTERN.findall(token))
+    return terms
+
+class UserIndex:
+    """In-memory inverted index over one user's chunks.
+
+    Each chunk gets a row; postings map term -> {row: tf} and are turned
+    into NumPy arrays on first use, so scoring a common term is one vector
+    operation rather than a Python loop over every chunk containing it.
+    ``lock`` guards loading, updating and scoring this user's index.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.rows: Dict[str, int] = {}
+        self.ids: List[Optional[str]] = []
+        self.free_rows: List[int] = []
+        self.lengths = np.zeros(64, dtype=np.float32)
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.chunk_terms: Dict[int, List[str]] = {}
+        self.total_length = 0
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def add(self, chunk_id: str, terms: Counter) -> None:
+        self.remove(chunk_id)
+        if self.free_rows:
+            row = self.free_rows.pop()
+            self.ids[row] = chunk_id
+        else:
+            row = len(self.ids)
+            self.ids.append(chunk_id)
+            if row >= len(self.lengths):
+                self.lengths = np.concatenate([self.lengths, np.zeros(len(self.lengths), dtype=np.float32)])
+        self.rows[chunk_id] = row
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[row] = tf
+            self._arrays.pop(term, None)
+        length = sum(terms.values())
+        self.lengths[row] = length
+        self.chunk_terms[row] = list(terms)
+        self.total_length += length
+
+    def remove(self, chunk_id: str) -> None:
+        row = self.rows.pop(chunk_id, None)
+        if row is None:
+            return
+        self.total_length -= int(self.lengths[row])
+        self.lengths[row] = 0
+        self.ids[row] = None
+        self.free_rows.append(row)
+        for term in self.chunk_terms.pop(row):
+            del self.postings[term][row]
+            self._arrays.pop(term, None)
+            if not self.postings[term]:
+                del self.postings[term]
+
+    def _postings_array(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            rows = self.postings.get(term)
+            if not rows:
+                return None
+            arrays = (
+                np.fromiter(rows.keys(), dtype=np.int64, count=len(rows)),
+                np.fromiter(rows.values(), dtype=np.float32, count=len(rows))
+            )
+            self._arrays[term] = arrays
+        return arrays
+
+    def search(self, terms: List[str], k: int, k1: float, b: float) -> List[Tuple[str, float]]:
+        if not self.rows:
+            return []
+        count = len(self.rows)
+        size = len(self.ids)
+        # Chunks without any terms leave no average length to normalize by
+        average_length = (self.total_length / count if count else 0.0) or 1.0
+        norms = k1 * (1 - b + b * self.lengths[:size] / average_length)
+        scores = np.zeros(size, dtype=np.float32)
+        for term in set(terms):
+            arrays = self._postings_array(term)
+            if arrays is None:
+                continue
+            rows, tfs = arrays
+            idf = math.log(1 + (count - len(rows) + 0.5) / (len(rows) + 0.5))
+            scores[rows] += idf * tfs * (k1 + 1) / (tfs + norms[rows])
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(self.ids[row], float(scores[row])) for row in matched]
+
+class LexicalIndex:
+    """Per-user BM25 index persisted in SQLite, searched from memory.
+
+    Term frequencies and chunk texts are written to SQLite as chunks are
+    ingested. A user's postings are loaded into memory on their first
+    search and kept for the ``memory_users`` most recently active users;
+    later writes update both the database and any loaded index.
+
+    Each user's index has its own lock, so different users are loaded and
+    scored in parallel; the index-wide lock only guards the table of users,
+    and another one the SQLite connection.
+    """
+
+    def __init__(self, path: str, memory_users: int, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.memory_users = memory_users
+        self.k1 = k1
+        self.b = b
+        self._users: "OrderedDict[int, UserIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                " chunk_id TEXT PRIMARY KEY,"
+                " user_id INTEGER NOT NULL,"
+                " text TEXT NOT NULL,"
+                " metadata TEXT NOT NULL,"
+                " terms TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_chunks_user_id ON chunks (user_id)")
+            self._conn.commit()
+        return self._conn
+
+    def open(self) -> None:
+        """Open the SQLite file ahead of the first search."""
+        with self._db_lock:
+            self._connection()
+
+    def _user_entry(self, user_id: int) -> UserIndex:
+        """The user's index, registered (not yet loaded) if it wasn't in memory."""
+        with self._lock:
+            index = self._users.get(user_id)
+            if index is None:
+                index = self._users[user_id] = UserIndex()
+                while len(self._users) > self.memory_users:
+                    self._users.popitem(last=False)
+            self._users.move_to_end(user_id)
+            return index
+
+    def _loaded_users(self, user_ids: Iterable[int]) -> Dict[int, UserIndex]:
+        with self._lock:
+            return {user_id: self._users[user_id] for user_id in set(user_ids) if user_id in self._users}
+
+    def _load(self, user_id: int, index: UserIndex) -> None:
+        """Fill a registered index from SQLite (its lock must be held)."""
+        with self._db_lock:
+            rows = self._connection().execute(
+                "SELECT chunk_id, terms FROM chunks WHERE user_id = ?", (user_id,)
+            ).fetchall()
+        for chunk_id, terms in rows:
+            index.add(chunk_id, Counter(json.loads(terms)))
+        index.loaded = True
+
+    def add(self, ids: List[str], documents: List[str], metadatas: List[Dict]) -> None:
+        """Index chunks (replacing any with the same id) under their metadata's user_id."""
+        rows = []
+        for chunk_id, text, metadata in zip(ids, documents, metadatas):
+            terms = Counter(tokenize(text))
+            rows.append((chunk_id, metadata["user_id"], text, json.dumps(metadata), json.dumps(terms), terms))
+        with self._db_lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO chunks (chunk_id, user_id, text, metadata, terms) VALUES (?, ?, ?, ?, ?)",
+                [row[:5] for row in rows]
+            )
+            conn.commit()
+        # A load racing with this write may already include the rows; adding again is harmless
+        loaded = self._loaded_users(row[1] for row in rows)
+        for chunk_id, user_id, _, _, _, terms in rows:
+            if user_id in loaded:
+                with loaded[user_id].lock:
+                    loaded[user_id].add(chunk_id, terms)
+
+    def search(self, user_id: int, query: str, k: int) -> List[SearchResult]:
+        """The user's top-k chunks by BM25 score for ``query``."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        index = self._user_entry(user_id)
+        with index.lock:
+            if not index.loaded:
+                self._load(user_id, index)
+            ranked = index.search(terms, k, self.k1, self.b)
+        if not ranked:
+            return []
+        with self._db_lock:
+            rows = self._connection().execute(
+                f"SELECT chunk_id, text, metadata FROM chunks WHERE chunk_id IN ({','.join('?' * len(ranked))})",
+                [chunk_id for chunk_id, _ in ranked]
+            ).fetchall()
+        found = {chunk_id: (text, metadata) for chunk_id, text, metadata in rows}
+        return [
+            SearchResult(
+                id=chunk_id,
+                text=found[chunk_id][0],
+                metadata=json.loads(found[chunk_id][1]),
+                distance=None,
+                score=score
+            )
+            for chunk_id, score in ranked if chunk_id in found
+        ]
+
+    def delete(self, ids: List[str]) -> int:
+        """Remove chunks by id; returns how many were indexed."""
+        removed = []
+        with self._db_lock:
+            conn = self._connection()
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                removed.extend(conn.execute(
+                    f"SELECT chunk_id, user_id FROM chunks WHERE chunk_id IN ({placeholders})", batch
+                ).fetchall())
+                conn.execute(f"DELETE FROM chunks WHERE chunk_id IN ({placeholders})", batch)
+            conn.commit()
+        loaded = self._loaded_users(user_id for _, user_id in removed)
+        for chunk_id, user_id in removed:
+            if user_id in loaded:
+                with loaded[user_id].lock:
+                    loaded[user_id].remove(chunk_id)
+        return len(removed)
+
+    def clear(self, user_ids: Optional[Iterable[int]] = None) -> None:
+        """Drop the index of the given users (default: everyone)."""
+        user_ids = None if user_ids is None else list(user_ids)
+        with self._db_lock:
+            conn = self._connection()
+            if user_ids is None:
+                conn.execute("DELETE FROM chunks")
+            else:
+                for user_id in user_ids:
+                    conn.execute("DELETE FROM chunks WHERE user_id = ?", (user_id,))
+            conn.commit()
+        with self._lock:
+            if user_ids is None:
+                self._users.clear()
+            else:
+                for user_id in user_ids:
+                    self._users.pop(user_id, None)
+
+    def count(self, user_id: Optional[int] = None) -> int:
+        """Indexed chunks, overall or for one user."""
+        with self._db_lock:
+            if user_id is None:
+                return self._connection().execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+            return self._connection().execute(
+                "SELECT COUNT(*) FROM chunks WHERE user_id = ?", (user_id,)
+            ).fetchone()[0]
+
+def create_lexical_index():
+    """This process's lexical index.
+
+    With the remote vector store backend it lives in the store server, so
+    every worker sees the same per-user indexes.
+    """
+    if settings.vector_store_backend == "remote":
+        from app.services.store_server import RemoteLexicalIndex, get_store_client
+        return RemoteLexicalIndex(get_store_client())
+    return LexicalIndex(path=settings.lexical_index_path, memory_users=settings.lexical_index_memory_users)
+
+# Global lexical index instance
+lexical_index = create_lexical_index()
@@ -0,0 +1,438 @@
+import json
+import os
+import shutil
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+from app.services.vector_store import SearchResult, VectorBackend
+
+def quantize_int8(matrix: np.ndarray):
+    """Symmetric int8 codes with one float32 scale per row (``row ~= codes * scale``)."""
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(matrix / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+class Segment:
+    """One immutable batch of chunks: a memory-mapped float32 matrix plus records.
+
+    ``alive`` marks rows that have not been deleted or replaced since; rows
+    are killed through ``kill`` so the cached ``live_rows`` stay current.
+    ``codes``/``scales`` hold the int8-quantized rows when quantization is on.
+    """
+
+    def __init__(
+        self,
+        seq: int,
+        matrix: np.ndarray,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict],
+        codes: Optional[np.ndarray] = None,
+        scales: Optional[np.ndarray] = None
+    ):
+        self.seq = seq
+        self.matrix = matrix
+        self.codes = codes
+        self.scales = scales
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.user_ids = np.array([metadata.get("user_id", -1) for metadata in metadatas], dtype=np.int64)
+        self.alive = np.ones(len(ids), dtype=bool)
+        self._live_rows: Optional[np.ndarray] = None
+
+    def kill(self, row: int) -> None:
+        self.alive[row] = False
+        self._live_rows = None
+
+    @property
+    def live_rows(self) -> np.ndarray:
+        """Indices of the live rows, recomputed only after a row is killed."""
+        live_rows = self._live_rows
+        if live_rows is None:
+            live_rows = self._live_rows = np.flatnonzero(self.alive)
+        return live_rows
+
+    @property
+    def live_count(self) -> int:
+        return len(self.live_rows)
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of every row with a unit query (approximate for int8 codes)."""
+        if self.codes is None:
+            return self.matrix @ query
+        # einsum widens int8 to float32 in its inner loop, without a float copy of the codes
+        return np.einsum("ij,j->i", self.codes, query, dtype=np.float32) * self.scales
+
+class NumpyCollection:
+    """A collection stored as append-only segment files in one directory.
+
+    Each add writes ``seg_<seq>.npy`` (unit-normalized float32 rows) and
+    ``seg_<seq>.jsonl`` (id, text and metadata per row), then atomically
+    rewrites ``manifest.json`` listing the live segments. Deletes append
+    ``[seq, id]`` to ``tombstones.jsonl``, hiding that id in segments older
+    than ``seq``; replaced rows need no tombstone, as the newest segment
+    holding an id wins. Compaction merges live rows into a single new segment.
+
+    With ``quantization="int8"`` each segment also gets ``seg_<seq>.q8.npy``
+    codes and ``seg_<seq>.scale.npy`` scales. Queries scan the codes (a
+    quarter of the bytes) for ``rerank_factor * k`` candidates, then rerank
+    those with the float32 rows, which are only paged in for the candidates.
+    """
+
+    def __init__(self, path: str, max_segments: int, quantization: str = "none", rerank_factor: int = 4):
+        if quantization not in ("none", "int8"):
+            raise ValueError(f"Unknown quantization '{quantization}'. Available: none, int8")
+        self.path = path
+        self.max_segments = max_segments
+        self.quantization = quantization
+        self.rerank_factor = max(1, rerank_factor)
+        self.dimensions: Optional[int] = None
+        self.segments: List[Segment] = []
+        # Segment and row of each live id
+        self._locations: Dict[str, tuple] = {}
+        self.next_seq = 1
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    # Persistence
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load(self) -> None:
+        manifest_path = self._file("manifest.json")
+        if not os.path.exists(manifest_path):
+            return
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        self.next_seq = manifest["next_seq"]
+        self.dimensions = manifest.get("dimensions")
+        self.segments = [self._read_segment(seq) for seq in manifest["segments"]]
+        for segment in self.segments:
+            self._register(segment)
+
+        tombstones_path = self._file("tombstones.jsonl")
+        if os.path.exists(tombstones_path):
+            with open(tombstones_path) as f:
+                for line in f:
+                    if line.strip():
+                        seq, id_ = json.loads(line)
+                        self._hide([id_], before_seq=seq)
+
+    def _read_segment(self, seq: int) -> Segment:
+        matrix = np.load(self._file(f"seg_{seq:06d}.npy"), mmap_mode="r")
+        ids, documents, metadatas = [], [], []
+        with open(self._file(f"seg_{seq:06d}.jsonl"), encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                ids.append(record["id"])
+                documents.append(record["document"])
+                metadatas.append(record["metadata"])
+        return Segment(seq, matrix, ids, documents, metadatas, *self._read_codes(seq, matrix))
+
+    def _read_codes(self, seq: int, matrix: np.ndarray):
+        """Quantized codes for a segment, written on first use if quantization was just enabled."""
+        if self.quantization != "int8":
+            return None, None
+        codes_path = self._file(f"seg_{seq:06d}.q8.npy")
+        scales_path = self._file(f"seg_{seq:06d}.scale.npy")
+        if not os.path.exists(codes_path):
+            codes, scales = quantize_int8(np.asarray(matrix))
+            for path, array in ((scales_path, scales), (codes_path, codes)):
+                with open(path + ".tmp", "wb") as f:
+                    np.save(f, array)
+                os.replace(path + ".tmp", path)
+        return np.load(codes_path, mmap_mode="r"), np.load(scales_path)
+
+    def _write_segment(self, seq: int, matrix: np.ndarray, ids: List[str], documents: List[str], metadatas: List[Dict]) -> Segment:
+        # Write under temporary names so a crash never leaves a half-written segment
+        vectors_path = self._file(f"seg_{seq:06d}.npy")
+        records_path = self._file(f"seg_{seq:06d}.jsonl")
+        with open(vectors_path + ".tmp", "wb") as f:
+            np.save(f, matrix)
+        with open(records_path + ".tmp", "w", encoding="utf-8") as f:
+            for id_, document, metadata in zip(ids, documents, metadatas):
+                f.write(json.dumps({"id": id_, "document": document, "metadata": metadata}) + "\n")
+        os.replace(vectors_path + ".tmp", vectors_path)
+        os.replace(records_path + ".tmp", records_path)
+        matrix = np.load(vectors_path, mmap_mode="r")
+        return Segment(seq, matrix, ids, documents, metadatas, *self._read_codes(seq, matrix))
+
+    def _write_manifest(self, segments: List[Segment]) -> None:
+        manifest_path = self._file("manifest.json")
+        with open(manifest_path + ".tmp", "w") as f:
+            json.dump({
+                "segments": [segment.seq for segment in segments],
+                "next_seq": self.next_seq,
+                "dimensions": self.dimensions
+            }, f)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+    def _append_tombstones(self, ids: List[str], seq: int) -> None:
+        with open(self._file("tombstones.jsonl"), "a") as f:
+            for id_ in ids:
+                f.write(json.dumps([seq, id_]) + "\n")
+
+    def _register(self, segment: Segment) -> None:
+        """Index a segment's rows by id; older rows with the same id were replaced."""
+        for row, id_ in enumerate(segment.ids):
+            previous = self._locations.get(id_)
+            if previous is not None:
+                previous[0].kill(previous[1])
+            self._locations[id_] = (segment, row)
+
+    def _hide(self, ids: List[str], before_seq: int) -> int:
+        """Mark rows with these ids dead in segments older than ``before_seq``."""
+        hidden = 0
+        for id_ in ids:
+            location = self._locations.get(id_)
+            if location is not None and location[0].seq < before_seq:
+                segment, row = location
+                segment.kill(row)
+                del self._locations[id_]
+                hidden += 1
+        return hidden
+
+    # Writes
+
+    def upsert(self, ids: List[str], documents: List[str], embeddings: List[List[float]], metadatas: List[Dict]) -> None:
+        """Append a segment; earlier rows with the same ids are replaced."""
+        if not ids:
+            return
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2 or len(matrix) != len(ids):
+            raise ValueError("Expected one embedding per id")
+        if len(set(ids)) != len(ids):
+            raise ValueError("Duplicate ids in one batch")
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            if self.dimensions is None:
+                self.dimensions = matrix.shape[1]
+            elif matrix.shape[1] != self.dimensions:
+                raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match collection dimension {self.dimensions}")
+            seq = self.next_seq
+            self.next_seq += 1
+            segment = self._write_segment(seq, matrix, list(ids), list(documents), list(metadatas))
+            self._hide(ids, before_seq=seq)
+            self._register(segment)
+            self.segments = self.segments + [segment]
+            self._write_manifest(self.segments)
+            if len(self.segments) > self.max_segments:
+                self._compact()
+
+    def delete(self, ids: List[str]) -> int:
+        """Hide rows by id; returns how many were removed."""
+        with self._lock:
+            hidden = self._hide(ids, before_seq=self.next_seq)
+            if hidden:
+                self._append_tombstones(ids, self.next_seq)
+                if self.count() < sum(len(segment.ids) for segment in self.segments) / 2:
+                    self._compact()
+            return hidden
+
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict]) -> None:
+        """Rewrite rows with new metadata, reusing their stored vectors and text."""
+        with self._lock:
+            rows = [(self._locations[id_], metadata) for id_, metadata in zip(ids, metadatas) if id_ in self._locations]
+        if rows:
+            self.upsert(
+                [segment.ids[row] for (segment, row), _ in rows],
+                [segment.documents[row] for (segment, row), _ in rows],
+                np.stack([segment.matrix[row] for (segment, row), _ in rows]),
+                [metadata for _, metadata in rows]
+            )
+
+    def compact(self) -> None:
+        """Merge all live rows into one segment and drop the old files."""
+        with self._lock:
+            self._compact()
+
+    def _compact(self) -> None:
+        old = self.segments
+        live = [(segment, segment.live_rows) for segment in old]
+        matrix = np.concatenate(
+            [np.asarray(segment.matrix[rows]) for segment, rows in live] or [np.empty((0, self.dimensions or 0), dtype=np.float32)]
+        )
+        ids = [segment.ids[row] for segment, rows in live for row in rows]
+        documents = [segment.documents[row] for segment, rows in live for row in rows]
+        metadatas = [segment.metadatas[row] for segment, rows in live for row in rows]
+
+        seq = self.next_seq
+        self.next_seq += 1
+        merged = [self._write_segment(seq, matrix, ids, documents, metadatas)] if ids else []
+        self._write_manifest(merged)
+        self.segments = merged
+        self._locations = {}
+        for segment in merged:
+            self._register(segment)
+        # Every tombstone refers to a segment older than the merged one
+        open(self._file("tombstones.jsonl"), "w").close()
+        for segment in old:
+            for suffix in (".npy", ".jsonl", ".q8.npy", ".scale.npy"):
+                try:
+                    os.remove(self._file(f"seg_{segment.seq:06d}{suffix}"))
+                except OSError:
+                    pass
+
+    # Reads
+
+    def query(self, embedding: List[float], k: int, user_id: Optional[int] = None) -> List[SearchResult]:
+        """Top-k rows by cosine similarity, as squared L2 distances between unit vectors."""
+        segments = self.segments
+        if not segments or k <= 0:
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        # Quantized scores only shortlist candidates for an exact rerank
+        quantized = self.quantization == "int8"
+        shortlist = k * self.rerank_factor if quantized else k
+
+        candidates = []  # (score, segment, row)
+        for segment in segments:
+            scores = segment.scores(query)
+            mask = segment.alive if user_id is None else segment.alive & (segment.user_ids == user_id)
+            if not mask.all():
+                scores = np.where(mask, scores, -np.inf)
+            top = min(shortlist, len(scores))
+            rows = np.argpartition(-scores, top - 1)[:top] if top < len(scores) else np.arange(len(scores))
+            rows = rows[mask[rows]]
+            if quantized and len(rows):
+                # Exact float32 scores for the shortlist
+                exact = segment.matrix[rows] @ query
+                candidates.extend((float(score), segment, int(row)) for score, row in zip(exact, rows))
+            else:
+                candidates.extend((float(scores[row]), segment, int(row)) for row in rows)
+
+        candidates.sort(key=lambda candidate: -candidate[0])
+        return [
+            SearchResult(
+                id=segment.ids[row],
+                text=segment.documents[row],
+                metadata=segment.metadatas[row],
+                distance=max(0.0, 2.0 - 2.0 * score)
+            )
+            for score, segment, row in candidates[:k]
+        ]
+
+    def get(self, limit: int, offset: int = 0) -> Dict[str, List]:
+        """A page of live rows in segment order; whole segments before ``offset`` are skipped by count."""
+        page = []
+        for segment in self.segments:
+            if len(page) >= limit:
+                break
+            live_rows = segment.live_rows
+            if offset >= len(live_rows):
+                offset -= len(live_rows)
+                continue
+            page.extend((segment, row) for row in live_rows[offset:offset + limit - len(page)])
+            offset = 0
+        return {
+            "ids": [segment.ids[row] for segment, row in page],
+            "documents": [segment.documents[row] for segment, row in page],
+            "embeddings": [segment.matrix[row].tolist() for segment, row in page],
+            "metadatas": [segment.metadatas[row] for segment, row in page]
+        }
+
+    def find(self, where: Dict) -> Dict[str, Dict]:
+        """Metadata by id of live rows matching every key/value in ``where``."""
+        found = {}
+        for segment in self.segments:
+            rows = segment.alive
+            if "user_id" in where:
+                rows = rows & (segment.user_ids == where["user_id"])
+            for row in np.flatnonzero(rows):
+                metadata = segment.metadatas[row]
+                if all(metadata.get(key) == value for key, value in where.items()):
+                    found[segment.ids[row]] = metadata
+        return found
+
+    def count(self) -> int:
+        return sum(segment.live_count for segment in self.segments)
+
+class NumpyBackend(VectorBackend):
+    """In-process exact search over memory-mapped NumPy matrices, one directory per collection.
+
+    Embeddings are normalized once at insert, so a query is one matrix-vector
+    product per segment plus ``argpartition`` for the top k. Suited to small
+    and medium collections where a full scan is cheaper than an ANN index's
+    per-query overhead. ``quantization="int8"`` scans int8 codes instead and
+    reranks a shortlist at full precision.
+    """
+
+    name = "numpy"
+
+    def __init__(self, path: str, max_segments: int = 8, quantization: str = "none", rerank_factor: int = 4):
+        self.path = path
+        self.max_segments = max_segments
+        self.quantization = quantization
+        self.rerank_factor = rerank_factor
+        os.makedirs(path, exist_ok=True)
+        self._collections: Dict[str, NumpyCollection] = {}
+        self._lock = threading.Lock()
+
+    def _collection(self, name: str, create: bool) -> Optional[NumpyCollection]:
+        collection = self._collections.get(name)
+        if collection is None:
+            with self._lock:
+                collection = self._collections.get(name)
+                if collection is None:
+                    path = os.path.join(self.path, name)
+                    if not create and not os.path.exists(os.path.join(path, "manifest.json")):
+                        return None
+                    collection = NumpyCollection(path, self.max_segments, self.quantization, self.rerank_factor)
+                    self._collections[name] = collection
+        return collection
+
+    def add(self, collection_name, ids, documents, embeddings, metadatas) -> None:
+        self.upsert(collection_name, ids, documents, embeddings, metadatas)
+
+    def upsert(self, collection_name, ids, documents, embeddings, metadatas) -> None:
+        self._collection(collection_name, create=True).upsert(ids, documents, embeddings, metadatas)
+
+    def query(self, collection_name, embedding, k, user_id=None) -> List[SearchResult]:
+        collection = self._collection(collection_name, create=False)
+        if collection is None:
+            return []
+        return collection.query(embedding, k, user_id)
+
+    def get(self, collection_name, limit, offset=0) -> Dict[str, List]:
+        collection = self._collection(collection_name, create=False)
+        if collection is None:
+            return {"ids": [], "documents": [], "embeddings": [], "metadatas": []}
+        return collection.get(limit, offset)
+
+    def find(self, collection_name, where) -> Dict[str, Dict]:
+        collection = self._collection(collection_name, create=False)
+        return collection.find(where) if collection is not None else {}
+
+    def update_metadatas(self, collection_name, ids, metadatas) -> None:
+        collection = self._collection(collection_name, create=False)
+        if collection is not None:
+            collection.update_metadatas(ids, metadatas)
+
+    def delete(self, collection_name, ids) -> None:
+        collection = self._collection(collection_name, create=False)
+        if collection is not None and ids:
+            collection.delete(ids)
+
+    def has_collection(self, collection_name) -> bool:
+        return self._collection(collection_name, create=False) is not None
+
+    def list_collections(self) -> List[str]:
+        return sorted(
+            name for name in os.listdir(self.path)
+            if os.path.exists(os.path.join(self.path, name, "manifest.json"))
+        )
+
+    def delete_collection(self, collection_name) -> None:
+        with self._lock:
+            self._collections.pop(collection_name, None)
+            shutil.rmtree(os.path.join(self.path, collection_name), ignore_errors=True)
@@ -0,0 +1,128 @@
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.models import QueryLog
+
+# Every row carries every column so a batch is one executemany INSERT
+COLUMNS = [column.name for column in QueryLog.__table__.columns if column.name != "id"]
+
+class QueryLogger:
+    """Write-behind buffer for query logs.
+
+    ``log`` only appends the row to an in-memory list; a background thread
+    inserts the buffered rows in one statement once ``batch_size`` rows are
+    waiting or ``flush_seconds`` have passed. Beyond ``max_pending``
+    buffered rows new ones are dropped (and counted) rather than slowing
+    requests down. ``shutdown`` drains the buffer.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        flush_seconds: float,
+        max_pending: int,
+        session_factory: Optional[Callable[[], Session]] = None
+    ):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self.session_factory = session_factory or SessionLocal
+        self._pending: List[Dict] = []
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+
+    def log(self, **fields) -> None:
+        """Queue one QueryLog row (column name -> value); the timestamp defaults to now."""
+        row = dict.fromkeys(COLUMNS)
+        row["timestamp"] = datetime.utcnow()
+        row.update(fields)
+        with self._condition:
+            if self._closed:
+                closed = True
+            elif len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            else:
+                closed = False
+                self._pending.append(row)
+                self._ensure_thread()
+                if len(self._pending) >= self.batch_size:
+                    self._condition.notify()
+        if closed:
+            # Late requests during shutdown are written directly
+            self._write([row])
+
+    def flush(self) -> int:
+        """Write every buffered row now; returns how many were written or failed."""
+        with self._flush_lock:
+            with self._condition:
+                rows, self._pending = self._pending, []
+            if rows:
+                self._write(rows)
+            return len(rows)
+
+    def shutdown(self) -> None:
+        """Stop the writer thread after it has written everything still buffered."""
+        with self._condition:
+            self._closed = True
+            thread, self._thread = self._thread, None
+            self._condition.notify()
+        if thread is not None:
+            thread.join()
+        self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes
+        }
+
+    def _ensure_thread(self) -> None:
+        # Called with the condition held
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="query-log-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if len(self._pending) < self.batch_size and not self._closed:
+                    self._condition.wait(self.flush_seconds)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def _write(self, rows: List[Dict]) -> None:
+        db = self.session_factory()
+        try:
+            db.execute(QueryLog.__table__.insert(), rows)
+            db.commit()
+            self.written += len(rows)
+            self.flushes += 1
+        except Exception as e:
+            # Log error but never fail a request over its query log
+            print(f"Error writing {len(rows)} query logs: {str(e)}")
+            db.rollback()
+            self.failed += len(rows)
+        finally:
+            db.close()
+
+# Global query logger instance
+query_logger = QueryLogger(
+    batch_size=settings.query_log_batch_size,
+    flush_seconds=settings.query_log_flush_seconds,
+    max_pending=settings.query_log_max_pending
+)
@@ -0,0 +1,119 @@
+import math
+import threading
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from app.core.config import settings
+from app.services.lexical_index import tokenize
+from app.services.vector_store import SearchResult
+
+# Question words that say nothing about which chunk answers the question
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it of on or that the this to was what when "
+    "where which who why will with".split()
+)
+
+class OverlapScorer:
+    """Cheap lexical relevance: BM25 over the candidate set plus a bonus for query bigrams.
+
+    Term statistics come from the candidates themselves, so terms every
+    candidate shares count for little and rare exact matches (codes, names,
+    numbers) dominate. All candidates are scored together as one
+    term-frequency matrix.
+    """
+
+    name = "overlap"
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, bigram_weight: float = 0.5):
+        self.k1 = k1
+        self.b = b
+        self.bigram_weight = bigram_weight
+
+    def score(self, query: str, texts: List[str]) -> np.ndarray:
+        query_tokens = [token for token in tokenize(query) if token not in STOPWORDS]
+        terms = list(dict.fromkeys(query_tokens))
+        if not texts or not terms:
+            return np.zeros(len(texts), dtype=np.float32)
+        column = {term: j for j, term in enumerate(terms)}
+        bigrams = set(zip(query_tokens, query_tokens[1:]))
+
+        tf = np.zeros((len(texts), len(terms)), dtype=np.float32)
+        lengths = np.empty(len(texts), dtype=np.float32)
+        bigram_hits = np.zeros(len(texts), dtype=np.float32)
+        for i, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths[i] = len(tokens)
+            for token in tokens:
+                j = column.get(token)
+                if j is not None:
+                    tf[i, j] += 1
+            if bigrams:
+                bigram_hits[i] = len(bigrams.intersection(zip(tokens, tokens[1:])))
+
+        document_frequency = (tf > 0).sum(axis=0)
+        idf = np.log(1 + (len(texts) - document_frequency + 0.5) / (document_frequency + 0.5))
+        norms = self.k1 * (1 - self.b + self.b * lengths / max(lengths.mean(), 1.0))
+        scores = (idf * tf * (self.k1 + 1) / (tf + norms[:, None])).sum(axis=1)
+        if bigrams:
+            scores += self.bigram_weight * float(idf.mean()) * bigram_hits / math.sqrt(len(bigrams))
+        return scores.astype(np.float32)
+
+class CrossEncoderScorer:
+    """Relevance from a local cross-encoder model (optional sentence-transformers dependency)."""
+
+    name = "cross-encoder"
+
+    def __init__(self, model_name: str, batch_size: int = 32):
+        from sentence_transformers import CrossEncoder
+        self.model = CrossEncoder(model_name)
+        self.batch_size = batch_size
+
+    def score(self, query: str, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros(0, dtype=np.float32)
+        scores = self.model.predict([(query, text) for text in texts], batch_size=self.batch_size)
+        return np.asarray(scores, dtype=np.float32)
+
+# Scorer registry
+
+SCORERS: Dict[str, Callable[[], object]] = {
+    "overlap": lambda: OverlapScorer(),
+    "cross-encoder": lambda: CrossEncoderScorer(settings.rerank_model, settings.rerank_batch_size),
+}
+
+_scorers: Dict[str, object] = {}
+_scorers_lock = threading.Lock()
+
+def register_scorer(name: str, factory: Callable[[], object]) -> None:
+    """Make a rerank scorer selectable through ``rerank_scorer``.
+
+    A scorer has ``score(query, texts) -> np.ndarray`` returning one
+    relevance score per text, higher is better.
+    """
+    SCORERS[name] = factory
+    with _scorers_lock:
+        _scorers.pop(name, None)
+
+def get_scorer(name: Optional[str] = None):
+    """Scorer for the given (or configured) name, created once and shared."""
+    name = name or settings.rerank_scorer
+    with _scorers_lock:
+        scorer = _scorers.get(name)
+        if scorer is None:
+            try:
+                factory = SCORERS[name]
+            except KeyError:
+                raise ValueError(f"Unknown rerank scorer '{name}'. Available: {', '.join(SCORERS)}")
+            scorer = _scorers[name] = factory()
+        return scorer
+
+def rerank(question: str, results: List[SearchResult], scorer=None) -> List[SearchResult]:
+    """Reorder candidates by the scorer's relevance, keeping retrieval order for ties.
+
+    Each result's ``score`` is replaced by its rerank score.
+    """
+    if not results:
+        return []
+    scorer = scorer or get_scorer()
+    scores = scorer.score(question, [result.text for result in results])
+    order = np.argsort(-scores, kind="stable")
+    return [results[i]._replace(score=float(scores[i])) for i in order]
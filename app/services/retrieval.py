@@ -0,0 +1,31 @@
+from typing import Dict, List
+from app.core.config import settings
+from app.services.vector_store import vector_store, SearchResult
+from app.services.lexical_index import lexical_index
+
+def reciprocal_rank_fusion(rankings: List[List[SearchResult]], k: int = 60) -> List[SearchResult]:
+    """Merge ranked lists by summing 1 / (k + rank) per chunk.
+
+    Only ranks are used, so BM25 scores and vector distances need no
+    calibration against each other. The fused score is stored in ``score``;
+    a chunk found by vector search keeps its distance.
+    """
+    scores: Dict[str, float] = {}
+    results: Dict[str, SearchResult] = {}
+    for ranking in rankings:
+        for rank, result in enumerate(ranking):
+            scores[result.id] = scores.get(result.id, 0.0) + 1.0 / (k + rank + 1)
+            if result.id not in results or results[result.id].distance is None:
+                results[result.id] = result
+    ordered = sorted(scores, key=lambda id_: -scores[id_])
+    return [results[id_]._replace(score=scores[id_]) for id_ in ordered]
+
+def hybrid_search(question: str, query_embedding: List[float], k: int, user_id: int) -> List[SearchResult]:
+    """The user's top-k chunks from vector search, fused with BM25 when hybrid search is on."""
+    if not settings.hybrid_search_enabled:
+        return vector_store.search(query_embedding=query_embedding, k=k, user_id=user_id)
+
+    candidates = max(k, settings.hybrid_candidates)
+    vector_results = vector_store.search(query_embedding=query_embedding, k=candidates, user_id=user_id)
+    lexical_results = lexical_index.search(user_id, question, candidates)
+    return reciprocal_rank_fusion([vector_results, lexical_results], settings.hybrid_rrf_k)[:k]
@@ -0,0 +1,329 @@
+"""Store server: one process owning the vector store for a multi-worker deployment.
+
+Neither an embedded Chroma client nor the lexical index's in-memory
+per-user indexes can be shared by several processes, so with
+``VECTOR_STORE_BACKEND=remote`` the web workers reach them here over a
+local Unix socket instead. The server also keeps a per-user generation
+counter that workers use to invalidate each other's answer caches.
+Calls are pickled, so connections are authenticated with a random key the
+server writes next to its socket, readable only by the user running it.
+
+    VECTOR_STORE_BACKEND=chroma python -m app.services.store_server
+
+``run.py`` starts it automatically when ``WORKERS`` is above 1.
+"""
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.services.vector_store import SearchResult, VectorBackend
+
+class Generations:
+    """Per-user counters, bumped whenever a user's documents change."""
+
+    def __init__(self):
+        self._values: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> int:
+        return self._values.get(user_id, 0)
+
+    def bump(self, user_id: int) -> int:
+        with self._lock:
+            value = self._values[user_id] = self._values.get(user_id, 0) + 1
+            return value
+
+# Methods workers may call on each hosted object
+EXPOSED = {
+    "vector": (
+        "add", "upsert", "query", "get", "find", "update_metadatas", "delete",
+        "has_collection", "list_collections", "delete_collection"
+    ),
+    "lexical": ("add", "search", "delete", "clear", "count", "open"),
+    "generations": ("get", "bump"),
+}
+
+def authkey_path(address: str) -> str:
+    return address + ".key"
+
+def create_authkey(address: str) -> bytes:
+    """Write a fresh random key next to the socket, readable by the owner only."""
+    key = os.urandom(32)
+    path = authkey_path(address)
+    if os.path.exists(path):
+        os.unlink(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+def read_authkey(address: str) -> bytes:
+    """The key of the store server at ``address``; only its owner can read it."""
+    with open(authkey_path(address), "rb") as f:
+        return f.read()
+
+class StoreServer:
+    """Serves calls on a vector backend, a lexical index and the generations.
+
+    Each worker connection gets a thread that answers one call at a time;
+    the hosted objects do their own locking, as they do in a single process.
+    Errors raised by a call are sent back and re-raised in the worker.
+    """
+
+    def __init__(self, address: str, backend: VectorBackend, lexical_index):
+        self.address = address
+        self.targets = {"vector": backend, "lexical": lexical_index, "generations": Generations()}
+        self._listener: Optional[Listener] = None
+        self._connections = set()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self) -> "StoreServer":
+        """Listen on the socket and accept connections in a background thread."""
+        directory = os.path.dirname(self.address)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        # Connections are pickled calls, so each server run gets its own key
+        self._listener = Listener(self.address, family="AF_UNIX", authkey=create_authkey(self.address))
+        os.chmod(self.address, 0o600)
+        threading.Thread(target=self._accept_loop, name="store-server", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """Stop accepting and disconnect the workers (their next call reconnects)."""
+        self._closed = True
+        if self._listener is not None:
+            self._listener.close()
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            # Shutting the socket down wakes the thread blocked reading it
+            try:
+                socket.socket(fileno=os.dup(connection.fileno())).shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _accept_loop(self) -> None:
+        while not self._closed:
+            try:
+                connection = self._listener.accept()
+            except AuthenticationError:
+                continue
+            except OSError:
+                if self._closed:
+                    return
+                continue
+            threading.Thread(target=self._serve, args=(connection,), daemon=True).start()
+
+    def _serve(self, connection: Connection) -> None:
+        with self._lock:
+            self._connections.add(connection)
+        try:
+            self._handle(connection)
+        finally:
+            with self._lock:
+                self._connections.discard(connection)
+            connection.close()
+
+    def _handle(self, connection: Connection) -> None:
+        while True:
+            try:
+                target, method, args = connection.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                if method not in EXPOSED.get(target, ()):
+                    raise ValueError(f"Unknown store server call '{target}.{method}'")
+                reply = ("ok", getattr(self.targets[target], method)(*args))
+            except Exception as e:
+                reply = ("error", e)
+            try:
+                connection.send(reply)
+            except (EOFError, OSError):
+                return
+            except Exception as e:
+                # The result or error could not be pickled
+                connection.send(("error", Exception(str(e))))
+
+class StoreClient:
+    """A worker's pooled connections to the store server, one call in flight per connection."""
+
+    def __init__(self, address: str):
+        self.address = address
+        self._idle: List[Connection] = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> Connection:
+        try:
+            return Client(self.address, family="AF_UNIX", authkey=read_authkey(self.address))
+        except (OSError, EOFError) as e:
+            raise Exception(f"Store server unavailable at {self.address}: {str(e)}")
+
+    def call(self, target: str, method: str, *args):
+        with self._lock:
+            connection = self._idle.pop() if self._idle else None
+        # A pooled connection may have been closed by a restarted server; retry once on a new one
+        for _ in range(2):
+            fresh = connection is None
+            if fresh:
+                connection = self._connect()
+            try:
+                connection.send((target, method, args))
+                status, value = connection.recv()
+                break
+            except (EOFError, OSError) as e:
+                connection.close()
+                connection = None
+                if fresh:
+                    raise Exception(f"Store server unavailable at {self.address}: {str(e)}")
+        with self._lock:
+            self._idle.append(connection)
+        if status == "error":
+            raise value
+        return value
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+_client: Optional[StoreClient] = None
+_client_lock = threading.Lock()
+
+def get_store_client() -> StoreClient:
+    """This process's client for ``store_server_address``."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = StoreClient(settings.store_server_address)
+        return _client
+
+class RemoteBackend(VectorBackend):
+    """Vector backend living in the store server."""
+
+    name = "remote"
+
+    def __init__(self, client: StoreClient):
+        self.client = client
+
+    def add(self, collection_name, ids, documents, embeddings, metadatas) -> None:
+        self.client.call("vector", "add", collection_name, ids, documents, embeddings, metadatas)
+
+    def upsert(self, collection_name, ids, documents, embeddings, metadatas) -> None:
+        self.client.call("vector", "upsert", collection_name, ids, documents, embeddings, metadatas)
+
+    def query(self, collection_name, embedding, k, user_id=None) -> List[SearchResult]:
+        return self.client.call("vector", "query", collection_name, embedding, k, user_id)
+
+    def get(self, collection_name, limit, offset=0) -> Dict[str, List]:
+        return self.client.call("vector", "get", collection_name, limit, offset)
+
+    def find(self, collection_name, where) -> Dict[str, Dict]:
+        return self.client.call("vector", "find", collection_name, where)
+
+    def update_metadatas(self, collection_name, ids, metadatas) -> None:
+        self.client.call("vector", "update_metadatas", collection_name, ids, metadatas)
+
+    def delete(self, collection_name, ids) -> None:
+        self.client.call("vector", "delete", collection_name, ids)
+
+    def has_collection(self, collection_name) -> bool:
+        return self.client.call("vector", "has_collection", collection_name)
+
+    def list_collections(self) -> List[str]:
+        return self.client.call("vector", "list_collections")
+
+    def delete_collection(self, collection_name) -> None:
+        self.client.call("vector", "delete_collection", collection_name)
+
+class RemoteLexicalIndex:
+    """Lexical index living in the store server (same methods as LexicalIndex)."""
+
+    def __init__(self, client: StoreClient):
+        self.client = client
+
+    def open(self) -> None:
+        self.client.call("lexical", "open")
+
+    def add(self, ids: List[str], documents: List[str], metadatas: List[Dict]) -> None:
+        self.client.call("lexical", "add", ids, documents, metadatas)
+
+    def search(self, user_id: int, query: str, k: int) -> List[SearchResult]:
+        return self.client.call("lexical", "search", user_id, query, k)
+
+    def delete(self, ids: List[str]) -> int:
+        return self.client.call("lexical", "delete", ids)
+
+    def clear(self, user_ids=None) -> None:
+        self.client.call("lexical", "clear", list(user_ids) if user_ids is not None else None)
+
+    def count(self, user_id: Optional[int] = None) -> int:
+        return self.client.call("lexical", "count", user_id)
+
+class RemoteGenerations:
+    """Generation counters living in the store server."""
+
+    def __init__(self, client: StoreClient):
+        self.client = client
+
+    def get(self, user_id: int) -> int:
+        return self.client.call("generations", "get", user_id)
+
+    def bump(self, user_id: int) -> int:
+        return self.client.call("generations", "bump", user_id)
+
+def start_store_server_process(env: Optional[Dict[str, str]] = None, timeout: float = 60.0) -> subprocess.Popen:
+    """Run the store server in a subprocess and wait until it accepts connections."""
+    env = dict(os.environ if env is None else env)
+    address = env.get("STORE_SERVER_ADDRESS", settings.store_server_address)
+    process = subprocess.Popen([sys.executable, "-m", "app.services.store_server"], env=env)
+    deadline = time.time() + timeout
+    while True:
+        if process.poll() is not None:
+            raise RuntimeError(f"Store server exited with code {process.returncode}")
+        try:
+            Client(address, family="AF_UNIX", authkey=read_authkey(address)).close()
+            return process
+        except (OSError, EOFError):
+            if time.time() > deadline:
+                process.terminate()
+                raise RuntimeError(f"Store server did not start within {timeout}s")
+            time.sleep(0.05)
+
+def main() -> None:
+    import signal
+    from app.services.lexical_index import LexicalIndex
+    from app.services.vector_store import create_backend
+    if settings.vector_store_backend == "remote":
+        raise SystemExit("The store server needs a local VECTOR_STORE_BACKEND (chroma or numpy)")
+
+    backend = create_backend(settings.vector_store_backend)
+    lexical_index = LexicalIndex(path=settings.lexical_index_path, memory_users=settings.lexical_index_memory_users)
+    # Open everything before accepting workers, so their first requests don't wait
+    for name in backend.list_collections():
+        backend.has_collection(name)
+    lexical_index.open()
+
+    server = StoreServer(settings.store_server_address, backend, lexical_index).start()
+    print(f"Store server ({backend.name}) listening on {settings.store_server_address}")
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    signal.signal(signal.SIGINT, lambda *_: stopped.set())
+    while not stopped.wait(1.0):
+        pass
+    server.stop()
+    for path in (settings.store_server_address, authkey_path(settings.store_server_address)):
+        if os.path.exists(path):
+            os.unlink(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import os
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, List, Optional
+from app.core.config import settings
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+# Pool workers keep the last reader open: flattening the page tree of a large
+# PDF costs far more than extracting a range of pages from it
+_worker_reader = None
+
+def extract_page_range(path: str, start: int, stop: int) -> List[str]:
+    """Extract the text of pages ``start:stop`` (runs in pool workers)."""
+    global _worker_reader
+    key = (path, os.path.getmtime(path))
+    if _worker_reader is None or _worker_reader[0] != key:
+        if _worker_reader is not None:
+            _worker_reader[1].close()
+        import PyPDF2
+        f = open(path, "rb")
+        _worker_reader = (key, f, PyPDF2.PdfReader(f))
+    reader = _worker_reader[2]
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned, not forked: a fork would copy the app's threads and locks; workers reopen the PDF themselves
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.pdf_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+def shutdown_pdf_pool() -> None:
+    """Stop the extraction worker processes."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+def iter_pdf_pages(
+    path: str,
+    on_page: Optional[Callable[[int, int], None]] = None
+) -> Iterator[str]:
+    """Yield the text of each page in order without holding the whole document.
+
+    The file is read from disk rather than from an in-memory copy. Documents
+    with at least ``pdf_parallel_min_pages`` pages are split into page ranges
+    extracted by a process pool; only a bounded window of ranges is in
+    flight, so memory stays proportional to the window, not the document.
+    ``on_page(done, total)`` is called after each page is yielded.
+    """
+    # PyPDF2 is only loaded once a PDF is uploaded (or by the warm-up)
+    import PyPDF2
+    try:
+        with open(path, "rb") as f:
+            reader = PyPDF2.PdfReader(f)
+            page_count = len(reader.pages)
+            if page_count < settings.pdf_parallel_min_pages or settings.pdf_workers <= 1:
+                for i, page in enumerate(reader.pages):
+                    yield page.extract_text() or ""
+                    if on_page:
+                        on_page(i + 1, page_count)
+                return
+
+        pool = _get_pool()
+        step = settings.pdf_pages_per_task
+        ranges = deque((start, min(start + step, page_count)) for start in range(0, page_count, step))
+        window = deque()
+        done = 0
+        while ranges or window:
+            while ranges and len(window) < settings.pdf_workers * 2:
+                start, stop = ranges.popleft()
+                window.append(pool.submit(extract_page_range, path, start, stop))
+            for text in window.popleft().result():
+                yield text
+                done += 1
+                if on_page:
+                    on_page(done, page_count)
+    except Exception as e:
+        raise Exception(f"Error extracting PDF text: {str(e)}")
+
+def iter_document_text(
+    path: str,
+    file_type: str,
+    on_progress: Optional[Callable[[float], None]] = None
+) -> Iterator[str]:
+    """Yield a document's text piece by piece (pages for PDF, blocks for TXT).
+    
+    ``on_progress`` receives the fraction of the file read so far.
+    """
+    if file_type == "pdf":
+        on_page = (lambda done, total: on_progress(done / total)) if on_progress else None
+        for page_text in iter_pdf_pages(path, on_page):
+            yield page_text + "\n"
+    else:  # txt
+        size = os.path.getsize(path) or 1
+        with open(path, "r", encoding="utf-8") as f:
+            for block in iter(lambda: f.read(1 << 20), ""):
+                yield block
+                if on_progress:
+                    on_progress(min(1.0, f.buffer.tell() / size))
@@ -1,73 +1,372 @@
-import chromadb
-from chromadb.config import Settings
-from typing import List, Dict
+from typing import TYPE_CHECKING, List, Dict, NamedTuple, Optional
+import threading
 import uuid
 from app.core.config import settings
 import os
 
-class VectorStore:
-    def __init__(self):
-        """Initialize ChromaDB client with persistent storage."""
+if TYPE_CHECKING:
+    from chromadb.api.models.Collection import Collection
+
+class SearchResult(NamedTuple):
+    """One chunk returned by a search.
+    
+    ``distance`` comes from vector search (None for purely lexical matches);
+    ``score`` is set by lexical search and fusion, higher is better.
+    """
+    id: str
+    text: str
+    metadata: Dict
+    distance: Optional[float]
+    score: Optional[float] = None
+
+class VectorBackend:
+    """Storage and top-k search over named collections of chunk embeddings.
+    
+    Distances are squared L2, so smaller is closer. ``user_id`` filters a
+    query to chunks whose metadata carries that user id.
+    """
+    
+    name = ""
+    
+    def add(self, collection_name: str, ids: List[str], documents: List[str], embeddings: List[List[float]], metadatas: List[Dict]) -> None:
+        raise NotImplementedError
+    
+    def upsert(self, collection_name: str, ids: List[str], documents: List[str], embeddings: List[List[float]], metadatas: List[Dict]) -> None:
+        raise NotImplementedError
+    
+    def query(self, collection_name: str, embedding: List[float], k: int, user_id: Optional[int] = None) -> List[SearchResult]:
+        raise NotImplementedError
+    
+    def get(self, collection_name: str, limit: int, offset: int = 0) -> Dict[str, List]:
+        """A page of stored chunks: ``ids``, ``documents``, ``embeddings`` and ``metadatas``."""
+        raise NotImplementedError
+    
+    def find(self, collection_name: str, where: Dict) -> Dict[str, Dict]:
+        """Metadata by id of the chunks whose metadata has every key/value in ``where``."""
+        raise NotImplementedError
+    
+    def update_metadatas(self, collection_name: str, ids: List[str], metadatas: List[Dict]) -> None:
+        """Replace the metadata of stored chunks, keeping their text and embedding."""
+        raise NotImplementedError
+    
+    def delete(self, collection_name: str, ids: List[str]) -> None:
+        raise NotImplementedError
+    
+    def has_collection(self, collection_name: str) -> bool:
+        raise NotImplementedError
+    
+    def list_collections(self) -> List[str]:
+        raise NotImplementedError
+    
+    def delete_collection(self, collection_name: str) -> None:
+        raise NotImplementedError
+
+class ChromaBackend(VectorBackend):
+    """Collections in a persistent ChromaDB client."""
+    
+    name = "chroma"
+    
+    def __init__(self, path: str):
+        # chromadb is slow to import, so it is only loaded once a backend is opened
+        import chromadb
+        from chromadb.config import Settings
+        
         # Ensure the directory exists
-        os.makedirs(settings.chroma_db_path, exist_ok=True)
+        os.makedirs(path, exist_ok=True)
         
         self.client = chromadb.PersistentClient(
-            path=settings.chroma_db_path,
-            settings=Settings(anonymized_telemetry=False)
+            path=path,
+            settings=Settings(
+                anonymized_telemetry=False,
+                chroma_product_telemetry_impl="app.services.chroma_telemetry.NoopTelemetry"
+            )
+        )
+        # Collection handles by name, so lookups don't hit the system database per call
+        self._collections: Dict[str, "Collection"] = {}
+        self._lock = threading.Lock()
+    
+    def get_or_create_collection(self, name: str) -> "Collection":
+        """Cached handle to a collection, creating it if needed."""
+        collection = self._collections.get(name)
+        if collection is None:
+            with self._lock:
+                collection = self._collections.get(name)
+                if collection is None:
+                    collection = self.client.get_or_create_collection(name=name)
+                    self._collections[name] = collection
+        return collection
+    
+    def get_existing_collection(self, name: str) -> Optional["Collection"]:
+        """Cached handle to a collection, or None if it doesn't exist."""
+        collection = self._collections.get(name)
+        if collection is None:
+            with self._lock:
+                collection = self._collections.get(name)
+                if collection is None:
+                    try:
+                        collection = self.client.get_collection(name=name)
+                    except ValueError:
+                        return None
+                    self._collections[name] = collection
+        return collection
+    
+    def add(self, collection_name, ids, documents, embeddings, metadatas) -> None:
+        self.get_or_create_collection(collection_name).add(
+            documents=documents,
+            embeddings=embeddings,
+            metadatas=metadatas,
+            ids=ids
+        )
+    
+    def upsert(self, collection_name, ids, documents, embeddings, metadatas) -> None:
+        self.get_or_create_collection(collection_name).upsert(
+            documents=documents,
+            embeddings=embeddings,
+            metadatas=metadatas,
+            ids=ids
         )
     
+    def query(self, collection_name, embedding, k, user_id=None) -> List[SearchResult]:
+        collection = self.get_existing_collection(collection_name)
+        if collection is None:
+            return []
+        results = collection.query(
+            query_embeddings=[embedding],
+            n_results=k,
+            where={"user_id": user_id} if user_id is not None else None
+        )
+        if not results['ids']:
+            return []
+        return [
+            SearchResult(id=id_, text=text, metadata=metadata or {}, distance=distance)
+            for id_, text, metadata, distance in zip(
+                results['ids'][0],
+                results['documents'][0],
+                results['metadatas'][0],
+                results['distances'][0]
+            )
+        ]
+    
+    def get(self, collection_name, limit, offset=0) -> Dict[str, List]:
+        collection = self.get_existing_collection(collection_name)
+        if collection is None:
+            return {"ids": [], "documents": [], "embeddings": [], "metadatas": []}
+        batch = collection.get(include=["documents", "embeddings", "metadatas"], limit=limit, offset=offset)
+        return {key: batch[key] for key in ("ids", "documents", "embeddings", "metadatas")}
+    
+    def find(self, collection_name, where) -> Dict[str, Dict]:
+        collection = self.get_existing_collection(collection_name)
+        if collection is None:
+            return {}
+        if len(where) > 1:
+            where = {"$and": [{key: value} for key, value in where.items()]}
+        found = collection.get(where=where, include=["metadatas"])
+        return dict(zip(found["ids"], found["metadatas"]))
+    
+    def update_metadatas(self, collection_name, ids, metadatas) -> None:
+        if ids:
+            self.get_or_create_collection(collection_name).update(ids=ids, metadatas=metadatas)
+    
+    def delete(self, collection_name, ids) -> None:
+        collection = self.get_existing_collection(collection_name)
+        if collection is not None and ids:
+            collection.delete(ids=ids)
+    
+    def has_collection(self, collection_name) -> bool:
+        return self.get_existing_collection(collection_name) is not None
+    
+    def list_collections(self) -> List[str]:
+        return [col.name for col in self.client.list_collections()]
+    
+    def delete_collection(self, collection_name) -> None:
+        with self._lock:
+            self._collections.pop(collection_name, None)
+            self.client.delete_collection(name=collection_name)
+
+PARTITIONING_MODES = ("shared", "per_user", "sharded")
+
+BACKENDS = ("chroma", "numpy", "remote")
+
+def create_backend(name: str, path: Optional[str] = None) -> VectorBackend:
+    """Vector backend by name ("chroma", "numpy" or "remote", the store server's)."""
+    if name == "chroma":
+        return ChromaBackend(path or settings.chroma_db_path)
+    if name == "numpy":
+        from app.services.numpy_index import NumpyBackend
+        return NumpyBackend(
+            path or settings.numpy_index_path,
+            max_segments=settings.numpy_index_max_segments,
+            quantization=settings.numpy_index_quantization,
+            rerank_factor=settings.numpy_index_rerank_factor
+        )
+    if name == "remote":
+        from app.services.store_server import RemoteBackend, get_store_client
+        return RemoteBackend(get_store_client())
+    raise ValueError(f"Unknown vector store backend '{name}'. Available: {', '.join(BACKENDS)}")
+
+class VectorStore:
+    """Chunk embeddings in a vector backend, laid out according to ``partitioning``.
+    
+    - ``shared``: one collection; queries filter on ``user_id``
+    - ``per_user``: one collection per user; queries need no filter
+    - ``sharded``: ``shards`` collections picked by ``user_id % shards``;
+      queries filter on ``user_id`` within the shard
+    """
+    
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        partitioning: Optional[str] = None,
+        shards: Optional[int] = None,
+        backend: Optional[str] = None
+    ):
+        """Use the configured backend (ChromaDB by default) with persistent storage.
+        
+        The backend is opened on first use, or ahead of time by ``open``.
+        """
+        self.partitioning = partitioning or settings.vector_store_partitioning
+        self.shards = shards or settings.vector_store_shards
+        if self.partitioning not in PARTITIONING_MODES:
+            raise ValueError(
+                f"Unknown vector store partitioning '{self.partitioning}'. "
+                f"Available: {', '.join(PARTITIONING_MODES)}"
+            )
+        self.backend_name = backend or settings.vector_store_backend
+        if self.backend_name not in BACKENDS:
+            raise ValueError(
+                f"Unknown vector store backend '{self.backend_name}'. Available: {', '.join(BACKENDS)}"
+            )
+        self.path = path
+        self._backend: Optional[VectorBackend] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def backend(self) -> VectorBackend:
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = create_backend(self.backend_name, self.path)
+        return self._backend
+    
+    def open(self) -> List[str]:
+        """Open the backend and load a handle to every collection; returns their names."""
+        names = self.get_collection_names()
+        for name in names:
+            # Both backends cache the collection handle on lookup
+            self.backend.has_collection(name)
+        return names
+    
+    def collection_name_for(self, user_id: int, base_name: str = "documents") -> str:
+        """Collection holding a user's chunks under the configured partitioning."""
+        if self.partitioning == "per_user":
+            return f"{base_name}_user_{user_id}"
+        if self.partitioning == "sharded":
+            return f"{base_name}_shard_{user_id % self.shards}"
+        return base_name
+    
     def add_documents(
-        self, 
-        documents: List[str], 
-        embeddings: List[List[float]], 
-        metadatas: List[Dict], 
-        ids: List[str], 
-        collection_name: str = "documents"
+        self,
+        documents: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict],
+        ids: List[str],
+        collection_name: Optional[str] = None
     ) -> None:
-        """Add documents and their embeddings to ChromaDB."""
+        """Add documents and their embeddings to the vector backend.
+        
+        Without an explicit ``collection_name`` each chunk goes to the
+        collection of the ``user_id`` in its metadata.
+        """
         try:
-            # Get or create collection
-            collection = self.client.get_or_create_collection(name=collection_name)
+            groups: Dict[str, List[int]] = {}
+            for i, metadata in enumerate(metadatas):
+                name = collection_name or self.collection_name_for(metadata["user_id"])
+                groups.setdefault(name, []).append(i)
             
-            # Add documents to collection
-            collection.add(
-                documents=documents,
-                embeddings=embeddings,
-                metadatas=metadatas,
-                ids=ids
-            )
+            for name, indices in groups.items():
+                self.backend.add(
+                    name,
+                    ids=[ids[i] for i in indices],
+                    documents=[documents[i] for i in indices],
+                    embeddings=[embeddings[i] for i in indices],
+                    metadatas=[metadatas[i] for i in indices]
+                )
         except Exception as e:
             raise Exception(f"Error adding documents to vector store: {str(e)}")
     
+    def search(
+        self,
+        query_embedding: List[float],
+        k: int,
+        user_id: int,
+        collection_name: Optional[str] = None
+    ) -> List[SearchResult]:
+        """Search the user's chunks, closest first."""
+        try:
+            # A per-user collection only holds the user's chunks; otherwise filter
+            filter_user = None if self.partitioning == "per_user" and not collection_name else user_id
+            return self.backend.query(
+                collection_name or self.collection_name_for(user_id),
+                query_embedding,
+                k,
+                user_id=filter_user
+            )
+        except Exception as e:
+            raise Exception(f"Error searching vector store: {str(e)}")
+    
     def similarity_search(
-        self, 
-        query_embedding: List[float], 
-        k: int, 
-        user_id: int, 
-        collection_name: str = "documents"
+        self,
+        query_embedding: List[float],
+        k: int,
+        user_id: int,
+        collection_name: Optional[str] = None
     ) -> List[str]:
         """Search for similar documents filtered by user_id."""
+        results = self.search(query_embedding, k, user_id, collection_name)
+        
+        # Return document contents
+        return [result.text for result in results]
+    
+    def get_document_chunks(self, user_id: int, document_id: int) -> Dict[str, Dict]:
+        """Metadata by chunk id of everything stored for one document."""
         try:
-            collection = self.client.get_collection(name=collection_name)
-            
-            # Query with user_id filter
-            results = collection.query(
-                query_embeddings=[query_embedding],
-                n_results=k,
-                where={"user_id": user_id}
+            return self.backend.find(
+                self.collection_name_for(user_id),
+                {"user_id": user_id, "document_id": document_id}
             )
-            
-            # Return document contents
-            return results['documents'][0] if results['documents'] else []
         except Exception as e:
-            raise Exception(f"Error searching vector store: {str(e)}")
+            raise Exception(f"Error reading document chunks: {str(e)}")
+    
+    def update_metadatas(self, user_id: int, ids: List[str], metadatas: List[Dict]) -> None:
+        """Replace the metadata of some of a user's chunks without re-embedding them."""
+        try:
+            self.backend.update_metadatas(self.collection_name_for(user_id), ids, metadatas)
+        except Exception as e:
+            raise Exception(f"Error updating chunk metadata: {str(e)}")
+    
+    def delete_chunks(self, user_id: int, ids: List[str]) -> None:
+        """Remove some of a user's chunks in one call."""
+        try:
+            self.backend.delete(self.collection_name_for(user_id), ids)
+        except Exception as e:
+            raise Exception(f"Error deleting chunks: {str(e)}")
+    
+    def delete_document(self, user_id: int, document_id: int) -> List[str]:
+        """Remove every chunk of a document; returns the removed ids."""
+        ids = list(self.get_document_chunks(user_id, document_id))
+        self.delete_chunks(user_id, ids)
+        return ids
     
     def get_collection_names(self) -> List[str]:
         """Get all collection names."""
         try:
-            return [col.name for col in self.client.list_collections()]
+            return self.backend.list_collections()
         except Exception as e:
             raise Exception(f"Error getting collection names: {str(e)}")
+    
+    def delete_collection(self, name: str) -> None:
+        """Delete a collection and everything in it."""
+        self.backend.delete_collection(name)
 
 # Global vector store instance
-vector_store = VectorStore() 
\ No newline at end of file
+vector_store = VectorStore()
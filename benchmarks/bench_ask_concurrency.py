@@ -0,0 +1,120 @@
+"""Load test for POST /qa/ask against a local stub LLM server.
+
+Starts a stub OpenAI server with fixed latencies, runs the app under
+uvicorn (each in its own process) and measures p50/p99 latency and requests per second at several
+levels of concurrent askers. With ``--local`` there is no stub server: the app
+uses the ``hash`` embedding and ``echo`` LLM providers, which measures the
+app's own overhead.
+
+    python -m benchmarks.bench_ask_concurrency --concurrency 1 10 100
+    python -m benchmarks.bench_ask_concurrency --concurrency 1 10 100 --local
+"""
+import argparse
+import asyncio
+import time
+import uuid
+import httpx
+import os
+from benchmarks.common import (
+    isolated_environment, free_port, start_stub_llm, start_app_process, stop_process,
+    summarize_latencies, write_results
+)
+
+async def prepare_user(base_url: str) -> dict:
+    """Register a user and index one document for it."""
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        email = f"bench_{uuid.uuid4().hex[:8]}@example.com"
+        response = await client.post("/auth/register", json={"email": email, "password": "benchpassword"})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        text = "The service level agreement guarantees 99.9% uptime per month. " * 200
+        response = await client.post(
+            "/documents/upload",
+            files={"file": ("sla.txt", text.encode("utf-8"), "text/plain")},
+            headers=headers
+        )
+        response.raise_for_status()
+        job_id = response.json().get("job_id")
+        while job_id:
+            job = (await client.get(f"/documents/jobs/{job_id}", headers=headers)).json()
+            if job["status"] in ("ready", "failed"):
+                break
+            await asyncio.sleep(0.05)
+        return headers
+
+async def run_level(base_url: str, headers: dict, concurrency: int, requests_per_asker: int) -> dict:
+    """Run ``concurrency`` askers that each send ``requests_per_asker`` questions."""
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        async def asker(n: int) -> None:
+            nonlocal errors
+            for i in range(requests_per_asker):
+                start = time.perf_counter()
+                try:
+                    response = await client.post(
+                        "/qa/ask",
+                        json={"question": f"What uptime is guaranteed? ({n}-{i})"},
+                        headers=headers
+                    )
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append(time.perf_counter() - start)
+                if not ok:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(asker(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    result = summarize_latencies(latencies, elapsed)
+    result["concurrency"] = concurrency
+    result["errors"] = errors
+    return result
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--requests-per-asker", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="stub chat completion latency (s)")
+    parser.add_argument("--embedding-latency", type=float, default=0.02, help="stub embedding latency (s)")
+    parser.add_argument("--local", action="store_true", help="use the hash/echo providers instead of a stub server")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    if args.local:
+        stub = None
+        isolated_environment()
+        os.environ.update(EMBEDDING_PROVIDER="hash", LLM_PROVIDER="echo")
+    else:
+        stub = start_stub_llm(args.llm_latency, args.embedding_latency)
+        isolated_environment(stub.base_url)
+    # Every question is unique, but keep the embedding cache out of the measurement anyway
+    os.environ["EMBEDDING_CACHE_ENABLED"] = "false"
+
+    port = free_port()
+    server = start_app_process(port)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        headers = asyncio.run(prepare_user(base_url))
+        levels = [
+            asyncio.run(run_level(base_url, headers, c, args.requests_per_asker))
+            for c in args.concurrency
+        ]
+    finally:
+        stop_process(server)
+        if stub is not None:
+            stop_process(stub)
+
+    write_results(args.output, {
+        "benchmark": "ask_concurrency",
+        "providers": "hash/echo" if args.local else "stub server",
+        "llm_latency_s": None if args.local else args.llm_latency,
+        "embedding_latency_s": None if args.local else args.embedding_latency,
+        "levels": levels
+    })
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Authenticated request overhead: per-request user query vs stateless tokens.
+
+Runs the app under uvicorn once per ``AUTH_MODE`` and, at each concurrency
+level, sends requests to
+
+- ``GET /health``: no authentication (baseline)
+- ``GET /qa/cache/stats``: authenticated, but does no other database work
+
+so the difference between the two is what authentication costs. Reports
+p50/p99 latency and requests per second for each.
+
+    python -m benchmarks.bench_auth_overhead --concurrency 1 16 64
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+import httpx
+from benchmarks.common import (
+    isolated_environment, free_port, start_app_process, stop_process, summarize_latencies, write_results
+)
+
+async def register(base_url: str) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        email = f"bench_{uuid.uuid4().hex[:8]}@example.com"
+        response = await client.post("/auth/register", json={"email": email, "password": "benchpassword"})
+        response.raise_for_status()
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+async def run_level(base_url: str, path: str, headers: dict, concurrency: int, requests: int) -> dict:
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        async def worker(count: int) -> None:
+            nonlocal errors
+            for _ in range(count):
+                start = time.perf_counter()
+                try:
+                    ok = (await client.get(path, headers=headers)).status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append(time.perf_counter() - start)
+                errors += not ok
+
+        await worker(min(20, requests))  # warm up connections and caches
+        latencies.clear()
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    result = summarize_latencies(latencies, elapsed)
+    result.update(path=path, concurrency=concurrency, errors=errors)
+    return result
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=["database", "stateless"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--requests", type=int, default=2000, help="requests per level")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    runs = []
+    for mode in args.modes:
+        isolated_environment()
+        os.environ["AUTH_MODE"] = mode
+        port = free_port()
+        server = start_app_process(port)
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            headers = asyncio.run(register(base_url))
+            for concurrency in args.concurrency:
+                for path, path_headers in (("/health", {}), ("/qa/cache/stats", headers)):
+                    result = asyncio.run(run_level(base_url, path, path_headers, concurrency, args.requests))
+                    result["auth_mode"] = mode
+                    runs.append(result)
+                    print(result)
+        finally:
+            stop_process(server)
+
+    write_results(args.output, {"benchmark": "auth_overhead", "runs": runs})
+
+if __name__ == "__main__":
+    main()
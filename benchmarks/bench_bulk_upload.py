@@ -0,0 +1,132 @@
+"""Onboarding throughput: one upload per file vs a single bulk archive upload.
+
+Starts a stub OpenAI server with a fixed embedding latency and the app under
+uvicorn, then ingests the same generated text files twice for two fresh users:
+
+- ``single``: one ``POST /documents/upload`` per file (up to ``--parallel``
+  in flight), waiting until every job is ready
+- ``bulk``: one zip through ``POST /documents/upload/bulk``, waiting until
+  the batch is done
+
+and reports wall time, files/s, chunks/s and embedding requests made.
+
+    python -m benchmarks.bench_bulk_upload --files 200 1000
+"""
+import argparse
+import asyncio
+import io
+import os
+import time
+import uuid
+import zipfile
+import httpx
+from benchmarks.bench_chunking import generate_text
+from benchmarks.common import (
+    isolated_environment, free_port, start_stub_llm, start_app_process, stop_process, write_results
+)
+
+def make_files(count: int, size_bytes: int):
+    return [(f"doc_{i:05d}.txt", generate_text(size_bytes, seed=i).encode("utf-8")) for i in range(count)]
+
+async def register(client: httpx.AsyncClient) -> dict:
+    email = f"bench_{uuid.uuid4().hex[:8]}@example.com"
+    response = await client.post("/auth/register", json={"email": email, "password": "benchpassword"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+async def embedding_requests(stub_url: str) -> int:
+    async with httpx.AsyncClient() as client:
+        return (await client.get(stub_url + "stats")).json()["embeddings"]
+
+async def run_single(base_url: str, files, parallel: int) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        headers = await register(client)
+        semaphore = asyncio.Semaphore(parallel)
+        chunks = 0
+
+        async def ingest(name: str, data: bytes) -> None:
+            nonlocal chunks
+            async with semaphore:
+                response = await client.post("/documents/upload", files={"file": (name, data, "text/plain")}, headers=headers)
+                job_id = response.json()["job_id"]
+            while True:
+                job = (await client.get(f"/documents/jobs/{job_id}", headers=headers)).json()
+                if job["status"] in ("ready", "failed"):
+                    chunks += job["chunks_count"]
+                    return
+                await asyncio.sleep(0.05)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(ingest(name, data) for name, data in files))
+        return {"seconds": time.perf_counter() - start, "chunks": chunks}
+
+async def run_bulk(base_url: str, files) -> dict:
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zipped:
+        for name, data in files:
+            zipped.writestr(name, data)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        headers = await register(client)
+        start = time.perf_counter()
+        response = await client.post(
+            "/documents/upload/bulk",
+            files=[("files", ("onboarding.zip", archive.getvalue(), "application/zip"))],
+            headers=headers
+        )
+        batch_id = response.json()["batch_id"]
+        while True:
+            batch = (await client.get(f"/documents/bulk/{batch_id}", headers=headers)).json()
+            if batch["status"] == "done":
+                break
+            await asyncio.sleep(0.05)
+        return {"seconds": time.perf_counter() - start, "chunks": batch["chunks_count"], "failed": batch["files_failed"]}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, nargs="+", default=[200, 1000])
+    parser.add_argument("--file-kb", type=int, default=4)
+    parser.add_argument("--parallel", type=int, default=8, help="concurrent single uploads")
+    parser.add_argument("--embedding-latency", type=float, default=0.05, help="stub embedding latency (s)")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    stub = start_stub_llm(0.01, args.embedding_latency)
+    isolated_environment(stub.base_url)
+    os.environ["EMBEDDING_CACHE_ENABLED"] = "false"
+    port = free_port()
+    server = start_app_process(port)
+    base_url = f"http://127.0.0.1:{port}"
+    stub_url = stub.base_url.replace("/v1/", "/")
+
+    runs = []
+    try:
+        for count in args.files:
+            files = make_files(count, args.file_kb * 1024)
+            for mode in ("single", "bulk"):
+                before = asyncio.run(embedding_requests(stub_url))
+                if mode == "single":
+                    result = asyncio.run(run_single(base_url, files, args.parallel))
+                else:
+                    result = asyncio.run(run_bulk(base_url, files))
+                result.update(
+                    mode=mode,
+                    files=count,
+                    files_per_second=round(count / result["seconds"], 1),
+                    chunks_per_second=round(result["chunks"] / result["seconds"], 1),
+                    embedding_requests=asyncio.run(embedding_requests(stub_url)) - before,
+                    seconds=round(result["seconds"], 2)
+                )
+                runs.append(result)
+                print(result)
+    finally:
+        stop_process(server)
+        stop_process(stub)
+
+    write_results(args.output, {
+        "benchmark": "bulk_upload",
+        "file_kb": args.file_kb,
+        "embedding_latency_s": args.embedding_latency,
+        "runs": runs
+    })
+
+if __name__ == "__main__":
+    main()
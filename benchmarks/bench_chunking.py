@@ -0,0 +1,78 @@
+"""Chunking throughput on multi-megabyte inputs.
+
+Chunks generated prose of increasing size with each strategy, both as one
+string and streamed in 64 KB pieces. Linear scaling shows up as a flat
+MB/s column (and ``seconds_per_mb``) as the input grows.
+
+    python -m benchmarks.bench_chunking --sizes-mb 1 2 4 8
+"""
+import argparse
+import random
+import time
+from benchmarks.common import write_results
+from app.core.chunking import get_chunker, get_tokenizer
+
+WORDS = (
+    "the of and to in is that for it as was with be by on not he this are or his from at which "
+    "but have an they you were her she there been one all we their has would when if so no more "
+    "retrieval embedding document vector context answer question model token chunk sentence"
+).split()
+
+def generate_text(size_bytes: int, seed: int = 0) -> str:
+    """Deterministic prose with sentences, paragraphs and the odd long token."""
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    while size < size_bytes:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 30)))
+        if rng.random() < 0.05:
+            sentence += " " + str(rng.randint(0, 10 ** 9)) + "x" * rng.randint(10, 80)
+        sentence = sentence.capitalize() + rng.choice([".", ".", ".", "?", "!"])
+        sentence += "\n\n" if rng.random() < 0.15 else " "
+        parts.append(sentence)
+        size += len(sentence)
+    return "".join(parts)[:size_bytes]
+
+def pieces_of(text: str, piece_size: int):
+    for i in range(0, len(text), piece_size):
+        yield text[i:i + piece_size]
+
+def run(strategy: str, text: str, streamed: bool) -> dict:
+    chunker = get_chunker(strategy)
+    source = pieces_of(text, 64 * 1024) if streamed else [text]
+    start = time.perf_counter()
+    count = sum(1 for _ in chunker.iter_chunks(source))
+    elapsed = time.perf_counter() - start
+    megabytes = len(text) / 1e6
+    return {
+        "strategy": strategy,
+        "streamed": streamed,
+        "size_mb": round(megabytes, 1),
+        "chunks": count,
+        "seconds": round(elapsed, 3),
+        "mb_per_second": round(megabytes / elapsed, 2),
+        "seconds_per_mb": round(elapsed / megabytes, 3)
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--strategies", nargs="+", default=["sentences", "paragraphs", "characters"])
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    runs = []
+    for size_mb in args.sizes_mb:
+        text = generate_text(int(size_mb * 1e6))
+        for strategy in args.strategies:
+            for streamed in (False, True):
+                runs.append(run(strategy, text, streamed))
+
+    write_results(args.output, {
+        "benchmark": "chunking",
+        "tokenizer": get_tokenizer().name,
+        "runs": runs
+    })
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Prompt tokens per question: top-k chunks joined as-is vs the context builder.
+
+Generates manual-like documents made of sections; every sentence of a
+section names its component, and one sentence states a fact (a bolt torque).
+Documents are chunked with each strategy and indexed in a BM25 index, which
+serves as a deterministic retriever. For each question the prompt is built
+two ways:
+
+- ``top_k``: the ``similarity_search_k`` best chunks joined with blank lines
+  (the previous behaviour, ``CONTEXT_MAX_TOKENS=0``)
+- ``packed``: ``CONTEXT_CANDIDATES`` chunks merged and packed into each budget
+
+and we report mean prompt tokens (full chat prompt), how often the fact
+sentence made it into the context, and the time spent building the context.
+
+    python -m benchmarks.bench_context_tokens --budgets 256 320 384 512
+"""
+import argparse
+import random
+import tempfile
+import time
+from benchmarks.common import write_results
+from app.core.chunking import get_chunker, get_tokenizer
+from app.core.config import settings
+from app.core.llm_utils import build_messages
+from app.services.context_builder import build_context
+from app.services.lexical_index import LexicalIndex
+
+COMPONENTS = ["pump", "valve", "filter", "motor", "sensor", "housing", "impeller", "gasket", "bearing", "coupling"]
+WORDS = "inspect replace clean check align tighten lubricate measure record verify the its and before after each".split()
+
+def generate_documents(documents: int, sections: int, sentences: int, seed: int = 0):
+    """Document texts plus (question, fact sentence, document index) triples."""
+    rng = random.Random(seed)
+    texts = []
+    questions = []
+    for d in range(documents):
+        parts = []
+        for s in range(sections):
+            component = f"{rng.choice(COMPONENTS)}-{d}-{s}"
+            fact_at = rng.randrange(sentences)
+            for i in range(sentences):
+                if i == fact_at:
+                    fact = f"The torque for bolt B{d}x{s} on the {component} is {rng.randint(10, 90)} Nm."
+                    parts.append(fact)
+                    questions.append((f"What is the torque for bolt B{d}x{s} on the {component}?", fact, d))
+                else:
+                    filler = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 18)))
+                    parts.append(f"For the {component}, {filler}.")
+            parts.append("\n\n")
+        texts.append(" ".join(parts))
+    return texts, questions
+
+def prompt_tokens(tokenizer, question: str, context: str) -> int:
+    return sum(tokenizer.count(message["content"]) for message in build_messages(question, context))
+
+def run(strategy: str, texts, questions, k: int, candidates: int, budgets, tokenizer) -> list:
+    chunker = get_chunker(strategy)
+    with tempfile.TemporaryDirectory() as path:
+        index = LexicalIndex(f"{path}/lexical.db", memory_users=1)
+        for d, text in enumerate(texts):
+            chunks = list(chunker.iter_chunks([text]))
+            index.add(
+                [f"{d}_{i}" for i in range(len(chunks))],
+                [chunk.text for chunk in chunks],
+                [
+                    {"user_id": 1, "document_id": d, "chunk_index": i, "start_char": chunk.start, "end_char": chunk.end}
+                    for i, chunk in enumerate(chunks)
+                ]
+            )
+
+        rows = {"top_k": [0, 0, 0.0]}
+        rows.update({budget: [0, 0, 0.0] for budget in budgets})
+        for question, fact, _ in questions:
+            results = index.search(1, question, max(k, candidates))
+            context = "\n\n".join(result.text for result in results[:k])
+            rows["top_k"][0] += prompt_tokens(tokenizer, question, context)
+            rows["top_k"][1] += fact in context
+            for budget in budgets:
+                start = time.perf_counter()
+                packed = build_context(results, budget, tokenizer)
+                rows[budget][2] += time.perf_counter() - start
+                rows[budget][0] += prompt_tokens(tokenizer, question, packed.text)
+                rows[budget][1] += fact in packed.text
+
+    baseline = rows["top_k"][0] / len(questions)
+    runs = []
+    for mode, (tokens, covered, seconds) in rows.items():
+        mean_tokens = tokens / len(questions)
+        runs.append({
+            "strategy": strategy,
+            "mode": "top_k" if mode == "top_k" else "packed",
+            "k": k if mode == "top_k" else candidates,
+            "budget": None if mode == "top_k" else mode,
+            "prompt_tokens_mean": round(mean_tokens, 1),
+            "vs_top_k": round(mean_tokens / baseline, 3),
+            "fact_coverage": round(covered / len(questions), 4),
+            "build_ms_mean": None if mode == "top_k" else round(seconds / len(questions) * 1000, 3)
+        })
+    return runs
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--sections", type=int, default=10)
+    parser.add_argument("--sentences", type=int, default=12)
+    parser.add_argument("--k", type=int, default=settings.similarity_search_k)
+    parser.add_argument("--candidates", type=int, default=settings.context_candidates)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[256, 320, 384, 512])
+    parser.add_argument("--strategies", nargs="+", default=["sentences", "characters"])
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    tokenizer = get_tokenizer()
+    texts, questions = generate_documents(args.documents, args.sections, args.sentences)
+    runs = []
+    for strategy in args.strategies:
+        for row in run(strategy, texts, questions, args.k, args.candidates, args.budgets, tokenizer):
+            runs.append(row)
+            print(row)
+
+    write_results(args.output, {
+        "benchmark": "context_tokens",
+        "documents": args.documents,
+        "questions": len(questions),
+        "runs": runs
+    })
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Mixed read/write throughput on the SQLite database: legacy vs tuned engine.
+
+Seeds a fresh database with ``--users`` users, their documents and
+``--query-logs`` query log rows, then runs ``--threads`` workers for
+``--seconds`` each doing, by ``--write-share``:
+
+- reads: a user's documents, and a user's 20 most recent query logs
+- writes: insert a query log row, or update a document's status
+
+Two setups are compared:
+
+- ``legacy``: ``create_engine`` with default settings (rollback journal,
+  ``synchronous=FULL``) and no ``documents(user_id)`` /
+  ``query_logs(user_id, timestamp)`` indexes
+- ``tuned``: ``create_db_engine`` (WAL, ``synchronous=NORMAL``, busy
+  timeout, sized pool) with the indexes
+
+and we report operations per second, read/write p50/p99 and failed
+operations (e.g. "database is locked").
+
+    python -m benchmarks.bench_db_concurrency --threads 1 8 32
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from benchmarks.common import summarize_latencies, write_results
+from app.db.database import create_db_engine
+from app.db.models import Base, Document, QueryLog, User
+
+def seed(engine, users: int, documents_per_user: int, query_logs: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(0)
+    start = datetime.utcnow() - timedelta(days=30)
+    with engine.begin() as connection:
+        connection.execute(User.__table__.insert(), [
+            {"id": i + 1, "email": f"user{i}@example.com", "hashed_password": "x", "token_version": 0}
+            for i in range(users)
+        ])
+        connection.execute(Document.__table__.insert(), [
+            {
+                "filename": f"{u}_{d}.txt", "original_filename": f"{d}.txt", "file_size": 1000, "file_type": "txt",
+                "chunks_count": 10, "uploaded_at": start, "user_id": u + 1, "status": "ready"
+            }
+            for u in range(users) for d in range(documents_per_user)
+        ])
+        connection.execute(QueryLog.__table__.insert(), [
+            {
+                "user_id": rng.randrange(users) + 1,
+                "timestamp": start + timedelta(seconds=rng.randrange(30 * 86400)),
+                "time_to_respond": 1.0, "question": "question", "llm_response": "answer"
+            }
+            for _ in range(query_logs)
+        ])
+
+def run(engine, users: int, threads: int, seconds: float, write_share: float) -> dict:
+    Session = sessionmaker(bind=engine)
+    reads, writes = [], []
+    errors = 0
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + seconds
+
+    def worker(seed_: int) -> None:
+        nonlocal errors
+        rng = random.Random(seed_)
+        local_reads, local_writes, local_errors = [], [], 0
+        while time.perf_counter() < stop_at:
+            user_id = rng.randrange(users) + 1
+            write = rng.random() < write_share
+            start = time.perf_counter()
+            db = Session()
+            try:
+                if write and rng.random() < 0.5:
+                    db.add(QueryLog(user_id=user_id, time_to_respond=1.0, question="q", llm_response="a"))
+                    db.commit()
+                elif write:
+                    db.query(Document).filter(Document.user_id == user_id).update({"status": "ready"})
+                    db.commit()
+                elif rng.random() < 0.5:
+                    db.query(Document).filter(Document.user_id == user_id).all()
+                else:
+                    db.query(QueryLog.id).filter(QueryLog.user_id == user_id).order_by(
+                        QueryLog.timestamp.desc()
+                    ).limit(20).all()
+                (local_writes if write else local_reads).append(time.perf_counter() - start)
+            except Exception:
+                db.rollback()
+                local_errors += 1
+            finally:
+                db.close()
+        with lock:
+            reads.extend(local_reads)
+            writes.extend(local_writes)
+            errors += local_errors
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    read = summarize_latencies(reads, elapsed)
+    write = summarize_latencies(writes, elapsed)
+    return {
+        "threads": threads,
+        "ops_per_second": round((len(reads) + len(writes)) / elapsed, 1),
+        "read_ms": {"p50": read["p50_ms"], "p99": read["p99_ms"]},
+        "write_ms": {"p50": write["p50_ms"], "p99": write["p99_ms"]},
+        "errors": errors
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--documents-per-user", type=int, default=20)
+    parser.add_argument("--query-logs", type=int, default=200000)
+    parser.add_argument("--write-share", type=float, default=0.3)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    runs = []
+    for setup in ("legacy", "tuned"):
+        data_dir = tempfile.mkdtemp(prefix="twerlo-bench-")
+        url = f"sqlite:///{os.path.join(data_dir, 'bench.db')}"
+        if setup == "legacy":
+            engine = create_engine(url, connect_args={"check_same_thread": False})
+        else:
+            engine = create_db_engine(url)
+        try:
+            seed(engine, args.users, args.documents_per_user, args.query_logs)
+            if setup == "legacy":
+                with engine.begin() as connection:
+                    connection.execute(text("DROP INDEX ix_documents_user_id"))
+                    connection.execute(text("DROP INDEX ix_query_logs_user_id_timestamp"))
+            for threads in args.threads:
+                result = run(engine, args.users, threads, args.seconds, args.write_share)
+                result["setup"] = setup
+                runs.append(result)
+                print(result)
+        finally:
+            engine.dispose()
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    write_results(args.output, {
+        "benchmark": "db_concurrency",
+        "users": args.users,
+        "query_logs": args.query_logs,
+        "write_share": args.write_share,
+        "runs": runs
+    })
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Recall, memory and latency of truncated and int8-quantized embeddings.
+
+Uses a fixed synthetic corpus (seeded) shaped like text-embedding-3-large
+output: 3072 dimensions, clustered, with variance concentrated in the
+leading dimensions as in Matryoshka-trained models. Queries are perturbed
+corpus points. Ground truth is exact float32 search on the full vectors.
+
+For each dimension and quantization setting the NumPy backend is built and
+queried, reporting recall@k against the ground truth, the bytes scanned per
+query (the resident index), and p50/p99 latency. ``rerank_factor`` 1 means
+no rerank (the int8 shortlist is the answer).
+
+    python -m benchmarks.bench_embedding_compression --corpus 20000 --dims 3072 1024 512 256
+"""
+import argparse
+import tempfile
+import time
+import numpy as np
+from benchmarks.common import summarize_latencies, write_results
+from app.services.numpy_index import NumpyCollection
+
+def generate_corpus(size: int, queries: int, dims: int, clusters: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    spectrum = (np.arange(dims) + 1.0) ** -0.5
+    centers = rng.standard_normal((clusters, dims)).astype(np.float32) * spectrum
+    labels = rng.integers(0, clusters, size)
+    corpus = centers[labels] + 0.6 * rng.standard_normal((size, dims)).astype(np.float32) * spectrum
+    picks = rng.integers(0, size, queries)
+    query_vectors = corpus[picks] + 0.4 * rng.standard_normal((queries, dims)).astype(np.float32) * spectrum
+    return corpus.astype(np.float32), query_vectors.astype(np.float32)
+
+def truncate(matrix: np.ndarray, dims: int) -> np.ndarray:
+    head = matrix[:, :dims]
+    return head / np.linalg.norm(head, axis=1, keepdims=True)
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int):
+    normalized = truncate(corpus, corpus.shape[1])
+    scores = truncate(queries, queries.shape[1]) @ normalized.T
+    return [set(map(str, np.argsort(-row)[:k])) for row in scores]
+
+def run(corpus, queries, truth, dims: int, quantization: str, rerank_factor: int, k: int) -> dict:
+    with tempfile.TemporaryDirectory() as path:
+        collection = NumpyCollection(path, max_segments=8, quantization=quantization, rerank_factor=rerank_factor)
+        vectors = truncate(corpus, dims)
+        ids = [str(i) for i in range(len(vectors))]
+        for start in range(0, len(vectors), 5000):
+            stop = start + 5000
+            collection.upsert(ids[start:stop], ids[start:stop], vectors[start:stop], [{"user_id": 0}] * len(ids[start:stop]))
+
+        query_vectors = truncate(queries, dims)
+        collection.query(query_vectors[0], k)  # page the index in
+        latencies = []
+        hits = 0
+        started = time.perf_counter()
+        for vector, expected in zip(query_vectors, truth):
+            start = time.perf_counter()
+            results = collection.query(vector, k)
+            latencies.append(time.perf_counter() - start)
+            hits += len({result.id for result in results} & expected)
+
+        bytes_per_vector = dims + 4 if quantization == "int8" else dims * 4
+        return {
+            "dims": dims,
+            "quantization": quantization,
+            "rerank_factor": rerank_factor if quantization == "int8" else None,
+            f"recall_at_{k}": round(hits / (len(truth) * k), 4),
+            "scan_bytes_per_vector": bytes_per_vector,
+            "scan_index_mb": round(bytes_per_vector * len(vectors) / 1e6, 1),
+            **summarize_latencies(latencies, time.perf_counter() - started)
+        }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--full-dims", type=int, default=3072)
+    parser.add_argument("--dims", type=int, nargs="+", default=[3072, 1024, 512, 256])
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    corpus, queries = generate_corpus(args.corpus, args.queries, args.full_dims, args.clusters)
+    truth = exact_top_k(corpus, queries, args.k)
+
+    runs = []
+    for dims in args.dims:
+        for quantization, rerank_factor in (("none", 1), ("int8", 1), ("int8", 4)):
+            runs.append(run(corpus, queries, truth, dims, quantization, rerank_factor, args.k))
+            print(runs[-1])
+
+    write_results(args.output, {
+        "benchmark": "embedding_compression",
+        "corpus": args.corpus,
+        "full_dims": args.full_dims,
+        "k": args.k,
+        "runs": runs
+    })
+
+if __name__ == "__main__":
+    main()
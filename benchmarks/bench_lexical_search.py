@@ -0,0 +1,76 @@
+"""BM25 lookup latency and indexing throughput of the lexical index.
+
+Builds a synthetic per-user corpus of manual-style chunks, each naming a
+unique error code and part number next to vocabulary shared by every chunk,
+then queries for random identifiers. Reports indexing rate, the cold first
+search (postings loaded from SQLite) and p50/p99 of warm searches, plus the
+hit rate of the exact identifier at rank 1.
+
+    python -m benchmarks.bench_lexical_search --chunks-per-user 1000 10000 50000
+"""
+import argparse
+import random
+import tempfile
+import time
+from benchmarks.common import summarize_latencies, write_results
+from app.services.lexical_index import LexicalIndex
+
+WORDS = (
+    "the pump filter valve pressure service warranty replace check inspect motor seal "
+    "housing cartridge flow sensor reset manual clause schedule maintenance operator"
+).split()
+
+def make_chunk(i: int, rng: random.Random) -> str:
+    filler = " ".join(rng.choice(WORDS) for _ in range(60))
+    return f"Error ERR-{i:05d} on part P{i}/B: {filler}. See clause {i % 50}.{i % 7}.{i % 3}."
+
+def run(chunks: int, queries: int, k: int) -> dict:
+    rng = random.Random(0)
+    texts = [make_chunk(i, rng) for i in range(chunks)]
+    with tempfile.TemporaryDirectory() as path:
+        index = LexicalIndex(f"{path}/lexical.db", memory_users=4)
+        started = time.perf_counter()
+        for start in range(0, chunks, 1000):
+            batch = texts[start:start + 1000]
+            index.add([str(start + i) for i in range(len(batch))], batch, [{"user_id": 1}] * len(batch))
+        index_seconds = time.perf_counter() - started
+
+        start = time.perf_counter()
+        index.search(1, "pump pressure", k)
+        cold_ms = (time.perf_counter() - start) * 1000
+
+        targets = [rng.randrange(chunks) for _ in range(queries)]
+        latencies = []
+        hits = 0
+        started = time.perf_counter()
+        for target in targets:
+            start = time.perf_counter()
+            results = index.search(1, f"what does ERR-{target:05d} mean for the pump?", k)
+            latencies.append(time.perf_counter() - start)
+            hits += bool(results) and results[0].id == str(target)
+
+        return {
+            "chunks_per_user": chunks,
+            "index_chunks_per_s": round(chunks / index_seconds),
+            "cold_search_ms": round(cold_ms, 2),
+            "top1_hit_rate": round(hits / queries, 4),
+            **summarize_latencies(latencies, time.perf_counter() - started)
+        }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks-per-user", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    runs = []
+    for chunks in args.chunks_per_user:
+        runs.append(run(chunks, args.queries, args.k))
+        print(runs[-1])
+
+    write_results(args.output, {"benchmark": "lexical_search", "k": args.k, "runs": runs})
+
+if __name__ == "__main__":
+    main()
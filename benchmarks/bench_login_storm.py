@@ -0,0 +1,133 @@
+"""Q&A latency during a login storm, for each password hashing setup.
+
+Starts a stub OpenAI server and, for each ``PASSWORD_HASH_WORKERS`` value,
+the app under uvicorn with ``--users`` registered users and one indexed
+document. Each run has two phases of ``--seconds``:
+
+- ``quiet``: ``--askers`` clients send /qa/ask back to back
+- ``storm``: the same askers while every user logs in, repeatedly and all at once
+
+and reports /qa/ask p50/p99 in both phases, login latency and throughput,
+and how many logins were turned away with 429. ``0`` workers hashes in the
+shared blocking thread pool; ``N`` uses a dedicated low-priority process pool.
+
+    python -m benchmarks.bench_login_storm --workers 0 1 --users 200
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+import httpx
+from benchmarks.bench_ask_concurrency import prepare_user
+from benchmarks.common import (
+    isolated_environment, free_port, start_stub_llm, start_app_process, stop_process, summarize_latencies,
+    write_results
+)
+
+PASSWORD = "benchpassword"
+
+async def register_users(base_url: str, count: int) -> list:
+    emails = [f"agent_{i}_{uuid.uuid4().hex[:6]}@example.com" for i in range(count)]
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        for email in emails:
+            response = await client.post("/auth/register", json={"email": email, "password": PASSWORD})
+            response.raise_for_status()
+    return emails
+
+async def ask_loop(client: httpx.AsyncClient, headers: dict, stop_at: float, latencies: list) -> None:
+    i = 0
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        i += 1
+        try:
+            response = await client.post("/qa/ask", json={"question": f"What uptime is guaranteed? {i}"}, headers=headers)
+        except httpx.HTTPError:
+            continue
+        if response.status_code == 200:
+            latencies.append(time.perf_counter() - start)
+
+async def login_loop(client: httpx.AsyncClient, email: str, stop_at: float, stats: dict) -> None:
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        try:
+            response = await client.post("/auth/login", json={"email": email, "password": PASSWORD})
+        except httpx.HTTPError:
+            stats["errors"] += 1
+            continue
+        if response.status_code == 200:
+            stats["latencies"].append(time.perf_counter() - start)
+        elif response.status_code == 429:
+            stats["rejected"] += 1
+            await asyncio.sleep(float(response.headers.get("retry-after", "1")))
+        else:
+            stats["errors"] += 1
+
+async def run_phase(base_url: str, headers: dict, emails: list, askers: int, seconds: float) -> dict:
+    limits = httpx.Limits(max_connections=askers + len(emails) + 10)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        ask_latencies = []
+        login_stats = {"latencies": [], "rejected": 0, "errors": 0}
+        start = time.perf_counter()
+        stop_at = start + seconds
+        await asyncio.gather(
+            *(ask_loop(client, headers, stop_at, ask_latencies) for _ in range(askers)),
+            *(login_loop(client, email, stop_at, login_stats) for email in emails)
+        )
+        elapsed = time.perf_counter() - start
+
+    result = {"ask": summarize_latencies(ask_latencies, elapsed)}
+    if emails:
+        result["login"] = summarize_latencies(login_stats["latencies"], elapsed)
+        result["login"].update(rejected_429=login_stats["rejected"], errors=login_stats["errors"])
+    return result
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1], help="PASSWORD_HASH_WORKERS values")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--askers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--bcrypt-rounds", type=int, default=10)
+    parser.add_argument("--max-pending", type=int, default=64, help="PASSWORD_HASH_MAX_PENDING")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="stub chat completion latency (s)")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    stub = start_stub_llm(args.llm_latency, 0.01)
+    runs = []
+    try:
+        for workers in args.workers:
+            isolated_environment(stub.base_url)
+            os.environ.update(
+                PASSWORD_HASH_WORKERS=str(workers),
+                PASSWORD_HASH_MAX_PENDING=str(args.max_pending),
+                BCRYPT_ROUNDS=str(args.bcrypt_rounds),
+                ANSWER_CACHE_ENABLED="false",
+                EMBEDDING_CACHE_ENABLED="false"
+            )
+            port = free_port()
+            server = start_app_process(port)
+            base_url = f"http://127.0.0.1:{port}"
+            try:
+                headers = asyncio.run(prepare_user(base_url))
+                emails = asyncio.run(register_users(base_url, args.users))
+                quiet = asyncio.run(run_phase(base_url, headers, [], args.askers, args.seconds))
+                storm = asyncio.run(run_phase(base_url, headers, emails, args.askers, args.seconds))
+            finally:
+                stop_process(server)
+            runs.append({"password_hash_workers": workers, "quiet": quiet, "storm": storm})
+            print(runs[-1])
+    finally:
+        stop_process(stub)
+
+    write_results(args.output, {
+        "benchmark": "login_storm",
+        "users": args.users,
+        "askers": args.askers,
+        "bcrypt_rounds": args.bcrypt_rounds,
+        "runs": runs
+    })
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Throughput and peak memory of PDF text extraction + chunking.
+
+Generates multi-hundred-page PDFs and compares:
+
+- baseline: whole file in a BytesIO, page text joined with ``+=``, then chunked
+- streaming: pages yielded lazily from disk and chunked incrementally
+- parallel: streaming with page ranges spread across a process pool
+- ingest: the whole ingestion pipeline (extract, chunk, embed, index) with
+  the local hash embedder and the numpy vector store in a scratch directory
+
+Each run happens in a fresh process so peak RSS is measured per mode.
+
+    python -m benchmarks.bench_pdf_extraction --pages 500 2000
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from benchmarks.common import isolated_environment, write_results
+from tests.pdf_factory import build_pdf, generated_pages
+
+def baseline_chunks(path: str) -> int:
+    """The original implementation: full copy in memory and quadratic concatenation."""
+    import PyPDF2
+    from app.core.llm_utils import split_text_into_chunks
+
+    with open(path, "rb") as f:
+        content = f.read()
+    reader = PyPDF2.PdfReader(io.BytesIO(content))
+    text = ""
+    for page in reader.pages:
+        text += page.extract_text() + "\n"
+    return len(split_text_into_chunks(text.strip()))
+
+def streaming_chunks(path: str) -> int:
+    from app.core.llm_utils import iter_text_chunks
+    from app.services.text_extraction import iter_document_text
+
+    return sum(1 for _ in iter_text_chunks(iter_document_text(path, "pdf")))
+
+def ingested_chunks(path: str) -> int:
+    from app.db.init_db import init_database
+    from app.services.ingestion import IngestionJob, ingestion_queue
+
+    init_database()
+    job = IngestionJob("bench", 1, 1, path, os.path.basename(path), "pdf")
+    ingestion_queue._run(job)
+    if job.status != "ready":
+        raise RuntimeError(job.error)
+    return job.chunks_count
+
+def run_mode(mode: str, path: str, pages: int, workers: int, queue) -> None:
+    """Child process entry point: run one mode and report timings and memory."""
+    if mode == "ingest":
+        # Settings are read at import time
+        isolated_environment()
+        os.environ.update(EMBEDDING_PROVIDER="hash", VECTOR_STORE_BACKEND="numpy", EMBEDDING_CACHE_ENABLED="false")
+    from app.core.config import settings
+    from app.core import llm_utils  # imported up front so import cost isn't timed
+    from app.services.text_extraction import shutdown_pdf_pool
+
+    settings.pdf_workers = workers if mode == "parallel" else 1
+    settings.pdf_parallel_min_pages = 1
+    start = time.perf_counter()
+    if mode == "baseline":
+        chunks = baseline_chunks(path)
+    elif mode == "ingest":
+        chunks = ingested_chunks(path)
+    else:
+        chunks = streaming_chunks(path)
+    elapsed = time.perf_counter() - start
+    shutdown_pdf_pool()
+    queue.put({
+        "mode": mode,
+        "pages": pages,
+        "chunks": chunks,
+        "seconds": round(elapsed, 3),
+        "pages_per_second": round(pages / elapsed, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_worker_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1)
+    })
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[500, 2000])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--modes", nargs="+", default=["baseline", "streaming", "parallel"])
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = os.path.join(tmp, f"generated_{pages}.pdf")
+            with open(path, "wb") as f:
+                f.write(build_pdf(generated_pages(pages)))
+            for mode in args.modes:
+                queue = context.Queue()
+                process = context.Process(target=run_mode, args=(mode, path, pages, args.workers, queue))
+                process.start()
+                results.append(queue.get())
+                process.join()
+
+    write_results(args.output, {
+        "benchmark": "pdf_extraction",
+        "cpu_count": os.cpu_count(),
+        "workers": args.workers,
+        "runs": results
+    })
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Per-request cost of logging a query: commit per request vs write-behind buffer.
+
+Seeds a fresh database (tuned engine, ``--existing-rows`` query logs), then
+``--threads`` workers each log ``--requests`` queries, as /qa/ask does once
+per request:
+
+- ``sync``: a session per request, ``db.add(query_log)`` and ``db.commit()``
+  (the previous code path)
+- ``write_behind``: ``QueryLogger.log``, which only appends to the in-memory
+  buffer; a background thread inserts batches of ``--batch-size`` rows
+
+and reports the time the request spends logging (p50/p99), logged rows per
+second, and for write-behind how long ``shutdown`` then takes to drain the
+buffer and how many INSERT batches were needed.
+
+    python -m benchmarks.bench_query_log --threads 1 8 32
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from sqlalchemy.orm import sessionmaker
+from benchmarks.common import summarize_latencies, write_results
+from app.db.database import create_db_engine
+from app.db.models import Base, QueryLog, User
+from app.services.query_logger import QueryLogger
+
+ANSWER = "The service level agreement guarantees 99.9% monthly uptime. " * 8
+
+def log_fields(user_id: int, i: int) -> dict:
+    return dict(
+        user_id=user_id, time_to_respond=0.8, question=f"What uptime is guaranteed? {i}", llm_response=ANSWER,
+        auth_time=0.0003, embedding_time=0.05, search_time=0.004, context_time=0.001, llm_time=0.7
+    )
+
+def seed(engine, users: int, existing_rows: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(User.__table__.insert(), [
+            {"id": i + 1, "email": f"user{i}@example.com", "hashed_password": "x", "token_version": 0}
+            for i in range(users)
+        ])
+        if existing_rows:
+            connection.execute(QueryLog.__table__.insert(), [
+                dict(log_fields(i % users + 1, i), timestamp=datetime.utcnow()) for i in range(existing_rows)
+            ])
+
+def run(mode: str, Session, users: int, threads: int, requests: int, batch_size: int) -> dict:
+    logger = QueryLogger(batch_size=batch_size, flush_seconds=1.0, max_pending=10 ** 9, session_factory=Session)
+    latencies = []
+    lock = threading.Lock()
+
+    def log_sync(fields: dict) -> None:
+        db = Session()
+        try:
+            db.add(QueryLog(**fields))
+            db.commit()
+        finally:
+            db.close()
+
+    def worker(offset: int) -> None:
+        local = []
+        for i in range(requests):
+            fields = log_fields((offset + i) % users + 1, offset + i)
+            start = time.perf_counter()
+            if mode == "sync":
+                log_sync(fields)
+            else:
+                logger.log(**fields)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker, args=(t * requests,)) for t in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    drain_start = time.perf_counter()
+    logger.shutdown()
+    drain = time.perf_counter() - drain_start
+
+    summary = summarize_latencies(latencies, elapsed)
+    result = {
+        "mode": mode,
+        "threads": threads,
+        "log_ms": {"p50": summary["p50_ms"], "p99": summary["p99_ms"]},
+        "rows_per_second": round(len(latencies) / (elapsed + drain), 1)
+    }
+    if mode == "write_behind":
+        stats = logger.stats()
+        result.update(drain_ms=round(drain * 1000, 2), batches=stats["flushes"], failed=stats["failed"])
+    return result
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=500, help="logged queries per thread")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--existing-rows", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=200, help="QUERY_LOG_BATCH_SIZE")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="twerlo-bench-")
+    engine = create_db_engine(f"sqlite:///{os.path.join(data_dir, 'bench.db')}")
+    runs = []
+    try:
+        seed(engine, args.users, args.existing_rows)
+        Session = sessionmaker(bind=engine)
+        for threads in args.threads:
+            for mode in ("sync", "write_behind"):
+                runs.append(run(mode, Session, args.users, threads, args.requests, args.batch_size))
+                print(runs[-1])
+    finally:
+        engine.dispose()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    write_results(args.output, {
+        "benchmark": "query_log",
+        "requests_per_thread": args.requests,
+        "batch_size": args.batch_size,
+        "runs": runs
+    })
+
+if __name__ == "__main__":
+    main()
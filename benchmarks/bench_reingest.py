@@ -0,0 +1,75 @@
+"""Re-ingest cost of an edited document with content-hash chunk ids.
+
+Chunks a generated document, applies ``edits`` random sentence edits
+(replace, insert or delete) and chunks it again. Chunks whose id (document
+id + text hash) already existed are kept; only the rest would be embedded.
+Reports the share of chunks and embedding tokens sent again, against the
+full re-embed the previous uuid-based ids required.
+
+    python -m benchmarks.bench_reingest --size-kb 200 --edits 1 5 20
+"""
+import argparse
+import random
+import re
+from benchmarks.bench_chunking import generate_text
+from benchmarks.common import write_results
+from app.core.chunking import get_chunker
+from app.services.ingestion import chunk_ids_for
+
+def edit_text(text: str, edits: int, rng: random.Random) -> str:
+    sentences = re.split(r"(?<=[.!?]) ", text)
+    for _ in range(edits):
+        i = rng.randrange(len(sentences))
+        action = rng.choice(["replace", "insert", "delete"])
+        if action == "replace":
+            sentences[i] = f"This sentence was revised in edit {rng.randrange(10 ** 6)} to say something else."
+        elif action == "insert":
+            sentences.insert(i, f"A new sentence {rng.randrange(10 ** 6)} was added here.")
+        elif len(sentences) > 1:
+            del sentences[i]
+    return " ".join(sentences)
+
+def run(strategy: str, text: str, edits: int, trials: int) -> dict:
+    chunker = get_chunker(strategy)
+    before = chunker.chunk_text(text)
+    before_ids = set(chunk_ids_for(1, [chunk.text for chunk in before]))
+    rng = random.Random(edits)
+    chunk_share = 0.0
+    token_share = 0.0
+    removed = 0
+    for _ in range(trials):
+        after = chunker.chunk_text(edit_text(text, edits, rng))
+        ids = chunk_ids_for(1, [chunk.text for chunk in after])
+        new = [chunk for chunk, id_ in zip(after, ids) if id_ not in before_ids]
+        chunk_share += len(new) / len(after)
+        token_share += sum(chunk.token_count for chunk in new) / sum(chunk.token_count for chunk in after)
+        removed += len(before_ids - set(ids))
+    return {
+        "strategy": strategy,
+        "edits": edits,
+        "chunks": len(before),
+        "embedded_chunk_share": round(chunk_share / trials, 4),
+        "embedded_token_share": round(token_share / trials, 4),
+        "removed_chunks_mean": round(removed / trials, 1)
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-kb", type=int, default=200)
+    parser.add_argument("--edits", type=int, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--strategies", nargs="+", default=["sentences", "paragraphs", "characters"])
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    text = generate_text(args.size_kb * 1024, seed=1)
+    runs = []
+    for strategy in args.strategies:
+        for edits in args.edits:
+            runs.append(run(strategy, text, edits, args.trials))
+            print(runs[-1])
+
+    write_results(args.output, {"benchmark": "reingest", "size_kb": args.size_kb, "runs": runs})
+
+if __name__ == "__main__":
+    main()
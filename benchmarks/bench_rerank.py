@@ -0,0 +1,102 @@
+"""Answer-chunk ranking and latency with and without the rerank stage.
+
+Uses the manual-like documents of ``bench_context_tokens``: each question asks
+for the torque of one bolt, and exactly one chunk states it. The first stage
+is an exact vector search over bag-of-words random-projection embeddings, a
+stand-in for a dense model: it finds chunks about the right topic but blurs
+the exact bolt and component identifiers. For each candidate count N, the
+top-N candidates are reranked with the chosen scorer and we report
+
+- ``hit_at_k``: share of questions whose answer chunk is in the top k
+- ``mrr``: mean reciprocal rank of the answer chunk among the N candidates
+- per-stage latency (``search``, ``rerank``) as p50/p99 in milliseconds
+
+    python -m benchmarks.bench_rerank --candidates 10 20 50 --scorer overlap
+"""
+import argparse
+import time
+import numpy as np
+from benchmarks.bench_context_tokens import generate_documents
+from benchmarks.common import summarize_latencies, write_results
+from app.core.chunking import get_chunker
+from app.core.providers import HashEmbeddings
+from app.services.reranking import get_scorer
+from app.services.vector_store import SearchResult
+
+def rank_of(results, fact: str):
+    for rank, result in enumerate(results, start=1):
+        if fact in result.text:
+            return rank
+    return None
+
+def run(chunks, matrix, questions, embedder, scorer, candidates: int, k: int) -> dict:
+    stats = {mode: {"hits": 0, "reciprocal_rank": 0.0} for mode in ("vector", "reranked")}
+    search_latencies = []
+    rerank_latencies = []
+    for question, fact, _ in questions:
+        start = time.perf_counter()
+        scores = matrix @ embedder.vector(question)
+        top = np.argpartition(-scores, candidates - 1)[:candidates]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        results = [SearchResult(id=str(i), text=chunks[i], metadata={}, distance=float(1 - scores[i])) for i in top]
+        search_latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        relevance = scorer.score(question, [result.text for result in results])
+        reranked = [results[i] for i in np.argsort(-relevance, kind="stable")]
+        rerank_latencies.append(time.perf_counter() - start)
+
+        for mode, ranked in (("vector", results), ("reranked", reranked)):
+            rank = rank_of(ranked, fact)
+            if rank is not None:
+                stats[mode]["hits"] += rank <= k
+                stats[mode]["reciprocal_rank"] += 1 / rank
+
+    search = summarize_latencies(search_latencies, sum(search_latencies))
+    rerank = summarize_latencies(rerank_latencies, sum(rerank_latencies))
+    return {
+        "candidates": candidates,
+        "k": k,
+        "hit_at_k": {mode: round(values["hits"] / len(questions), 4) for mode, values in stats.items()},
+        "mrr": {mode: round(values["reciprocal_rank"] / len(questions), 4) for mode, values in stats.items()},
+        "search_ms": {"p50": search["p50_ms"], "p99": search["p99_ms"]},
+        "rerank_ms": {"p50": rerank["p50_ms"], "p99": rerank["p99_ms"]}
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=40)
+    parser.add_argument("--sections", type=int, default=12)
+    parser.add_argument("--sentences", type=int, default=8)
+    parser.add_argument("--strategy", default="sentences")
+    parser.add_argument("--dimensions", type=int, default=64, help="embedding dimensions of the first stage")
+    parser.add_argument("--candidates", type=int, nargs="+", default=[10, 20, 50])
+    parser.add_argument("--k", type=int, default=3, help="chunks that reach the context")
+    parser.add_argument("--scorer", default="overlap")
+    parser.add_argument("--questions", type=int, default=300)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    texts, questions = generate_documents(args.documents, args.sections, args.sentences)
+    questions = questions[::max(1, len(questions) // args.questions)][:args.questions]
+    chunker = get_chunker(args.strategy)
+    chunks = [chunk.text for text in texts for chunk in chunker.iter_chunks([text])]
+    embedder = HashEmbeddings(args.dimensions)
+    matrix = np.stack([embedder.vector(chunk) for chunk in chunks])
+    scorer = get_scorer(args.scorer)
+
+    runs = []
+    for candidates in args.candidates:
+        runs.append(run(chunks, matrix, questions, embedder, scorer, candidates, args.k))
+        print(runs[-1])
+
+    write_results(args.output, {
+        "benchmark": "rerank",
+        "scorer": args.scorer,
+        "chunks": len(chunks),
+        "questions": len(questions),
+        "runs": runs
+    })
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Retrieval quality and speed through the real chunking and vector store path.
+
+Builds a corpus, either generated (the manual-like documents of
+``bench_context_tokens``: each question asks for one bolt torque, stated by
+exactly one sentence) or loaded with ``--corpus`` from a JSON file::
+
+    {"documents": ["text", ...],
+     "questions": [{"question": "...", "answer": "text the right chunk contains"}, ...]}
+
+Documents go through ``split_text_into_chunks`` (``--strategy``), are embedded
+with the deterministic local ``hash`` provider (``HashEmbeddings``, no API
+calls) and added to a fresh ``VectorStore`` (``--backend``). Each question is
+then embedded and searched, and we report
+
+- ``recall_at_k``: share of questions with a chunk containing the answer in the top k
+- ``mrr``: mean reciprocal rank of the first such chunk (0 when not in the top max(k))
+- ingest chunks/s (chunking, embedding and indexing timed separately)
+- query p50/p99 in milliseconds (embedding plus search)
+- peak RSS of the process and the size of the index on disk
+
+Run one configuration per invocation so memory figures stay comparable, and
+pass ``--baseline`` with the JSON of an earlier run to print the differences:
+
+    python -m benchmarks.bench_retrieval --backend chroma --output chroma.json
+    python -m benchmarks.bench_retrieval --backend numpy --baseline chroma.json
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, List
+from benchmarks.bench_context_tokens import generate_documents
+from benchmarks.common import peak_rss_mb, summarize_latencies, write_results
+from app.core.config import settings
+from app.core.llm_utils import split_text_into_chunks
+from app.core.providers import HashEmbeddings
+from app.services.vector_store import VectorStore
+
+USER_ID = 1
+
+def load_corpus(path: str):
+    """Document texts and (question, answer text) pairs from a corpus JSON file."""
+    with open(path) as f:
+        corpus = json.load(f)
+    return corpus["documents"], [(item["question"], item["answer"]) for item in corpus["questions"]]
+
+def directory_size_mb(path: str) -> float:
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total / (1024 * 1024)
+
+def ingest(store: VectorStore, texts: List[str], embedder: HashEmbeddings, batch_size: int) -> Dict:
+    """Chunk, embed and index every document; returns chunk count and seconds per stage."""
+    timings = {"chunk": 0.0, "embed": 0.0, "index": 0.0}
+    chunks = 0
+    for d, text in enumerate(texts):
+        start = time.perf_counter()
+        pieces = split_text_into_chunks(text)
+        timings["chunk"] += time.perf_counter() - start
+
+        for offset in range(0, len(pieces), batch_size):
+            batch = pieces[offset:offset + batch_size]
+            start = time.perf_counter()
+            embeddings = [embedder.vector(piece).tolist() for piece in batch]
+            timings["embed"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            store.add_documents(
+                documents=batch,
+                embeddings=embeddings,
+                metadatas=[
+                    {"user_id": USER_ID, "document_id": d, "chunk_index": offset + i} for i in range(len(batch))
+                ],
+                ids=[f"doc_{d}_chunk_{offset + i}" for i in range(len(batch))]
+            )
+            timings["index"] += time.perf_counter() - start
+        chunks += len(pieces)
+    return {"chunks": chunks, "seconds": timings}
+
+def evaluate(store: VectorStore, questions, embedder: HashEmbeddings, ks: List[int]) -> Dict:
+    """recall@k, MRR and query latency over all questions."""
+    depth = max(ks)
+    hits = {k: 0 for k in ks}
+    reciprocal_rank = 0.0
+    latencies = []
+    for question, answer in questions:
+        start = time.perf_counter()
+        results = store.search(embedder.vector(question).tolist(), depth, USER_ID)
+        latencies.append(time.perf_counter() - start)
+
+        rank = next((i for i, result in enumerate(results, start=1) if answer in result.text), None)
+        if rank is None:
+            continue
+        reciprocal_rank += 1 / rank
+        for k in ks:
+            hits[k] += rank <= k
+
+    summary = summarize_latencies(latencies, sum(latencies))
+    return {
+        "recall_at_k": {str(k): round(hits[k] / len(questions), 4) for k in ks},
+        "mrr": round(reciprocal_rank / len(questions), 4),
+        "query_ms": {"p50": summary["p50_ms"], "p99": summary["p99_ms"]}
+    }
+
+def compare(results: Dict, baseline: Dict) -> List[str]:
+    """One line per headline metric: baseline -> this run."""
+    def pairs(result):
+        values = {f"recall@{k}": value for k, value in result["recall_at_k"].items()}
+        values.update(
+            mrr=result["mrr"],
+            ingest_chunks_per_second=result["ingest"]["chunks_per_second"],
+            query_p50_ms=result["query_ms"]["p50"],
+            query_p99_ms=result["query_ms"]["p99"],
+            peak_rss_mb=result["memory"]["peak_rss_mb"],
+            index_mb=result["memory"]["index_mb"]
+        )
+        return values
+
+    before, after = pairs(baseline), pairs(results)
+    return [
+        f"{name:26} {before[name]:>10} -> {after[name]:<10} ({after[name] - before[name]:+.4g})"
+        for name in after if name in before
+    ]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="corpus JSON file (default: generated documents)")
+    parser.add_argument("--documents", type=int, default=40)
+    parser.add_argument("--sections", type=int, default=12)
+    parser.add_argument("--sentences", type=int, default=8)
+    parser.add_argument("--strategy", default=settings.chunk_strategy, help="CHUNK_STRATEGY")
+    parser.add_argument("--backend", default="chroma", help="VECTOR_STORE_BACKEND")
+    parser.add_argument("--dimensions", type=int, default=64, help="embedding dimensions of the stand-in")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--batch-size", type=int, default=512, help="chunks per embed/index call")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    if args.corpus:
+        texts, questions = load_corpus(args.corpus)
+    else:
+        texts, generated = generate_documents(args.documents, args.sections, args.sentences)
+        questions = [(question, fact) for question, fact, _ in generated]
+    settings.chunk_strategy = args.strategy
+    embedder = HashEmbeddings(args.dimensions)
+
+    index_dir = tempfile.mkdtemp(prefix="twerlo-bench-")
+    try:
+        store = VectorStore(path=index_dir, partitioning="shared", backend=args.backend)
+        start = time.perf_counter()
+        ingested = ingest(store, texts, embedder, args.batch_size)
+        ingest_seconds = time.perf_counter() - start
+        evaluation = evaluate(store, questions, embedder, args.k)
+        index_mb = directory_size_mb(index_dir)
+    finally:
+        shutil.rmtree(index_dir, ignore_errors=True)
+
+    results = {
+        "benchmark": "retrieval",
+        "corpus": args.corpus or "generated",
+        "strategy": args.strategy,
+        "backend": args.backend,
+        "dimensions": args.dimensions,
+        "documents": len(texts),
+        "questions": len(questions),
+        "ingest": {
+            "chunks": ingested["chunks"],
+            "chunks_per_second": round(ingested["chunks"] / ingest_seconds, 1),
+            "seconds": {stage: round(value, 3) for stage, value in ingested["seconds"].items()}
+        },
+        **evaluation,
+        "memory": {"peak_rss_mb": round(peak_rss_mb(), 1), "index_mb": round(index_mb, 2)}
+    }
+    write_results(args.output, results)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.baseline}:")
+        print("\n".join(compare(results, baseline)))
+
+if __name__ == "__main__":
+    main()
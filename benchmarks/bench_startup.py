@@ -0,0 +1,139 @@
+"""Cold start: import time of ``app.main`` and time to the first answered question.
+
+Runs against a stub OpenAI server and a database prepared once (a user with
+one indexed document). For each ``--warmup`` mode the app is started
+``--runs`` times under uvicorn, and from the moment the process is spawned
+we measure
+
+- ``health_ms``: until ``/health`` first answers (the app is serving)
+- ``first_ask_ms``: until the first ``POST /qa/ask``, sent ``--first-ask-delay``
+  seconds after ``/health`` answers, has succeeded
+- ``first_ask_latency_ms`` and ``second_ask_latency_ms``: how long that
+  first question and the one after it took, i.e. the cold-path penalty
+
+Import time is the median of ``--runs`` fresh interpreters running
+``import app.main``. Every question is unique and the answer cache is off,
+so each ask takes the full embedding, search and LLM path. ``--app-dir``
+starts the app from another checkout, e.g. a ``git worktree`` of an older
+commit, to measure it with the same harness.
+
+    python -m benchmarks.bench_startup --warmup off background blocking
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+import httpx
+from benchmarks.bench_ask_concurrency import prepare_user
+from benchmarks.common import (
+    free_port, isolated_environment, start_app_process, start_stub_llm, stop_process, write_results
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def import_seconds(app_dir: str) -> float:
+    """Time ``import app.main`` in a fresh interpreter."""
+    code = "import time; start = time.perf_counter(); import app.main; print(time.perf_counter() - start)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=app_dir, capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+def cold_start(app_dir: str, mode: str, headers: dict, first_ask_delay: float) -> dict:
+    """Spawn the app and time it up to the first answered question."""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+            "--log-level", "warning"
+        ],
+        cwd=app_dir, env=dict(os.environ, WARMUP_MODE=mode), stdout=subprocess.DEVNULL
+    )
+    try:
+        with httpx.Client(base_url=base_url, timeout=60) as client:
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"App exited with code {process.returncode}")
+                try:
+                    client.get("/health")
+                    break
+                except httpx.HTTPError:
+                    time.sleep(0.005)
+            health = time.perf_counter() - start
+            time.sleep(first_ask_delay)
+
+            latencies = []
+            while len(latencies) < 2:
+                ask_start = time.perf_counter()
+                response = client.post(
+                    "/qa/ask", json={"question": f"What uptime is guaranteed? ({uuid.uuid4().hex[:8]})"},
+                    headers=headers
+                )
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - ask_start)
+                    if len(latencies) == 1:
+                        first_ask = time.perf_counter() - start
+                else:
+                    time.sleep(0.005)
+    finally:
+        stop_process(process)
+    return {
+        "health_ms": round(health * 1000, 1),
+        "first_ask_ms": round(first_ask * 1000, 1),
+        "first_ask_latency_ms": round(latencies[0] * 1000, 1),
+        "second_ask_latency_ms": round(latencies[1] * 1000, 1)
+    }
+
+def median_run(runs: list) -> dict:
+    return {key: round(statistics.median(run[key] for run in runs), 1) for key in runs[0]}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--warmup", nargs="+", default=["off", "background", "blocking"], help="WARMUP_MODE values")
+    parser.add_argument("--runs", type=int, default=5, help="cold starts (and imports) per measurement")
+    parser.add_argument("--first-ask-delay", type=float, default=0.0, help="idle seconds between /health and the first ask")
+    parser.add_argument("--app-dir", default=ROOT, help="checkout to start the app from")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="stub chat completion latency (s)")
+    parser.add_argument("--embedding-latency", type=float, default=0.02, help="stub embedding latency (s)")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    stub = start_stub_llm(args.llm_latency, args.embedding_latency)
+    isolated_environment(stub.base_url)
+    os.environ["ANSWER_CACHE_ENABLED"] = "false"
+    try:
+        # The token stays valid across restarts, which share SECRET_KEY and the database
+        port = free_port()
+        server = start_app_process(port)
+        try:
+            headers = asyncio.run(prepare_user(f"http://127.0.0.1:{port}"))
+        finally:
+            stop_process(server)
+
+        imports = [import_seconds(args.app_dir) for _ in range(args.runs)]
+        modes = {}
+        for mode in args.warmup:
+            modes[mode] = median_run([cold_start(args.app_dir, mode, headers, args.first_ask_delay) for _ in range(args.runs)])
+            print(mode, modes[mode])
+    finally:
+        stop_process(stub)
+
+    write_results(args.output, {
+        "benchmark": "startup",
+        "app_dir": args.app_dir,
+        "runs": args.runs,
+        "first_ask_delay_s": args.first_ask_delay,
+        "import_ms": round(statistics.median(imports) * 1000, 1),
+        "llm_latency_s": args.llm_latency,
+        "embedding_latency_s": args.embedding_latency,
+        "warmup": modes
+    })
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Query latency of the Chroma and NumPy backends by tenant size.
+
+Each user gets their own collection (per_user layout) holding
+``--chunks-per-user`` random embeddings; ``--queries`` k=3 searches are
+timed per backend. Shows where exact NumPy search beats Chroma's per-query
+overhead and how both grow with tenant size.
+
+    python -m benchmarks.bench_vector_backends --chunks-per-user 1000 10000 50000
+"""
+import argparse
+import tempfile
+import time
+from benchmarks.bench_vector_partitioning import build_store, time_queries
+from benchmarks.common import write_results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks-per-user", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--dims", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--backends", nargs="+", default=["chroma", "numpy"])
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    runs = []
+    for chunks_per_user in args.chunks_per_user:
+        for backend in args.backends:
+            with tempfile.TemporaryDirectory() as path:
+                start = time.perf_counter()
+                store = build_store(
+                    path, "per_user", chunks_per_user * args.users, args.users, args.dims,
+                    seed=chunks_per_user, backend=backend
+                )
+                build_seconds = time.perf_counter() - start
+                latency = time_queries(store, args.users, args.dims, args.queries, seed=1)
+                runs.append({
+                    "backend": backend,
+                    "chunks_per_user": chunks_per_user,
+                    "build_seconds": round(build_seconds, 1),
+                    **latency
+                })
+                print(runs[-1])
+
+    write_results(args.output, {
+        "benchmark": "vector_backends",
+        "users": args.users,
+        "dims": args.dims,
+        "runs": runs
+    })
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Query latency against total corpus size for shared vs per-user collections.
+
+Builds a corpus of random embeddings spread evenly over ``--users`` users in
+each layout, then times ``--queries`` searches (k=3) for random users. In
+the shared layout every query filters one collection holding everyone's
+chunks; in the per-user layout it only touches the asking user's chunks,
+so latency should stay flat as the corpus grows.
+
+    python -m benchmarks.bench_vector_partitioning --corpus-sizes 10000 50000 100000
+"""
+import argparse
+import random
+import tempfile
+import time
+import numpy as np
+from benchmarks.common import summarize_latencies, write_results
+from app.services.vector_store import VectorStore
+
+def build_store(
+    path: str,
+    partitioning: str,
+    corpus_size: int,
+    users: int,
+    dims: int,
+    seed: int,
+    backend: str = "chroma"
+) -> VectorStore:
+    store = VectorStore(path=path, partitioning=partitioning, backend=backend)
+    rng = np.random.default_rng(seed)
+    batch_size = 5000
+    for start in range(0, corpus_size, batch_size):
+        count = min(batch_size, corpus_size - start)
+        embeddings = rng.standard_normal((count, dims), dtype=np.float32)
+        store.add_documents(
+            documents=[f"chunk {start + i}" for i in range(count)],
+            embeddings=embeddings.tolist(),
+            metadatas=[{"user_id": (start + i) % users, "chunk_index": start + i} for i in range(count)],
+            ids=[str(start + i) for i in range(count)]
+        )
+    return store
+
+def time_queries(store: VectorStore, users: int, dims: int, queries: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    vectors = np.random.default_rng(seed).standard_normal((queries, dims), dtype=np.float32).tolist()
+    # Warm up collection handles and index loading outside the timed loop
+    for user_id in range(users):
+        store.search(vectors[0], k=3, user_id=user_id)
+    latencies = []
+    started = time.perf_counter()
+    for vector in vectors:
+        user_id = rng.randrange(users)
+        start = time.perf_counter()
+        store.search(vector, k=3, user_id=user_id)
+        latencies.append(time.perf_counter() - start)
+    return summarize_latencies(latencies, time.perf_counter() - started)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus-sizes", type=int, nargs="+", default=[10000, 50000, 100000])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--dims", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--layouts", nargs="+", default=["shared", "per_user"])
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    runs = []
+    for corpus_size in args.corpus_sizes:
+        for layout in args.layouts:
+            with tempfile.TemporaryDirectory() as path:
+                start = time.perf_counter()
+                store = build_store(path, layout, corpus_size, args.users, args.dims, seed=corpus_size)
+                build_seconds = time.perf_counter() - start
+                latency = time_queries(store, args.users, args.dims, args.queries, seed=1)
+                runs.append({
+                    "layout": layout,
+                    "corpus_size": corpus_size,
+                    "chunks_per_user": corpus_size // args.users,
+                    "build_seconds": round(build_seconds, 1),
+                    **latency
+                })
+                print(runs[-1])
+
+    write_results(args.output, {
+        "benchmark": "vector_partitioning",
+        "users": args.users,
+        "dims": args.dims,
+        "runs": runs
+    })
+
+if __name__ == "__main__":
+    main()
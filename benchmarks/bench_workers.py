@@ -0,0 +1,93 @@
+"""Throughput of POST /qa/ask as the number of worker processes grows.
+
+Each run starts the app through ``run.py`` in a fresh data directory with
+``WORKERS=n``. One worker is the embedded single-process layout; more than
+one adds the store server that owns the vector store and lexical index.
+After indexing one document, ``--concurrency`` askers send questions
+through the same port. We report requests per second, p50/p99 latency,
+errors, and the speedup over the first run.
+
+Scaling depends on the cores available. The askers share the host with
+the workers and the store server, so leave a core for them. Use
+``--local`` (hash/echo providers, no stub server) to measure the app's
+own CPU-bound work, which is what extra workers parallelize.
+
+    python -m benchmarks.bench_workers --workers 1 2 4 --local
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+from benchmarks.bench_ask_concurrency import prepare_user, run_level
+from benchmarks.common import (
+    free_port, isolated_environment, start_stub_llm, stop_process, wait_until_up, write_results
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def start_app(port: int, workers: int) -> subprocess.Popen:
+    """Start the app with ``run.py`` (store server included when workers > 1) and wait for /health."""
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "run.py")],
+        cwd=ROOT,
+        env=dict(os.environ, HOST="127.0.0.1", PORT=str(port), WORKERS=str(workers), RELOAD="false"),
+        stdout=subprocess.DEVNULL
+    )
+    wait_until_up(f"http://127.0.0.1:{port}/health", process)
+    return process
+
+def run(workers: int, concurrency: int, requests_per_asker: int, stub_url) -> dict:
+    isolated_environment(stub_url)
+    port = free_port()
+    app = start_app(port, workers)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        headers = asyncio.run(prepare_user(base_url))
+        # One short round first, so every worker has warmed up and connected
+        asyncio.run(run_level(base_url, headers, concurrency, 1))
+        result = asyncio.run(run_level(base_url, headers, concurrency, requests_per_asker))
+    finally:
+        stop_process(app)
+    result["workers"] = workers
+    return result
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent askers")
+    parser.add_argument("--requests-per-asker", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="stub chat completion latency (s)")
+    parser.add_argument("--embedding-latency", type=float, default=0.02, help="stub embedding latency (s)")
+    parser.add_argument("--local", action="store_true", help="use the hash/echo providers instead of a stub server")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    stub = None
+    if args.local:
+        os.environ.update(EMBEDDING_PROVIDER="hash", LLM_PROVIDER="echo")
+    else:
+        stub = start_stub_llm(args.llm_latency, args.embedding_latency)
+    # Every question is unique; keep the caches out of the measurement
+    os.environ.update(EMBEDDING_CACHE_ENABLED="false", ANSWER_CACHE_ENABLED="false", WARMUP_MODE="blocking")
+
+    runs = []
+    try:
+        for workers in args.workers:
+            runs.append(run(workers, args.concurrency, args.requests_per_asker, stub.base_url if stub else None))
+            runs[-1]["speedup"] = round(runs[-1]["rps"] / runs[0]["rps"], 2) if runs[0]["rps"] else None
+            print(runs[-1])
+    finally:
+        if stub is not None:
+            stop_process(stub)
+
+    write_results(args.output, {
+        "benchmark": "workers",
+        "cpus": os.cpu_count(),
+        "providers": "hash/echo" if args.local else "stub server",
+        "concurrency": args.concurrency,
+        "runs": runs
+    })
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Shared helpers for benchmarks: isolated environments, app servers and statistics."""
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+import httpx
+
+def isolated_environment(openai_base_url: Optional[str] = None) -> str:
+    """Point every data path at a fresh temporary directory.
+
+    Must run before ``app`` is imported, since settings are read at import time.
+    """
+    data_dir = tempfile.mkdtemp(prefix="twerlo-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(data_dir, 'bench.db')}"
+    os.environ["CHROMA_DB_PATH"] = os.path.join(data_dir, "chroma_db")
+    os.environ["UPLOAD_DIR"] = os.path.join(data_dir, "uploads")
+    os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(data_dir, "embedding_cache.db")
+    os.environ["NUMPY_INDEX_PATH"] = os.path.join(data_dir, "numpy_index")
+    os.environ["LEXICAL_INDEX_PATH"] = os.path.join(data_dir, "lexical_index.db")
+    os.environ["STORE_SERVER_ADDRESS"] = os.path.join(data_dir, "store_server.sock")
+    os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+    if openai_base_url:
+        os.environ["OPENAI_BASE_URL"] = openai_base_url
+    return data_dir
+
+def free_port() -> int:
+    """Ask the OS for an unused TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_until_up(url: str, process: Optional[subprocess.Popen] = None, timeout: float = 60.0) -> None:
+    """Poll ``url`` until it answers, failing early if ``process`` exits."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Process exited with code {process.returncode}")
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+def start_process(args: List[str], health_url: str) -> subprocess.Popen:
+    """Start a Python module in a subprocess (inheriting os.environ) and wait for it."""
+    process = subprocess.Popen([sys.executable, "-m", *args], stdout=subprocess.DEVNULL)
+    wait_until_up(health_url, process)
+    return process
+
+def start_stub_llm(chat_latency: float, embedding_latency: float, dimensions: int = 8) -> subprocess.Popen:
+    """Run the fake OpenAI server in its own process so it doesn't share our GIL."""
+    port = free_port()
+    process = start_process(
+        [
+            "tests.fake_openai", "--port", str(port), "--dimensions", str(dimensions),
+            "--chat-latency", str(chat_latency), "--embedding-latency", str(embedding_latency)
+        ],
+        f"http://127.0.0.1:{port}/"
+    )
+    process.base_url = f"http://127.0.0.1:{port}/v1/"
+    return process
+
+def start_app_process(port: int, workers: int = 1) -> subprocess.Popen:
+    """Run the app under uvicorn in a subprocess and wait for /health."""
+    return start_process(
+        [
+            "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning"
+        ],
+        f"http://127.0.0.1:{port}/health"
+    )
+
+def stop_process(process: subprocess.Popen) -> None:
+    """Terminate a benchmark subprocess."""
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (pct in 0-100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+def summarize_latencies(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    """p50/p99 latency in milliseconds and throughput for a run."""
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0
+    }
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def write_results(path: Optional[str], results: Dict) -> None:
+    """Print results and optionally write them as JSON for later comparison."""
+    text = json.dumps(results, indent=2)
+    print(text)
+    if path:
+        with open(path, "w") as f:
+            f.write(text + "\n")
@@ -3,6 +3,9 @@
 FastAPI RAG System Startup Script
 """
 
+import glob
+import tempfile
+import uuid
 import uvicorn
 import os
 from dotenv import load_dotenv
@@ -10,21 +13,50 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+def run_workers(host: str, port: int, workers: int) -> None:
+    """Run several uvicorn workers that share one store server process.
+    
+    The store server owns the vector store and lexical index (the configured
+    VECTOR_STORE_BACKEND); the workers reach it with the "remote" backend.
+    """
+    from app.db.init_db import init_database
+    from app.services.store_server import start_store_server_process
+    
+    # Create the tables once, before the workers start
+    init_database()
+    store_server = start_store_server_process()
+    group_id = uuid.uuid4().hex
+    os.environ["VECTOR_STORE_BACKEND"] = "remote"
+    os.environ["WORKER_GROUP_ID"] = group_id
+    try:
+        uvicorn.run("app.main:app", host=host, port=port, workers=workers, log_level="info")
+    finally:
+        store_server.terminate()
+        store_server.wait()
+        for marker in glob.glob(os.path.join(tempfile.gettempdir(), f"twerlo-{group_id}-*")):
+            os.remove(marker)
+
 if __name__ == "__main__":
     # Get configuration from environment
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", "8000"))
     reload = os.getenv("RELOAD", "true").lower() == "true"
+    workers = int(os.getenv("WORKERS", "1"))
     
     print(f"Starting FastAPI RAG System on {host}:{port}")
     print("API Documentation will be available at:")
     print(f"  - http://{host}:{port}/docs")
     print(f"  - http://{host}:{port}/redoc")
     
-    uvicorn.run(
-        "app.main:app",
-        host=host,
-        port=port,
-        reload=reload,
-        log_level="info"
-    ) 
\ No newline at end of file
+    if workers > 1:
+        # Reloading only works with a single process
+        print(f"Running {workers} workers (reload disabled)")
+        run_workers(host, port, workers)
+    else:
+        uvicorn.run(
+            "app.main:app",
+            host=host,
+            port=port,
+            reload=reload,
+            log_level="info"
+        )
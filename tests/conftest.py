@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+# Databases, stores and uploads live in a per-run directory rather than ./data;
+# set before app is imported, since its engine and stores are built at import
+DATA_DIR = tempfile.mkdtemp(prefix="twerlo-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(DATA_DIR, 'twerlo.db')}",
+    "UPLOAD_DIR": os.path.join(DATA_DIR, "uploads"),
+    "CHROMA_DB_PATH": os.path.join(DATA_DIR, "chroma_db"),
+    "NUMPY_INDEX_PATH": os.path.join(DATA_DIR, "numpy_index"),
+    "LEXICAL_INDEX_PATH": os.path.join(DATA_DIR, "lexical_index.db"),
+    "EMBEDDING_CACHE_PATH": os.path.join(DATA_DIR, "embedding_cache.db"),
+    "STORE_SERVER_ADDRESS": os.path.join(DATA_DIR, "store_server.sock"),
+})
+
+import openai
+import pytest
+from app.core.config import settings
+from tests.fake_openai import FakeOpenAIServer
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    """Create the tables once; TestClient only runs the app's startup inside ``with``."""
+    from app.db.init_db import init_database
+    init_database()
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    """Point the OpenAI clients at a local fake server with caching disabled."""
+    server = FakeOpenAIServer().start()
+    monkeypatch.setattr(openai, "api_key", "test-key")
+    monkeypatch.setattr(openai, "base_url", server.base_url)
+    monkeypatch.setattr(settings, "embedding_retry_base_delay", 0.01)
+    monkeypatch.setattr(settings, "embedding_cache_enabled", False)
+    monkeypatch.setattr(settings, "answer_cache_enabled", False)
+    yield server
+    server.stop()
+
+@pytest.fixture
+def api_client():
+    from fastapi.testclient import TestClient
+    from app.main import app
+    return TestClient(app)
+
+@pytest.fixture
+def auth_headers(api_client):
+    """Register a fresh user and return its bearer token header."""
+    email = f"user_{uuid.uuid4().hex[:8]}@example.com"
+    response = api_client.post("/auth/register", json={"email": email, "password": "testpassword123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def wait_for_job(api_client):
+    """Poll an ingestion job until it is ready or failed."""
+    def wait(job_id, headers, timeout=10.0):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            job = api_client.get(f"/documents/jobs/{job_id}", headers=headers).json()
+            if job["status"] in ("ready", "failed"):
+                return job
+            time.sleep(0.05)
+        raise AssertionError(f"job {job_id} did not finish")
+    return wait
+
+@pytest.fixture
+def upload_text(api_client, wait_for_job):
+    """Upload a text document and wait until it is indexed."""
+    def upload(headers, text, filename="notes.txt"):
+        response = api_client.post(
+            "/documents/upload",
+            files={"file": (filename, text.encode("utf-8"), "text/plain")},
+            headers=headers
+        )
+        assert response.status_code == 200
+        return wait_for_job(response.json()["job_id"], headers)
+    return upload
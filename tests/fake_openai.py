@@ -0,0 +1,175 @@
+# Local stand-in for the OpenAI HTTP API used by tests and benchmarks
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+def fake_embedding(text: str, dimensions: int = 8) -> List[float]:
+    """Deterministic pseudo-embedding derived from the text hash."""
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return [b / 255.0 for b in digest[:dimensions]]
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Load tests open many connections at once; the default backlog of 5 drops them
+    request_queue_size = 1024
+
+class FakeOpenAIServer:
+    """Threaded HTTP server answering /embeddings and /chat/completions.
+
+    ``fail_next`` holds status codes to return (in order) before serving
+    real responses, which lets tests exercise retry behaviour. The latency
+    arguments add a fixed delay to each response to mimic the real API.
+    """
+
+    def __init__(
+        self,
+        dimensions: int = 8,
+        answer: str = "fake answer",
+        chat_latency: float = 0.0,
+        embedding_latency: float = 0.0,
+        port: int = 0
+    ):
+        self.dimensions = dimensions
+        self.answer = answer
+        self.chat_latency = chat_latency
+        self.embedding_latency = embedding_latency
+        self.fail_next: List[int] = []
+        self.requests = {"embeddings": 0, "chat": 0}
+        self.embedding_inputs: List[int] = []
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", port), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1/"
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, code: int, payload: dict) -> None:
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_stream(self, model: str) -> None:
+                # One chunk per word, spreading the configured latency over them
+                words = fake.answer.split(" ")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                for i, word in enumerate(words):
+                    time.sleep(fake.chat_latency / len(words))
+                    chunk = {
+                        "id": "chatcmpl-fake",
+                        "object": "chat.completion.chunk",
+                        "created": 0,
+                        "model": model,
+                        "choices": [{
+                            "index": 0,
+                            "delta": {"content": word if i == 0 else " " + word},
+                            "finish_reason": None
+                        }]
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/stats"):
+                    self._send_json(200, dict(fake.requests))
+                    return
+                self._send_json(200, {"status": "ok"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+
+                with fake._lock:
+                    failure = fake.fail_next.pop(0) if fake.fail_next else None
+                if failure:
+                    self._send_json(failure, {"error": {"message": "injected failure", "type": "server_error"}})
+                    return
+
+                if self.path.endswith("/embeddings"):
+                    inputs = payload["input"]
+                    if isinstance(inputs, str):
+                        inputs = [inputs]
+                    with fake._lock:
+                        fake.requests["embeddings"] += 1
+                        fake.embedding_inputs.append(len(inputs))
+                    time.sleep(fake.embedding_latency)
+                    self._send_json(200, {
+                        "object": "list",
+                        "model": payload.get("model", "fake"),
+                        "data": [
+                            {"object": "embedding", "index": i, "embedding": fake_embedding(text, fake.dimensions)}
+                            for i, text in enumerate(inputs)
+                        ],
+                        "usage": {"prompt_tokens": 0, "total_tokens": 0}
+                    })
+                elif self.path.endswith("/chat/completions"):
+                    with fake._lock:
+                        fake.requests["chat"] += 1
+                    if payload.get("stream"):
+                        self._send_stream(payload.get("model", "fake"))
+                        return
+                    time.sleep(fake.chat_latency)
+                    self._send_json(200, {
+                        "id": "chatcmpl-fake",
+                        "object": "chat.completion",
+                        "created": 0,
+                        "model": payload.get("model", "fake"),
+                        "choices": [{
+                            "index": 0,
+                            "finish_reason": "stop",
+                            "message": {"role": "assistant", "content": fake.answer}
+                        }],
+                        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+                    })
+                else:
+                    self._send_json(404, {"error": {"message": "not found"}})
+
+        return Handler
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the fake OpenAI server standalone.")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--dimensions", type=int, default=8)
+    parser.add_argument("--chat-latency", type=float, default=0.0)
+    parser.add_argument("--embedding-latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(
+        dimensions=args.dimensions,
+        chat_latency=args.chat_latency,
+        embedding_latency=args.embedding_latency,
+        port=args.port
+    )
+    print(f"Fake OpenAI server listening on {server.base_url}", flush=True)
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,75 @@
+import time
+import pytest
+from app.core.config import settings
+from app.services.answer_cache import AnswerCache, normalize_question
+
+@pytest.fixture
+def cache():
+    return AnswerCache(ttl_seconds=60, similarity_threshold=0.95, max_entries_per_user=2)
+
+def test_exact_tier_matches_normalized_question(cache):
+    """Case, whitespace and trailing punctuation don't affect exact matches."""
+    assert normalize_question("  What is  the SLA? ") == "what is the sla"
+    cache.put(1, "What is the SLA?", [1.0, 0.0], ["a"], "99.9%")
+    assert cache.get_exact(1, "what is the sla") == "99.9%"
+    assert cache.get_exact(2, "what is the sla") is None
+
+def test_semantic_tier_requires_similarity_and_same_chunks(cache):
+    """Close embeddings only reuse answers drawn from the same chunks."""
+    cache.put(1, "What is the SLA?", [1.0, 0.0], ["a", "b"], "99.9%")
+    assert cache.get_semantic(1, [0.99, 0.05], ["a", "b"]) == "99.9%"
+    assert cache.get_semantic(1, [0.99, 0.05], ["a", "c"]) is None
+    assert cache.get_semantic(1, [0.5, 0.5], ["a", "b"]) is None
+
+    stats = cache.stats()
+    assert (stats["semantic_hits"], stats["misses"]) == (1, 2)
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+
+def test_entries_expire_and_are_capped(cache):
+    """TTL expiry and per-user LRU eviction."""
+    cache.ttl_seconds = 0.05
+    cache.put(1, "q1", [1.0], [], "a1")
+    time.sleep(0.06)
+    assert cache.get_exact(1, "q1") is None
+
+    cache.ttl_seconds = 60
+    for i in range(3):
+        cache.put(1, f"q{i}", [1.0], [], f"a{i}")
+    assert cache.get_exact(1, "q0") is None
+    assert cache.get_exact(1, "q2") == "a2"
+
+def test_invalidate_user(cache):
+    """Invalidation only affects the given user."""
+    cache.put(1, "q", [1.0], [], "a")
+    cache.put(2, "q", [1.0], [], "b")
+    cache.invalidate_user(1)
+    assert cache.get_exact(1, "q") is None
+    assert cache.get_exact(2, "q") == "b"
+
+def test_answers_retrieved_before_a_document_change_are_not_cached(cache):
+    """An upload landing while the LLM runs makes the answer stale; put() drops it."""
+    generation = cache.generation(1)
+    cache.invalidate_user(1)
+    cache.put(1, "What is the SLA?", [1.0, 0.0], ["a"], "99.9%", generation)
+    assert cache.get_exact(1, "What is the SLA?") is None
+
+    cache.put(1, "What is the SLA?", [1.0, 0.0], ["a"], "99.95%", cache.generation(1))
+    assert cache.get_exact(1, "What is the SLA?") == "99.95%"
+
+def test_repeated_questions_skip_the_llm(api_client, fake_server, auth_headers, upload_text, monkeypatch):
+    """Repeats are served from the cache until the user uploads again."""
+    monkeypatch.setattr(settings, "answer_cache_enabled", True)
+    upload_text(auth_headers, "The warranty period is two years. " * 20)
+
+    for question in ["How long is the warranty?", "how long is the warranty"]:
+        response = api_client.post("/qa/ask", json={"question": question}, headers=auth_headers)
+        assert response.json()["answer"] == fake_server.answer
+    assert fake_server.requests["chat"] == 1
+
+    upload_text(auth_headers, "Returns are accepted within 30 days. " * 20, filename="returns.txt")
+    api_client.post("/qa/ask", json={"question": "How long is the warranty?"}, headers=auth_headers)
+    assert fake_server.requests["chat"] == 2
+
+    stats = api_client.get("/qa/cache/stats", headers=auth_headers).json()
+    assert (stats["exact_hits"], stats["misses"]) == (1, 2)
+    assert "users" not in stats
@@ -14,7 +14,7 @@ def test_health():
     """Test the health check endpoint."""
     response = client.get("/health")
     assert response.status_code == 200
-    assert response.json() == {"status": "healthy"}
+    assert response.json()["status"] == "healthy"
 
 def test_register_user():
     """Test user registration."""
@@ -26,14 +26,26 @@ def test_register_user():
     }
     response = client.post("/auth/register", json=user_data)
     assert response.status_code == 200
-    assert "message" in response.json()
+    assert response.json()["token_type"] == "bearer"
+    assert "access_token" in response.json()
 
 def test_login_user():
     """Test user login."""
     login_data = {
-        "username": "test@example.com",
+        "email": f"test_{uuid.uuid4().hex[:8]}@example.com",
         "password": "testpassword123"
     }
-    response = client.post("/auth/login", data=login_data)
+    client.post("/auth/register", json=login_data)
+    response = client.post("/auth/login", json=login_data)
     assert response.status_code == 200
-    assert "access_token" in response.json() 
\ No newline at end of file
+    assert "access_token" in response.json() 
+
+def test_login_rejects_wrong_password():
+    """Test login with a wrong password."""
+    login_data = {
+        "email": f"test_{uuid.uuid4().hex[:8]}@example.com",
+        "password": "testpassword123"
+    }
+    client.post("/auth/register", json=login_data)
+    response = client.post("/auth/login", json={"email": login_data["email"], "password": "wrong"})
+    assert response.status_code == 401
\ No newline at end of file
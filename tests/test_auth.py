@@ -0,0 +1,123 @@
+import time
+import uuid
+from datetime import datetime
+import pytest
+from sqlalchemy import event
+from app.core.config import settings
+from app.core.passwords import hash_password, hash_rounds, password_hasher, verify_and_update
+from app.core.security import RevocationList, UserCache, decode_token
+from app.db.database import SessionLocal, engine
+from app.db.models import User
+
+@pytest.fixture
+def count_queries():
+    """Count SQL statements sent to the database inside the block."""
+    statements = []
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+def test_stateless_auth_skips_the_user_query(api_client, auth_headers, count_queries, monkeypatch):
+    monkeypatch.setattr(settings, "auth_mode", "stateless")
+    api_client.get("/qa/cache/stats", headers=auth_headers)  # let the revocation list sync
+    count_queries.clear()
+
+    for _ in range(5):
+        assert api_client.get("/qa/cache/stats", headers=auth_headers).status_code == 200
+    assert not [s for s in count_queries if "FROM users" in s]
+
+def test_database_auth_loads_the_user(api_client, auth_headers, count_queries, monkeypatch):
+    monkeypatch.setattr(settings, "auth_mode", "database")
+    assert api_client.get("/qa/cache/stats", headers=auth_headers).status_code == 200
+    assert len([s for s in count_queries if "FROM users" in s]) == 1
+
+@pytest.mark.parametrize("mode", ["stateless", "database"])
+def test_revoke_invalidates_earlier_tokens(api_client, auth_headers, monkeypatch, mode):
+    monkeypatch.setattr(settings, "auth_mode", mode)
+    response = api_client.post("/auth/revoke", headers=auth_headers)
+    assert response.status_code == 200
+    fresh_headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    rejected = api_client.get("/qa/cache/stats", headers=auth_headers)
+    assert rejected.status_code == 401
+    assert rejected.json()["detail"] == "Token has been revoked"
+    assert api_client.get("/qa/cache/stats", headers=fresh_headers).status_code == 200
+
+def test_failed_revoke_is_logged_and_keeps_tokens(api_client, auth_headers, monkeypatch, capsys):
+    from app.api import auth
+
+    def fail(db, user):
+        user.token_version = (user.token_version or 0) + 1
+        db.flush()
+        raise RuntimeError("disk I/O error")
+    monkeypatch.setattr(auth, "revoke_user_tokens", fail)
+    user_id = decode_token(auth_headers["Authorization"].split()[1])["sub"]
+
+    response = api_client.post("/auth/revoke", headers=auth_headers)
+    assert response.status_code == 500
+    assert f"Error revoking tokens of user {user_id}: disk I/O error" in capsys.readouterr().out
+    assert api_client.get("/qa/cache/stats", headers=auth_headers).status_code == 200
+
+def test_revocations_from_other_processes_are_synced(auth_headers):
+    user_id = int(decode_token(auth_headers["Authorization"].split()[1])["sub"])
+    revocations = RevocationList(refresh_seconds=60)
+    db = SessionLocal()
+    try:
+        revocations.refresh(db)
+        assert not revocations.is_revoked(user_id, 0)
+
+        # Another process revokes; this one only sees it on its next sync
+        user = db.query(User).filter(User.id == user_id).first()
+        user.token_version = 1
+        user.tokens_revoked_at = datetime.utcnow()
+        db.commit()
+        revocations.refresh(db)
+        assert not revocations.is_revoked(user_id, 0)
+
+        revocations._next_refresh = 0.0
+        revocations.refresh(db)
+        assert revocations.is_revoked(user_id, 0)
+        assert not revocations.is_revoked(user_id, 1)
+    finally:
+        db.close()
+
+def test_user_cache_expires_and_evicts():
+    cache = UserCache(max_size=2, ttl_seconds=0.05)
+    for user_id in (1, 2, 3):
+        cache.put(User(id=user_id, email=f"{user_id}@example.com"))
+    assert cache.get(1) is None
+    assert cache.get(3).email == "3@example.com"
+    time.sleep(0.06)
+    assert cache.get(3) is None
+
+def test_verify_and_update_rehashes_on_cost_change():
+    hashed = hash_password("secret", 4)
+    assert hash_rounds(hashed) == 4
+    assert verify_and_update("wrong", hashed, 4) == (False, None)
+    assert verify_and_update("secret", hashed, 4) == (True, None)
+    valid, new_hash = verify_and_update("secret", hashed, 5)
+    assert valid and hash_rounds(new_hash) == 5
+
+def test_login_rehashes_when_bcrypt_cost_changes(api_client, monkeypatch):
+    monkeypatch.setattr(settings, "bcrypt_rounds", 4)
+    email = f"rehash_{uuid.uuid4().hex[:8]}@example.com"
+    credentials = {"email": email, "password": "testpassword123"}
+    assert api_client.post("/auth/register", json=credentials).status_code == 200
+
+    monkeypatch.setattr(settings, "bcrypt_rounds", 5)
+    assert api_client.post("/auth/login", json={**credentials, "password": "wrong"}).status_code == 401
+    assert api_client.post("/auth/login", json=credentials).status_code == 200
+    db = SessionLocal()
+    try:
+        assert hash_rounds(db.query(User).filter(User.email == email).one().hashed_password) == 5
+    finally:
+        db.close()
+    assert api_client.post("/auth/login", json=credentials).status_code == 200
+
+def test_full_hashing_queue_returns_429(api_client, monkeypatch):
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+    response = api_client.post("/auth/register", json={"email": "busy@example.com", "password": "testpassword123"})
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "1"
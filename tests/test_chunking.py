@@ -0,0 +1,84 @@
+import pytest
+from hypothesis import given, settings as hypothesis_settings, strategies as st
+from app.core.chunking import (
+    BoundaryChunker,
+    CharacterChunker,
+    PARAGRAPH_BOUNDARY,
+    RegexTokenizer,
+    SENTENCE_BOUNDARY,
+    get_chunker,
+    register_chunker,
+)
+
+tokenizer = RegexTokenizer()
+
+words = st.sampled_from(["the", "model", "Chunk", "tokens", "42", "x" * 30, "naïve", "(see", "note)", "e.g."])
+separators = st.sampled_from([" ", " ", " ", ". ", "! ", "? ", ".\" ", "\n", "\n\n", "  \n \n  ", "...", ", "])
+documents = st.lists(st.tuples(words, separators), max_size=300).map(
+    lambda pairs: "".join(word + sep for word, sep in pairs)
+)
+
+def make_chunkers():
+    return [
+        BoundaryChunker(24, 6, SENTENCE_BOUNDARY, tokenizer=tokenizer),
+        BoundaryChunker(40, 8, PARAGRAPH_BOUNDARY, fallback=SENTENCE_BOUNDARY, tokenizer=tokenizer),
+        BoundaryChunker(5, 0, SENTENCE_BOUNDARY, tokenizer=tokenizer),
+    ]
+
+def split_at(text, cuts):
+    bounds = [0] + sorted(cut % (len(text) + 1) for cut in cuts) + [len(text)]
+    return [text[a:b] for a, b in zip(bounds, bounds[1:])]
+
+@hypothesis_settings(max_examples=200, deadline=None)
+@given(documents)
+def test_chunks_are_offsets_into_source_within_budget(text):
+    """Chunk text matches its offsets, fits the token budget and covers the source in order."""
+    for chunker in make_chunkers():
+        chunks = chunker.chunk_text(text)
+        covered = set()
+        for chunk in chunks:
+            assert chunk.text and chunk.text == text[chunk.start:chunk.end]
+            assert chunk.token_count == tokenizer.count(chunk.text) <= chunker.max_tokens
+            covered.update(range(chunk.start, chunk.end))
+        assert all(i in covered for i, char in enumerate(text) if not char.isspace())
+        assert all(a.start < b.start and a.end < b.end for a, b in zip(chunks, chunks[1:]))
+
+@hypothesis_settings(max_examples=200, deadline=None)
+@given(documents, st.lists(st.integers(min_value=0), max_size=8))
+def test_streaming_matches_single_pass(text, cuts):
+    """How the stream is split into pieces doesn't change the chunks."""
+    for chunker in make_chunkers() + [CharacterChunker(60, 15, tokenizer=tokenizer)]:
+        assert list(chunker.iter_chunks(split_at(text, cuts))) == chunker.chunk_text(text)
+
+def test_character_chunker_keeps_legacy_output():
+    """The "characters" strategy reproduces the original windows on ordinary text."""
+    text = " ".join(f"Sentence number {i} is here." for i in range(200))
+    chunks = CharacterChunker(500, 50, tokenizer=tokenizer).chunk_text(text)
+    assert all(len(chunk.text) <= 500 for chunk in chunks)
+    assert chunks[0].text.endswith(".")
+    assert chunks[1].start < chunks[0].end  # overlapping windows
+
+def test_character_chunker_does_not_stall_when_overlap_reaches_sentence_break():
+    """A '.' just after the chunk start used to move the window backwards forever."""
+    text = "a." + "b" * 2000
+    chunks = CharacterChunker(chunk_size=200, chunk_overlap=150, tokenizer=tokenizer).chunk_text(text)
+    assert chunks[-1].end == len(text)
+    assert all(a.start < b.start for a, b in zip(chunks, chunks[1:]))
+
+def test_oversized_sentences_are_split_at_token_boundaries():
+    """A run without boundaries is still cut to the budget."""
+    text = "word " * 1000
+    chunks = BoundaryChunker(50, 0, tokenizer=tokenizer).chunk_text(text)
+    assert all(chunk.token_count <= 50 for chunk in chunks)
+    assert "".join(chunk.text + " " for chunk in chunks) == text
+
+def test_strategy_registry(monkeypatch):
+    """Strategies are selected by name and new ones can be registered."""
+    from app.core import chunking
+    monkeypatch.setattr(chunking, "CHUNKERS", dict(chunking.CHUNKERS))
+    assert isinstance(get_chunker("characters"), CharacterChunker)
+    assert isinstance(get_chunker("paragraphs"), BoundaryChunker)
+    register_chunker("tiny", lambda: BoundaryChunker(4, 0, tokenizer=tokenizer))
+    assert get_chunker("tiny").max_tokens == 4
+    with pytest.raises(ValueError, match="Unknown chunk strategy"):
+        get_chunker("nope")
@@ -0,0 +1,60 @@
+from app.core.chunking import BoundaryChunker, RegexTokenizer
+from app.services.context_builder import build_context, merge_adjacent_chunks, text_after_overlap
+from app.services.vector_store import SearchResult
+
+TOKENIZER = RegexTokenizer()
+DOCUMENT = " ".join(f"Sentence number {i} explains step {i} of the procedure." for i in range(40))
+
+def chunk_results(document_id=1, text=DOCUMENT, offsets=True):
+    """Search results for every chunk of ``text``, with one sentence of overlap."""
+    chunker = BoundaryChunker(max_tokens=40, overlap_tokens=12, tokenizer=TOKENIZER)
+    results = []
+    for i, chunk in enumerate(chunker.chunk_text(text)):
+        metadata = {"document_id": document_id, "chunk_index": i}
+        if offsets:
+            metadata.update(start_char=chunk.start, end_char=chunk.end)
+        results.append(SearchResult(id=f"{document_id}_{i}", text=chunk.text, metadata=metadata, distance=0.1))
+    return results
+
+def test_adjacent_chunks_merge_without_repeating_overlap():
+    chunks = chunk_results()
+    assert chunks[1].metadata["start_char"] < chunks[0].metadata["end_char"]  # they do overlap
+
+    passages = merge_adjacent_chunks([chunks[2], chunks[1], chunks[0]], TOKENIZER)
+    assert len(passages) == 1
+    assert passages[0].chunk_ids == ["1_0", "1_1", "1_2"]
+    assert passages[0].text == DOCUMENT[:chunks[2].metadata["end_char"]]
+    assert passages[0].rank == 0
+
+def test_merging_falls_back_to_text_overlap_without_offsets():
+    chunks = chunk_results(offsets=False)
+    passages = merge_adjacent_chunks([chunks[4], chunks[3]], TOKENIZER)
+    assert len(passages) == 1
+    start = DOCUMENT.index(chunks[3].text)
+    assert passages[0].text == DOCUMENT[start:start + len(passages[0].text)]
+    assert text_after_overlap("no shared text here", "completely different start") == " completely different start"
+
+def test_separate_documents_and_gaps_stay_apart():
+    first, second = chunk_results(1), chunk_results(2)
+    passages = merge_adjacent_chunks([first[5], second[0], first[0], first[1]], TOKENIZER)
+    assert [p.chunk_ids for p in passages] == [["1_5"], ["2_0"], ["1_0", "1_1"]]
+
+def test_context_fits_budget_and_keeps_best_passages():
+    chunks = chunk_results()
+    results = [chunks[7], chunks[0], chunks[8], chunks[3]]
+    context = build_context(results, max_tokens=80, tokenizer=TOKENIZER)
+    assert context.token_count <= 80
+    assert context.chunk_ids[:2] == ["1_7", "1_8"]
+    assert TOKENIZER.count(context.text) <= context.token_count + len(context.passages)
+
+    tight = build_context(results, max_tokens=45, tokenizer=TOKENIZER)
+    assert tight.chunk_ids == ["1_7"]  # the 7-8 passage is too long, so its best chunk is used
+    assert build_context(results, max_tokens=5, tokenizer=TOKENIZER).passages == []
+
+def test_context_uses_fewer_tokens_than_joining_chunks():
+    chunks = chunk_results()
+    results = chunks[:6]
+    joined = "\n\n".join(result.text for result in results)
+    context = build_context(results, max_tokens=10_000, tokenizer=TOKENIZER)
+    assert context.text == DOCUMENT[:chunks[5].metadata["end_char"]]
+    assert context.token_count < TOKENIZER.count(joined)
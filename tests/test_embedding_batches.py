@@ -0,0 +1,48 @@
+import pytest
+from app.core import llm_utils
+from tests.fake_openai import fake_embedding
+
+def test_batches_respect_size_and_token_limits():
+    """Batches are bounded by input count and estimated tokens."""
+    texts = ["x" * 400] * 10  # ~101 estimated tokens each
+    assert [len(b) for b in llm_utils.make_embedding_batches(texts, batch_size=4, max_tokens=10_000)] == [4, 4, 2]
+    assert [len(b) for b in llm_utils.make_embedding_batches(texts, batch_size=100, max_tokens=250)] == [2, 2, 2, 2, 2]
+
+def test_round_trips_drop_to_n_over_batch_size(fake_server):
+    """N chunks cost ceil(N / batch_size) requests instead of N."""
+    chunks = [f"chunk number {i}" for i in range(40)]
+
+    for chunk in chunks:
+        llm_utils.generate_embeddings(chunk)
+    assert fake_server.requests["embeddings"] == 40
+
+    fake_server.requests["embeddings"] = 0
+    embeddings = llm_utils.generate_embeddings_batch(chunks, batch_size=8, max_concurrency=3)
+    assert fake_server.requests["embeddings"] == 5
+    assert embeddings == [fake_embedding(chunk) for chunk in chunks]
+
+def test_retries_on_rate_limit_and_server_errors(fake_server):
+    """429 and 5xx responses are retried and results keep their order."""
+    fake_server.fail_next = [429, 503]
+    chunks = [f"retry chunk {i}" for i in range(6)]
+
+    embeddings = llm_utils.generate_embeddings_batch(chunks, batch_size=2, max_concurrency=1)
+    assert fake_server.requests["embeddings"] == 3
+    assert embeddings == [fake_embedding(chunk) for chunk in chunks]
+
+def test_client_errors_are_not_retried(fake_server):
+    """Non-retryable statuses fail immediately."""
+    fake_server.fail_next = [400]
+    with pytest.raises(Exception, match="Error generating embeddings"):
+        llm_utils.generate_embeddings_batch(["a", "b"], batch_size=2)
+    assert fake_server.requests["embeddings"] == 0
+
+def test_embeddings_are_shortened_to_configured_dimensions(fake_server, monkeypatch):
+    """Truncated embeddings keep their leading values and unit length."""
+    monkeypatch.setattr(llm_utils.settings, "embedding_dimensions", 4)
+    full = fake_embedding("shorten me")
+    norm = sum(x * x for x in full[:4]) ** 0.5
+
+    for embedding in (llm_utils.generate_embeddings("shorten me"), llm_utils.generate_embeddings_batch(["shorten me"])[0]):
+        assert embedding == pytest.approx([x / norm for x in full[:4]])
+    assert llm_utils.shorten_embedding(full, dimensions=0) == full
@@ -0,0 +1,69 @@
+import pytest
+from app.core import llm_utils
+from app.core.config import settings
+from app.services.embedding_cache import EmbeddingCache, cache_key
+from tests.fake_openai import fake_embedding
+
+@pytest.fixture
+def cache(tmp_path):
+    return EmbeddingCache(str(tmp_path / "cache.db"), max_entries=3, memory_entries=2)
+
+def test_key_ignores_whitespace_but_not_model():
+    """Normalized text shares a key; a different model does not."""
+    assert cache_key("m", "Hello   world\n") == cache_key("m", " Hello world")
+    assert cache_key("m", "Hello world") != cache_key("other", "Hello world")
+
+def test_hits_misses_and_lru_tiers(cache):
+    """Lookups fall through memory to SQLite and are counted."""
+    cache.put_many({"a": [1.0, 2.0], "b": [3.0], "c": [4.0]})
+    assert cache.get("a") == [1.0, 2.0]  # evicted from memory, served from disk
+    assert cache.get("a") == [1.0, 2.0]  # now in memory
+    assert cache.get("missing") is None
+
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["memory_entries"] == 2
+
+def test_size_cap_evicts_least_recently_used(cache):
+    """Rows beyond max_entries are evicted oldest-first."""
+    cache.put_many({"a": [1.0]})
+    cache.put_many({"b": [2.0]})
+    cache.put_many({"c": [3.0]})
+    cache._memory.clear()
+    cache.get("a")  # refresh recency of "a"
+    cache.put_many({"d": [4.0]})
+    cache._memory.clear()
+
+    assert cache.get("b") is None
+    assert cache.get("a") == [1.0]
+    assert cache.stats()["evictions"] == 1
+
+def test_batch_embedding_skips_cached_chunks(tmp_path, monkeypatch, fake_server):
+    """Re-embedding identical chunks is served from the cache."""
+    monkeypatch.setattr(settings, "embedding_cache_enabled", True)
+    monkeypatch.setattr(llm_utils, "embedding_cache", EmbeddingCache(str(tmp_path / "c.db"), 100, 100))
+
+    chunks = ["same text", "other text", "same   text"]
+    first = llm_utils.generate_embeddings_batch(chunks)
+    assert fake_server.embedding_inputs == [2]
+
+    second = llm_utils.generate_embeddings_batch(chunks + ["new text"])
+    assert fake_server.embedding_inputs == [2, 1]
+    assert second[0] == pytest.approx(first[0]) and second[2] == second[0]
+    assert llm_utils.generate_embeddings("other text") == pytest.approx(first[1])
+    assert fake_server.requests["embeddings"] == 2
+    assert first[0] == pytest.approx(fake_embedding("same text"))
+
+def test_disk_hits_defer_recency_writes(cache):
+    """Lookups don't write; their recency is stored with the next put."""
+    import sqlite3
+    cache.put_many({"a": [1.0]})
+    cache._memory.clear()
+    used = "SELECT last_used FROM embeddings WHERE key = 'a'"
+    before = sqlite3.connect(cache.path).execute(used).fetchone()[0]
+    assert cache.get("a") == [1.0]
+    assert sqlite3.connect(cache.path).execute(used).fetchone()[0] == before
+
+    cache.put_many({"b": [2.0]})
+    assert sqlite3.connect(cache.path).execute(used).fetchone()[0] > before
+    assert cache._count == 2
@@ -0,0 +1,272 @@
+import uuid
+
+def test_upload_returns_job_and_processes_in_background(api_client, fake_server, auth_headers, wait_for_job):
+    """Upload returns immediately; the job reports progress until the document is ready."""
+    text = "This is a sentence about ingestion. " * 100
+    response = api_client.post(
+        "/documents/upload",
+        files={"file": ("notes.txt", text.encode("utf-8"), "text/plain")},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "queued"
+
+    job = wait_for_job(body["job_id"], auth_headers)
+    assert job["status"] == "ready"
+    assert job["progress"] == 100.0
+    assert job["chunks_count"] > 1
+    assert fake_server.requests["embeddings"] >= 1
+
+    documents = api_client.get("/documents/", headers=auth_headers).json()
+    assert [(d["id"], d["status"]) for d in documents] == [(body["document_id"], "ready")]
+
+def test_failed_job_is_reported(api_client, fake_server, auth_headers, wait_for_job):
+    """Parse failures mark the job and document as failed."""
+    response = api_client.post(
+        "/documents/upload",
+        files={"file": ("broken.pdf", b"not a pdf", "application/pdf")},
+        headers=auth_headers
+    )
+    job = wait_for_job(response.json()["job_id"], auth_headers)
+    assert job["status"] == "failed"
+    assert "PDF" in job["error"]
+
+def test_unknown_job_is_not_found(api_client, fake_server, auth_headers):
+    """Job ids that don't belong to the user return 404."""
+    response = api_client.get(f"/documents/jobs/{uuid.uuid4().hex}", headers=auth_headers)
+    assert response.status_code == 404
+
+def test_reupload_only_embeds_changed_chunks(api_client, fake_server, auth_headers, upload_text):
+    """Chunk ids are content hashes, so a lightly edited file re-embeds only what changed."""
+    sentences = [f"Step {i} covers" + " maintenance detail" * (i * 7 % 11) + "." for i in range(120)]
+    first = upload_text(auth_headers, " ".join(sentences), filename="manual.txt")
+    assert first["chunks_embedded"] == first["chunks_count"]
+
+    sentences[60] = "Step 60 was rewritten to describe a completely different procedure."
+    second = upload_text(auth_headers, " ".join(sentences), filename="manual.txt")
+    assert second["document_id"] == first["document_id"]
+    assert 0 < second["chunks_embedded"] <= 3
+    assert second["chunks_removed"] == second["chunks_embedded"]
+
+    documents = api_client.get("/documents/", headers=auth_headers).json()
+    assert [d["id"] for d in documents] == [first["document_id"]]
+
+    unchanged = api_client.post(
+        "/documents/upload",
+        files={"file": ("manual.txt", " ".join(sentences).encode("utf-8"), "text/plain")},
+        headers=auth_headers
+    ).json()
+    assert unchanged["message"] == "Document unchanged"
+    assert unchanged["job_id"] == second["job_id"]
+
+def test_concurrent_uploads_of_one_file_name_create_one_document(api_client, fake_server, auth_headers, monkeypatch):
+    """The upload that loses the race to insert the document row gets a 409."""
+    from app.api import documents
+    from app.db.database import SessionLocal
+    from app.db.models import Document
+    from app.core.security import verify_token
+    user_id = int(verify_token(auth_headers["Authorization"].split()[1]))
+    save_document = documents.save_document
+
+    def save_after_competing_upload(db, document):
+        with SessionLocal() as other:
+            other.add(Document(
+                filename="other.txt", original_filename=document.original_filename, file_size=1,
+                file_type="txt", user_id=user_id, status="queued"
+            ))
+            other.commit()
+        save_document(db, document)
+    monkeypatch.setattr(documents, "save_document", save_after_competing_upload)
+
+    response = api_client.post(
+        "/documents/upload",
+        files={"file": ("race.txt", b"Some notes about pumps.", "text/plain")},
+        headers=auth_headers
+    )
+    assert response.status_code == 409
+    with SessionLocal() as db:
+        assert db.query(Document).filter(Document.user_id == user_id, Document.original_filename == "race.txt").count() == 1
+
+def test_delete_document_removes_its_chunks(api_client, fake_server, auth_headers, upload_text):
+    """Deleting a document drops its vectors, lexical entries and row."""
+    from app.db.database import SessionLocal
+    from app.db.models import Document
+    from app.services.ingestion import lexical_index, vector_store
+    job = upload_text(auth_headers, "The pump code is ERR-4012. " * 50, filename="pump.txt")
+    db = SessionLocal()
+    user_id = db.query(Document).get(job["document_id"]).user_id
+    db.close()
+    assert lexical_index.search(user_id, "ERR-4012", 5)
+
+    response = api_client.delete(f"/documents/{job['document_id']}", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["chunks_removed"] == job["chunks_count"]
+    assert vector_store.get_document_chunks(user_id, job["document_id"]) == {}
+    assert lexical_index.search(user_id, "ERR-4012", 5) == []
+    assert api_client.get("/documents/", headers=auth_headers).json() == []
+    assert api_client.delete(f"/documents/{job['document_id']}", headers=auth_headers).status_code == 404
+
+def test_bulk_upload_accepts_files_and_archives(api_client, fake_server, auth_headers):
+    """Files and zip/tar entries are ingested as one batch with shared embedding calls."""
+    import io
+    import tarfile
+    import time
+    import zipfile
+
+    def text(i):
+        return f"Document {i} describes procedure {i}. " * 20
+
+    zipped = io.BytesIO()
+    with zipfile.ZipFile(zipped, "w") as archive:
+        archive.writestr("manuals/a.txt", text(1))
+        archive.writestr("manuals/b.txt", text(2))
+        archive.writestr("manuals/image.png", b"\x89PNG")
+    tarred = io.BytesIO()
+    with tarfile.open(fileobj=tarred, mode="w:gz") as archive:
+        data = text(3).encode("utf-8")
+        info = tarfile.TarInfo("c.txt")
+        info.size = len(data)
+        archive.addfile(info, io.BytesIO(data))
+
+    response = api_client.post(
+        "/documents/upload/bulk",
+        files=[
+            ("files", ("single.txt", text(0).encode("utf-8"), "text/plain")),
+            ("files", ("manuals.zip", zipped.getvalue(), "application/zip")),
+            ("files", ("more.tar.gz", tarred.getvalue(), "application/gzip")),
+        ],
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["queued"], body["skipped"]) == (4, 1)
+    assert {f["filename"]: f["status"] for f in body["files"]} == {
+        "single.txt": "queued", "manuals/a.txt": "queued", "manuals/b.txt": "queued",
+        "manuals/image.png": "skipped", "c.txt": "queued"
+    }
+
+    deadline = time.time() + 10
+    while True:
+        batch = api_client.get(f"/documents/bulk/{body['batch_id']}", headers=auth_headers).json()
+        if batch["status"] == "done" or time.time() > deadline:
+            break
+        time.sleep(0.05)
+    assert batch["files_ready"] == 4
+    assert batch["chunks_count"] == sum(f["chunks_count"] for f in batch["files"]) > 0
+    assert batch["chunks_per_second"] > 0
+    assert fake_server.requests["embeddings"] == 1  # chunks of all files share one request
+
+    documents = api_client.get("/documents/", headers=auth_headers).json()
+    assert sorted(d["filename"] for d in documents) == ["c.txt", "manuals/a.txt", "manuals/b.txt", "single.txt"]
+    assert {d["status"] for d in documents} == {"ready"}
+
+    again = api_client.post(
+        "/documents/upload/bulk",
+        files=[("files", ("manuals.zip", zipped.getvalue(), "application/zip"))],
+        headers=auth_headers
+    ).json()
+    assert (again["batch_id"], again["unchanged"]) == (None, 2)
+
+def test_bulk_and_job_status_on_other_workers(api_client, fake_server, auth_headers, monkeypatch):
+    """A worker that didn't accept the upload answers from the document rows."""
+    import time
+    from app.services.ingestion import ingestion_queue
+
+    body = api_client.post(
+        "/documents/upload/bulk",
+        files=[
+            ("files", ("one.txt", b"First document about pumps. " * 20, "text/plain")),
+            ("files", ("two.txt", b"Second document about valves. " * 20, "text/plain")),
+        ],
+        headers=auth_headers
+    ).json()
+    deadline = time.time() + 10
+    while api_client.get(f"/documents/bulk/{body['batch_id']}", headers=auth_headers).json()["status"] != "done":
+        assert time.time() < deadline
+        time.sleep(0.05)
+    accepted = api_client.get(f"/documents/bulk/{body['batch_id']}", headers=auth_headers).json()
+
+    monkeypatch.setattr(ingestion_queue, "get_bulk", lambda batch_id: None)
+    monkeypatch.setattr(ingestion_queue, "get", lambda job_id: None)
+    batch = api_client.get(f"/documents/bulk/{body['batch_id']}", headers=auth_headers).json()
+    assert (batch["status"], batch["files_total"], batch["files_ready"]) == ("done", 2, 2)
+    assert batch["chunks_count"] == accepted["chunks_count"] > 0
+    job = api_client.get(f"/documents/jobs/{body['files'][0]['job_id']}", headers=auth_headers).json()
+    assert (job["status"], job["progress"]) == ("ready", 100.0)
+    assert api_client.get("/documents/bulk/unknown", headers=auth_headers).status_code == 404
+
+def test_bulk_upload_rejects_bad_archives_and_caps_skipped_files(api_client, auth_headers, monkeypatch):
+    """Unreadable archives are a 400, server faults a 500; skipped files are counted but listed up to a cap."""
+    import io
+    import zipfile
+    from app.core.config import settings
+    from app.services import bulk_upload
+
+    broken = api_client.post(
+        "/documents/upload/bulk",
+        files=[("files", ("broken.zip", b"not a zip", "application/zip"))],
+        headers=auth_headers
+    )
+    assert broken.status_code == 400
+
+    monkeypatch.setattr(settings, "bulk_max_skipped_listed", 3)
+    zipped = io.BytesIO()
+    with zipfile.ZipFile(zipped, "w") as archive:
+        for i in range(10):
+            archive.writestr(f"image{i}.png", b"\x89PNG")
+    body = api_client.post(
+        "/documents/upload/bulk",
+        files=[("files", ("images.zip", zipped.getvalue(), "application/zip"))],
+        headers=auth_headers
+    ).json()
+    assert (body["queued"], body["skipped"], len(body["files"])) == (0, 10, 3)
+
+    def disk_full(*args):
+        raise OSError("No space left on device")
+    monkeypatch.setattr(bulk_upload, "save_stream", disk_full)
+    failed = api_client.post(
+        "/documents/upload/bulk",
+        files=[("files", ("notes.txt", b"Some notes", "text/plain"))],
+        headers=auth_headers
+    )
+    assert failed.status_code == 500
+
+def test_document_is_embedded_and_indexed_in_bounded_batches(api_client, fake_server, auth_headers, upload_text, monkeypatch):
+    """Chunks are written as they are read; a failure part-way removes what was added."""
+    from app.core.config import settings
+    from app.services import ingestion
+    monkeypatch.setattr(settings, "ingestion_batch_chunks", 4)
+    sentences = " ".join(f"Section {i} lists the torque for bolt {i}." * 6 for i in range(40))
+    job = upload_text(auth_headers, sentences, filename="torque.txt")
+    assert job["status"] == "ready" and job["chunks_count"] > 8
+    assert fake_server.requests["embeddings"] >= job["chunks_count"] // 4
+
+    def failing_text(path, file_type, on_read=None):
+        yield sentences
+        raise Exception("Disk read failed")
+    monkeypatch.setattr(ingestion, "iter_document_text", failing_text)
+    failed = upload_text(auth_headers, sentences, filename="broken.txt")
+    assert (failed["status"], failed["error"]) == ("failed", "Disk read failed")
+    db = ingestion.SessionLocal()
+    user_id = db.query(ingestion.Document).filter(ingestion.Document.id == failed["document_id"]).one().user_id
+    db.close()
+    assert ingestion.vector_store.get_document_chunks(user_id, failed["document_id"]) == {}
+    assert len(ingestion.vector_store.get_document_chunks(user_id, job["document_id"])) == job["chunks_count"]
+
+def test_finished_jobs_are_evicted_after_ttl_or_cap():
+    """Finished jobs leave memory; running ones stay."""
+    from app.services.ingestion import BulkJob, IngestionJob, IngestionQueue
+    queue = IngestionQueue(max_workers=1, finished_ttl_seconds=60, max_finished=2)
+    jobs = [IngestionJob(f"job{i}", i, 1, "path", "notes.txt", "txt") for i in range(4)]
+    for job in jobs:
+        queue._jobs[job.job_id] = job
+    queue._retire(jobs[:3])
+    assert [job.job_id for job in jobs if queue.get(job.job_id)] == ["job1", "job2", "job3"]
+
+    bulk = BulkJob("batch", 1, [], 0)
+    queue._bulk_jobs[bulk.batch_id] = bulk
+    queue.finished_ttl_seconds = 0
+    queue._retire([], bulk)
+    assert queue.get_bulk("batch") is None
+    assert [job.job_id for job in jobs if queue.get(job.job_id)] == ["job3"]
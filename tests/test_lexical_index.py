@@ -0,0 +1,106 @@
+import threading
+import time
+from app.db.rebuild_lexical_index import rebuild_lexical_index
+from app.services import retrieval
+from app.services.lexical_index import LexicalIndex, tokenize
+from app.services.retrieval import hybrid_search, reciprocal_rank_fusion
+from app.services.vector_store import SearchResult, VectorStore
+from tests.fake_openai import fake_embedding
+
+CHUNKS = {
+    "c1": "Replace the filter cartridge every six months.",
+    "c2": "Error ERR-4012 means the pump is blocked; see clause 7.3.1.",
+    "c3": "Part number A113/B fits all models made after 2019.",
+    "c4": "The warranty does not cover pump damage from blockages.",
+}
+
+def make_index(tmp_path, user_id=1):
+    index = LexicalIndex(str(tmp_path / "lexical.db"), memory_users=4)
+    index.add(list(CHUNKS), list(CHUNKS.values()), [{"user_id": user_id, "chunk_index": i} for i in range(len(CHUNKS))])
+    return index
+
+def test_tokenize_keeps_identifiers_and_their_parts():
+    assert tokenize("See ERR-4012 in clause 7.3.1") == ["see", "err-4012", "err", "4012", "in", "clause", "7.3.1", "7", "3", "1"]
+
+def test_exact_identifiers_rank_first(tmp_path):
+    index = make_index(tmp_path)
+    assert index.search(1, "what does ERR-4012 mean?", 2)[0].id == "c2"
+    assert index.search(1, "a113/b", 2)[0].id == "c3"
+    assert index.search(1, "clause 7.3.1", 1)[0].text == CHUNKS["c2"]
+    assert index.search(2, "ERR-4012", 2) == []
+
+def test_index_persists_and_updates_incrementally(tmp_path):
+    index = make_index(tmp_path)
+    assert index.search(1, "pump", 5)  # loads user 1 into memory
+    index.add(["c5"], ["Pump model XR-9 is discontinued."], [{"user_id": 1}])
+    assert index.search(1, "XR-9", 1)[0].id == "c5"
+
+    reopened = LexicalIndex(str(tmp_path / "lexical.db"), memory_users=4)
+    assert reopened.search(1, "XR-9", 1)[0].id == "c5"
+    assert reopened.count(1) == 5
+
+def test_users_are_searched_without_waiting_for_each_other(tmp_path):
+    index = make_index(tmp_path, user_id=1)
+    index.add(["d1"], ["Pump model XR-9 is discontinued."], [{"user_id": 2}])
+    busy = index._user_entry(1)
+    with busy.lock:  # user 1 is being loaded or scored
+        results = []
+        searcher = threading.Thread(target=lambda: results.append(index.search(2, "XR-9", 1)))
+        searcher.start()
+        searcher.join(timeout=2)
+        assert [result.id for result in results[0]] == ["d1"]
+
+def test_chunks_without_terms_do_not_break_scoring(tmp_path):
+    index = LexicalIndex(str(tmp_path / "lexical.db"), memory_users=4)
+    index.add(["e1", "e2"], ["---", "..."], [{"user_id": 1}] * 2)
+    assert index.search(1, "pump", 5) == []
+    index.add(["e3"], ["Pump"], [{"user_id": 1}])
+    assert index.search(1, "pump", 5)[0].id == "e3"
+
+def test_typical_lookups_are_sub_millisecond(tmp_path):
+    index = LexicalIndex(str(tmp_path / "lexical.db"), memory_users=4)
+    texts = [f"Section {i} describes component C-{i} and its maintenance schedule." for i in range(5000)]
+    index.add([str(i) for i in range(len(texts))], texts, [{"user_id": 1}] * len(texts))
+    index.search(1, "warm up", 5)
+
+    start = time.perf_counter()
+    for i in range(200):
+        assert index.search(1, f"component C-{i * 7}", 5)[0].id == str(i * 7)
+    assert (time.perf_counter() - start) / 200 < 0.001
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    def results(*ids, distance=0.5):
+        return [SearchResult(id=id_, text=id_, metadata={}, distance=distance) for id_ in ids]
+    fused = reciprocal_rank_fusion([results("a", "b", "c"), results("c", "d", distance=None)], k=60)
+    assert [r.id for r in fused] == ["c", "a", "b", "d"]
+    assert fused[0].distance == 0.5  # the vector hit's distance is kept
+    assert fused[0].score == 1 / 63 + 1 / 61
+
+def test_hybrid_search_surfaces_identifier_missed_by_vectors(tmp_path, monkeypatch):
+    """A chunk the vector search ranks last still reaches the top k through BM25."""
+    store = VectorStore(path=str(tmp_path / "vectors"), partitioning="per_user", backend="numpy")
+    metadatas = [{"user_id": 1, "chunk_index": i} for i in range(len(CHUNKS))]
+    store.add_documents(list(CHUNKS.values()), [fake_embedding(text) for text in CHUNKS.values()], metadatas, list(CHUNKS))
+    index = make_index(tmp_path)
+    monkeypatch.setattr(retrieval, "vector_store", store)
+    monkeypatch.setattr(retrieval, "lexical_index", index)
+
+    question = "What does ERR-4012 mean?"
+    query = fake_embedding(CHUNKS["c1"])  # vector search favours an unrelated chunk
+    monkeypatch.setattr(retrieval.settings, "hybrid_search_enabled", False)
+    assert "c2" not in [r.id for r in hybrid_search(question, query, 1, 1)]
+    monkeypatch.setattr(retrieval.settings, "hybrid_search_enabled", True)
+    assert "c2" in [r.id for r in hybrid_search(question, query, 2, 1)]
+
+def test_rebuild_from_vector_store(tmp_path):
+    store = VectorStore(path=str(tmp_path / "vectors"), partitioning="per_user", backend="numpy")
+    for user_id in (1, 2):
+        store.add_documents(
+            list(CHUNKS.values()),
+            [fake_embedding(text) for text in CHUNKS.values()],
+            [{"user_id": user_id}] * len(CHUNKS),
+            [f"{user_id}_{id_}" for id_ in CHUNKS]
+        )
+    index = LexicalIndex(str(tmp_path / "rebuilt.db"), memory_users=4)
+    assert rebuild_lexical_index(store, index) == {"indexed": 8, "skipped": 0}
+    assert index.search(2, "ERR-4012", 1)[0].id == "2_c2"
@@ -0,0 +1,65 @@
+import uuid
+from app.core.metrics import Histogram, StageTimer
+from app.db.database import SessionLocal
+from app.db.models import QueryLog
+from app.services.query_logger import query_logger
+from app.db.stage_report import format_report, stage_percentiles
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_seconds", "Test histogram.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, stage="llm")
+    histogram.observe(0.01, stage="auth")
+
+    text = histogram.render()
+    assert "# TYPE test_seconds histogram" in text
+    assert 'test_seconds_bucket{stage="llm",le="0.1"} 2' in text
+    assert 'test_seconds_bucket{stage="llm",le="1.0"} 3' in text
+    assert 'test_seconds_bucket{stage="llm",le="+Inf"} 4' in text
+    assert 'test_seconds_count{stage="llm"} 4' in text
+    assert 'test_seconds_sum{stage="llm"} 2.65' in text
+    assert 'test_seconds_count{stage="auth"} 1' in text
+
+def test_stage_timer_accumulates_and_times_iterators():
+    timer = StageTimer()
+    timer.record("search", 0.25)
+    timer.record("search", 0.5)
+    assert list(timer.timed_iter("parse", iter([1, 2, 3]))) == [1, 2, 3]
+    assert timer.durations["search"] == 0.75
+    assert timer.durations["parse"] >= 0
+
+    histogram = Histogram("timer_seconds", "Timer.", ("route", "stage"))
+    timer.observe(histogram, route="ask")
+    assert histogram.snapshot()[("ask", "search")][0][-1] == 1
+
+def test_ask_exports_stage_metrics_and_logs_stage_columns(api_client, fake_server, auth_headers, upload_text):
+    """Every stage of /qa/ask is timed, exported on /metrics and stored on the query log."""
+    upload_text(auth_headers, "The warranty period is two years. " * 20)
+    question = f"Which stages ran for {uuid.uuid4().hex}?"
+    response = api_client.post("/qa/ask", json={"question": question}, headers=auth_headers)
+    assert response.status_code == 200
+    assert set(response.json()["timings"]) == {"auth", "embedding", "search", "context", "llm", "db_write"}
+
+    metrics = api_client.get("/metrics")
+    assert metrics.status_code == 200
+    for stage in ("auth", "embedding", "search", "context", "llm", "db_write"):
+        assert f'twerlo_request_stage_seconds_count{{route="ask",stage="{stage}"}}' in metrics.text
+    for stage in ("read", "save", "db_write"):
+        assert f'twerlo_request_stage_seconds_count{{route="upload",stage="{stage}"}}' in metrics.text
+    for stage in ("parse", "chunk", "embed", "index", "db_write"):
+        assert f'twerlo_ingestion_stage_seconds_count{{stage="{stage}"}}' in metrics.text
+
+    query_logger.flush()
+    db = SessionLocal()
+    try:
+        log = db.query(QueryLog).filter(QueryLog.question == question).one()
+        assert log.llm_time > 0 and log.embedding_time > 0 and log.auth_time > 0
+        assert log.rerank_time is None
+
+        report = stage_percentiles(db, user_id=log.user_id)
+    finally:
+        db.close()
+    assert {"auth", "embedding", "search", "context", "llm", "time_to_respond"} <= set(report)
+    assert report["llm"]["p50_ms"] <= report["llm"]["p99_ms"]
+    assert "rerank" not in report
+    assert format_report(report).splitlines()[0].split() == ["stage", "count", "mean_ms", "p50_ms", "p90_ms", "p95_ms", "p99_ms"]
@@ -0,0 +1,105 @@
+import os
+import numpy as np
+import pytest
+from app.services.numpy_index import NumpyBackend
+from tests.fake_openai import fake_embedding
+
+def add(backend, ids, name="docs"):
+    backend.add(
+        name,
+        ids=ids,
+        documents=[f"text {id_}" for id_ in ids],
+        embeddings=[fake_embedding(id_) for id_ in ids],
+        metadatas=[{"user_id": 1} for _ in ids]
+    )
+
+def test_embeddings_are_normalized_and_memory_mapped(tmp_path):
+    backend = NumpyBackend(str(tmp_path))
+    add(backend, ["a", "b"])
+    segment = backend._collection("docs", create=False).segments[0]
+    assert isinstance(segment.matrix, np.memmap)
+    assert np.allclose(np.linalg.norm(segment.matrix, axis=1), 1.0)
+
+def test_upserts_and_deletes_survive_reopening(tmp_path):
+    """Replaced and deleted rows stay hidden after a restart."""
+    backend = NumpyBackend(str(tmp_path))
+    add(backend, ["a", "b", "c"])
+    backend.add("docs", ids=["b"], documents=["new b"], embeddings=[fake_embedding("b")], metadatas=[{"user_id": 1}])
+    assert backend._collection("docs", create=False).delete(["c"]) == 1
+
+    reopened = NumpyBackend(str(tmp_path))
+    results = reopened.query("docs", fake_embedding("b"), k=10)
+    assert sorted(result.id for result in results) == ["a", "b"]
+    assert results[0].text == "new b"
+
+    # An id deleted earlier can be added again
+    add(reopened, ["c"])
+    assert sorted(r.id for r in NumpyBackend(str(tmp_path)).query("docs", fake_embedding("c"), k=10)) == ["a", "b", "c"]
+
+def test_segments_are_compacted(tmp_path):
+    """Past max_segments the live rows are merged into one segment file."""
+    backend = NumpyBackend(str(tmp_path), max_segments=3)
+    for i in range(4):
+        add(backend, [f"id{i}", "shared"])
+    collection = backend._collection("docs", create=False)
+    assert len(collection.segments) == 1
+    assert collection.count() == 5
+    assert len([f for f in os.listdir(tmp_path / "docs") if f.endswith(".npy")]) == 1
+
+    reopened = NumpyBackend(str(tmp_path))
+    assert sorted(r.id for r in reopened.query("docs", fake_embedding("id0"), k=10)) == ["id0", "id1", "id2", "id3", "shared"]
+
+def test_pages_skip_whole_segments_and_deleted_rows(tmp_path):
+    """Paging walks the segments by offset; a page doesn't rescan the rows before it."""
+    backend = NumpyBackend(str(tmp_path), max_segments=10)
+    for i in range(4):
+        add(backend, [f"s{i}r{j}" for j in range(5)])
+    collection = backend._collection("docs", create=False)
+    collection.delete(["s0r1", "s1r0", "s1r4", "s3r2"])
+    expected = [id_ for segment in collection.segments for id_, alive in zip(segment.ids, segment.alive) if alive]
+
+    pages = [backend.get("docs", limit=3, offset=offset)["ids"] for offset in range(0, 20, 3)]
+    assert [id_ for page in pages for id_ in page] == expected
+    assert backend.get("docs", limit=2, offset=9) == {
+        "ids": ["s2r2", "s2r3"],
+        "documents": ["text s2r2", "text s2r3"],
+        "embeddings": [collection.segments[2].matrix[2].tolist(), collection.segments[2].matrix[3].tolist()],
+        "metadatas": [{"user_id": 1}, {"user_id": 1}]
+    }
+    live_rows = collection.segments[0].live_rows
+    assert backend.get("docs", limit=1, offset=0)["ids"] == ["s0r0"]
+    assert collection.segments[0].live_rows is live_rows  # cached until a row is killed
+    collection.delete(["s0r0"])
+    assert backend.get("docs", limit=1, offset=0)["ids"] == ["s0r2"]
+
+def test_dimension_mismatch_is_rejected(tmp_path):
+    backend = NumpyBackend(str(tmp_path))
+    add(backend, ["a"])
+    with pytest.raises(ValueError, match="dimension"):
+        backend.add("docs", ids=["z"], documents=["z"], embeddings=[[1.0, 0.0]], metadatas=[{"user_id": 1}])
+
+def test_int8_quantization_reranks_at_full_precision(tmp_path):
+    """Quantized scans find the same neighbours and report exact distances."""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((2000, 64)).astype(np.float32)
+    ids = [str(i) for i in range(len(vectors))]
+    exact = NumpyBackend(str(tmp_path / "exact"))
+    quantized = NumpyBackend(str(tmp_path / "int8"), quantization="int8", rerank_factor=4)
+    for backend in (exact, quantized):
+        backend.add("docs", ids=ids, documents=ids, embeddings=vectors.tolist(), metadatas=[{"user_id": 1}] * len(ids))
+    assert os.path.exists(tmp_path / "int8" / "docs" / "seg_000001.q8.npy")
+
+    for query in rng.standard_normal((20, 64)):
+        expected = exact.query("docs", query.tolist(), k=10)
+        found = quantized.query("docs", query.tolist(), k=10)
+        assert len({r.id for r in found} & {r.id for r in expected}) >= 9
+        assert [r.distance for r in found] == sorted(r.distance for r in found)
+        for result in found:
+            row = vectors[int(result.id)] / np.linalg.norm(vectors[int(result.id)])
+            assert result.distance == pytest.approx(2 - 2 * float(row @ query / np.linalg.norm(query)), abs=1e-4)
+
+def test_quantization_can_be_enabled_on_existing_index(tmp_path):
+    add(NumpyBackend(str(tmp_path)), ["a", "b"])
+    reopened = NumpyBackend(str(tmp_path), quantization="int8")
+    assert reopened.query("docs", fake_embedding("a"), k=1)[0].id == "a"
+    assert os.path.exists(tmp_path / "docs" / "seg_000001.q8.npy")
@@ -0,0 +1,91 @@
+import asyncio
+import time
+import numpy as np
+import pytest
+from app.core import llm_utils, providers
+from app.core.config import settings
+from app.core.providers import (
+    EchoChat, EmbeddingProvider, HashEmbeddings, OpenAIChat, OpenAIEmbeddings, get_chat_provider,
+    get_embedding_provider, register_embedding_provider
+)
+from tests.fake_openai import FakeOpenAIServer, fake_embedding
+
+@pytest.fixture
+def local_providers(monkeypatch):
+    monkeypatch.setattr(settings, "embedding_provider", "hash")
+    monkeypatch.setattr(settings, "llm_provider", "echo")
+    monkeypatch.setattr(settings, "embedding_cache_enabled", False)
+
+def test_hash_embeddings_are_deterministic_unit_vectors():
+    embedder = HashEmbeddings(dimensions=32)
+    first, second = embedder.embed(["pump torque B12", "pump torque B12"])
+    assert first == second and len(first) == 32
+    assert np.linalg.norm(first) == pytest.approx(1.0, abs=1e-5)
+    assert embedder.model == "hash-32"
+
+    # Shared terms pull texts together
+    query = embedder.vector("What is the torque of the pump?")
+    assert float(query @ embedder.vector("The pump torque is 40 Nm.")) > float(query @ embedder.vector("Invoices are due monthly."))
+
+def test_local_providers_run_offline(local_providers):
+    """The hash embedder and echo LLM serve the llm_utils entry points without any server."""
+    assert llm_utils.generate_embeddings("offline text") == llm_utils.generate_embeddings_batch(["offline text"])[0]
+    assert asyncio.run(llm_utils.agenerate_embeddings("offline text")) == llm_utils.generate_embeddings("offline text")
+
+    answer = llm_utils.get_llm_response("What is the torque?", "The torque is 40 Nm.")
+    assert "The torque is 40 Nm." in answer and "What is the torque?" in answer
+    assert asyncio.run(llm_utils.aget_llm_response("What is the torque?", "The torque is 40 Nm.")) == answer
+
+    async def stream():
+        return [token async for token in llm_utils.astream_llm_response("What is the torque?", "The torque is 40 Nm.")]
+    tokens = asyncio.run(stream())
+    assert len(tokens) > 1 and "".join(tokens).strip() == answer
+
+def test_echo_answer_is_bounded_by_max_tokens():
+    messages = [{"role": "user", "content": "one two three four five"}]
+    assert EchoChat().complete(messages, max_tokens=3, temperature=0.0) == "one two three"
+
+def test_providers_are_selected_by_name(monkeypatch):
+    monkeypatch.setattr(providers, "EMBEDDING_PROVIDERS", dict(providers.EMBEDDING_PROVIDERS))
+    monkeypatch.setattr(providers, "_embedding_providers", {})
+
+    class Constant(EmbeddingProvider):
+        model = "constant"
+
+        def embed(self, texts):
+            return [[1.0, 0.0] for _ in texts]
+
+    register_embedding_provider("constant", Constant)
+    assert get_embedding_provider("constant") is get_embedding_provider("constant")
+    assert get_embedding_provider("constant").embed(["x"]) == [[1.0, 0.0]]
+    assert isinstance(get_chat_provider("echo"), EchoChat)
+    with pytest.raises(ValueError, match="Unknown embedding provider 'missing'. Available: openai, hash, constant"):
+        get_embedding_provider("missing")
+    with pytest.raises(ValueError, match="Unknown LLM provider"):
+        get_chat_provider("missing")
+
+def test_embedding_base_url_overrides_openai_base_url(fake_server, monkeypatch):
+    """An embedding server of its own, e.g. a local model, while chat stays on OPENAI_BASE_URL."""
+    local = FakeOpenAIServer(dimensions=4).start()
+    try:
+        monkeypatch.setattr(settings, "embedding_base_url", local.base_url)
+        embeddings = OpenAIEmbeddings().embed(["a", "b"])
+    finally:
+        local.stop()
+    assert embeddings == [fake_embedding("a", 4), fake_embedding("b", 4)]
+    assert local.requests["embeddings"] == 1 and fake_server.requests["embeddings"] == 0
+
+def test_llm_max_concurrency_caps_in_flight_requests(fake_server, monkeypatch):
+    fake_server.chat_latency = 0.1
+    monkeypatch.setattr(settings, "llm_max_concurrency", 2)
+    chat = OpenAIChat()
+    messages = [{"role": "user", "content": "hi"}]
+
+    async def ask_four():
+        return await asyncio.gather(*(chat.acomplete(messages, max_tokens=10, temperature=0.0) for _ in range(4)))
+
+    start = time.perf_counter()
+    answers = asyncio.run(ask_four())
+    assert answers == [fake_server.answer] * 4
+    # Two waves of two requests
+    assert time.perf_counter() - start >= 0.2
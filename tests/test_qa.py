@@ -0,0 +1,94 @@
+import json
+import pytest
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.models import QueryLog
+from app.services.query_logger import query_logger
+
+def test_ask_answers_from_uploaded_documents(api_client, fake_server, auth_headers, upload_text):
+    """Questions are embedded, searched and answered through the async client."""
+    upload_text(auth_headers, "The warranty period is two years. " * 20)
+
+    for _ in range(3):
+        response = api_client.post("/qa/ask", json={"question": "How long is the warranty?"}, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["answer"] == fake_server.answer
+    assert fake_server.requests["chat"] == 3
+    assert set(response.json()["timings"]) == {"auth", "embedding", "search", "context", "llm", "db_write"}
+
+def test_ask_reports_rerank_timing_when_enabled(api_client, fake_server, auth_headers, upload_text, monkeypatch):
+    """With reranking on, candidates are rescored and the stage shows up in the timings."""
+    monkeypatch.setattr(settings, "rerank_enabled", True)
+    upload_text(auth_headers, "The warranty period is two years. " * 20)
+
+    response = api_client.post("/qa/ask", json={"question": "How long is the warranty?"}, headers=auth_headers)
+    assert response.status_code == 200
+    timings = response.json()["timings"]
+    assert set(timings) == {"auth", "embedding", "search", "rerank", "context", "llm", "db_write"}
+    assert all(value >= 0 for value in timings.values())
+
+def test_ask_requires_authentication(api_client):
+    """Unauthenticated requests are rejected."""
+    response = api_client.post("/qa/ask", json={"question": "Anything?"})
+    assert response.status_code == 403
+
+def parse_sse(text):
+    """Split an SSE body into (event, data) pairs."""
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+def test_ask_stream_forwards_tokens_and_logs_timing(api_client, fake_server, auth_headers, upload_text):
+    """Tokens arrive as SSE events and the finished answer is logged with TTFT."""
+    fake_server.answer = "The warranty lasts two years"
+    upload_text(auth_headers, "The warranty period is two years. " * 20)
+
+    response = api_client.post("/qa/ask/stream", json={"question": "Warranty?"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = parse_sse(response.text)
+    tokens = [data["token"] for event, data in events if event == "token"]
+    assert len(tokens) == 5
+    assert "".join(tokens) == fake_server.answer
+
+    event, done = events[-1]
+    assert event == "done"
+    assert done["answer"] == fake_server.answer
+    assert 0 <= done["time_to_first_token"] <= done["time_to_respond"]
+    assert "llm" in done["timings"]
+
+    query_logger.flush()
+    db = SessionLocal()
+    try:
+        log = db.query(QueryLog).filter(QueryLog.llm_response == fake_server.answer).order_by(QueryLog.id.desc()).first()
+        assert log.time_to_first_token == pytest.approx(done["time_to_first_token"])
+    finally:
+        db.close()
+
+def test_ask_stream_logs_query_when_client_leaves_before_done(fake_server, auth_headers, upload_text):
+    """Closing the stream at the final event still records the query."""
+    import asyncio
+    import uuid
+    from app.api.qa import stream_answer
+    from app.core.security import verify_token
+    fake_server.answer = f"Disconnected before the end {uuid.uuid4().hex}"
+    upload_text(auth_headers, "The warranty period is two years. " * 20)
+    user_id = int(verify_token(auth_headers["Authorization"].split()[1]))
+
+    async def read_tokens_then_disconnect():
+        events = stream_answer("Warranty?", user_id)
+        async for event in events:
+            if event.startswith("event: done"):
+                break
+        await events.aclose()
+    asyncio.run(read_tokens_then_disconnect())
+
+    query_logger.flush()
+    db = SessionLocal()
+    try:
+        assert db.query(QueryLog).filter(QueryLog.llm_response == fake_server.answer).count() == 1
+    finally:
+        db.close()
@@ -0,0 +1,97 @@
+import time
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy.orm import sessionmaker
+from app.db.database import create_db_engine
+from app.db.models import Base, QueryLog, QueryLogDaily, User
+from app.db.rollup_query_logs import rollup_query_logs
+from app.services.query_logger import QueryLogger
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add_all([User(email="a@example.com", hashed_password="x"), User(email="b@example.com", hashed_password="x")])
+        db.commit()
+    yield Session
+    engine.dispose()
+
+def count_logs(Session) -> int:
+    with Session() as db:
+        return db.query(QueryLog).count()
+
+def wait_until(condition, timeout=5.0) -> None:
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+def test_logger_flushes_full_batches_and_drains_on_shutdown(session_factory):
+    logger = QueryLogger(batch_size=3, flush_seconds=60, max_pending=100, session_factory=session_factory)
+    for i in range(3):
+        logger.log(user_id=1, time_to_respond=0.1, question=f"q{i}", llm_response="a", llm_time=0.05)
+    wait_until(lambda: count_logs(session_factory) == 3)
+
+    logger.log(user_id=1, time_to_respond=0.1, question="q3", llm_response="a")
+    time.sleep(0.1)
+    assert count_logs(session_factory) == 3
+    assert logger.stats()["pending"] == 1
+
+    logger.shutdown()
+    assert count_logs(session_factory) == 4
+    assert logger.stats() == {"pending": 0, "written": 4, "dropped": 0, "failed": 0, "flushes": 2}
+
+    # After shutdown rows are written straight away
+    logger.log(user_id=1, time_to_respond=0.1, question="late", llm_response="a")
+    assert count_logs(session_factory) == 5
+
+def test_logger_flushes_partial_batches_after_interval(session_factory):
+    logger = QueryLogger(batch_size=100, flush_seconds=0.05, max_pending=100, session_factory=session_factory)
+    logged_at = datetime.utcnow()
+    logger.log(user_id=2, time_to_respond=0.2, time_to_first_token=0.1, question="q", llm_response="a")
+    wait_until(lambda: count_logs(session_factory) == 1)
+    logger.shutdown()
+
+    with session_factory() as db:
+        log = db.query(QueryLog).one()
+    assert log.time_to_first_token == 0.1 and log.embedding_time is None
+    assert abs((log.timestamp - logged_at).total_seconds()) < 1
+
+def test_logger_drops_rows_beyond_max_pending(session_factory):
+    logger = QueryLogger(batch_size=100, flush_seconds=60, max_pending=2, session_factory=session_factory)
+    for i in range(5):
+        logger.log(user_id=1, time_to_respond=0.1, question=f"q{i}", llm_response="a")
+    assert logger.stats()["dropped"] == 3
+    logger.shutdown()
+    assert count_logs(session_factory) == 2
+
+def test_rollup_compacts_old_days_into_daily_aggregates(session_factory):
+    today = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+    old_day = today - timedelta(days=40)
+    with session_factory() as db:
+        for i in range(1, 101):
+            db.add(QueryLog(user_id=1, timestamp=old_day, time_to_respond=i / 100, question="q", llm_response="a"))
+        db.add(QueryLog(user_id=2, timestamp=old_day, time_to_respond=2.0, question="q", llm_response="a"))
+        db.add(QueryLog(user_id=1, timestamp=old_day - timedelta(days=1), time_to_respond=1.0, question="q", llm_response="a"))
+        db.add(QueryLog(user_id=1, timestamp=today, time_to_respond=1.0, question="recent", llm_response="a"))
+        db.commit()
+
+        assert rollup_query_logs(db, retention_days=30) == {"days": 2, "rows": 102}
+        assert [log.question for log in db.query(QueryLog).all()] == ["recent"]
+
+        aggregate = db.query(QueryLogDaily).filter_by(user_id=1, day=old_day.date()).one()
+        assert aggregate.query_count == 100
+        assert aggregate.time_to_respond_mean == pytest.approx(0.505)
+        assert aggregate.time_to_respond_p50 == pytest.approx(0.505)
+        assert aggregate.time_to_respond_max == pytest.approx(1.0)
+        assert db.query(QueryLogDaily).filter_by(user_id=2).one().time_to_respond_p99 == pytest.approx(2.0)
+
+        # Rows that arrive for an already compacted day are merged in
+        db.add(QueryLog(user_id=2, timestamp=old_day, time_to_respond=4.0, question="q", llm_response="a"))
+        db.commit()
+        assert rollup_query_logs(db, retention_days=30) == {"days": 1, "rows": 1}
+        merged = db.query(QueryLogDaily).filter_by(user_id=2).one()
+        assert (merged.query_count, merged.time_to_respond_mean, merged.time_to_respond_max) == (2, 3.0, 4.0)
+        assert rollup_query_logs(db, retention_days=30) == {"days": 0, "rows": 0}
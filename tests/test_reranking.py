@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from app.services.reranking import OverlapScorer, get_scorer, register_scorer, rerank
+from app.services.vector_store import SearchResult
+
+def results_for(texts):
+    return [SearchResult(id=str(i), text=text, metadata={}, distance=0.1 * i) for i, text in enumerate(texts)]
+
+def test_overlap_scorer_prefers_rare_exact_matches():
+    texts = [
+        "The torque for bolt B1x2 on the pump is 40 Nm.",
+        "The torque for bolt B3x4 on the valve is 25 Nm.",
+        "Inspect the pump before each shift.",
+    ]
+    scores = OverlapScorer().score("What is the torque for bolt B3x4 on the valve?", texts)
+    assert scores.shape == (3,)
+    assert int(np.argmax(scores)) == 1
+    assert scores[2] < scores[0]
+
+def test_overlap_scorer_rewards_phrase_order():
+    scores = OverlapScorer().score("reset the pressure valve", ["valve pressure reset", "reset pressure valve"])
+    assert scores[1] > scores[0]
+
+def test_overlap_scorer_handles_empty_input():
+    assert OverlapScorer().score("anything", []).shape == (0,)
+    assert OverlapScorer().score("what is the", ["some text"]).tolist() == [0.0]
+
+def test_rerank_orders_by_score_and_keeps_ties_stable():
+    results = results_for(["alpha", "beta gamma", "gamma", "delta"])
+    reranked = rerank("gamma", results, scorer=OverlapScorer())
+    assert [r.id for r in reranked[:2]] == ["2", "1"]
+    assert [r.id for r in reranked[2:]] == ["0", "3"]  # unmatched keep their retrieval order
+    assert reranked[0].score > reranked[1].score > reranked[2].score == 0.0
+    assert rerank("gamma", []) == []
+
+def test_scorer_registry():
+    class LengthScorer:
+        def score(self, query, texts):
+            return np.array([len(text) for text in texts], dtype=np.float32)
+
+    register_scorer("length", LengthScorer)
+    assert get_scorer("length") is get_scorer("length")
+    assert [r.id for r in rerank("q", results_for(["a", "abc", "ab"]), get_scorer("length"))] == ["1", "2", "0"]
+    with pytest.raises(ValueError, match="Unknown rerank scorer"):
+        get_scorer("missing")
@@ -0,0 +1,59 @@
+import asyncio
+import os
+import subprocess
+import sys
+from app.core.warmup import BLOCKING_STEPS, warm_up
+from app.services import vector_store as vector_store_module
+from app.services.vector_store import VectorStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_python(code: str, tmp_path, **env) -> subprocess.CompletedProcess:
+    """Run ``code`` in a fresh interpreter with every data path under ``tmp_path``."""
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{tmp_path / 'app.db'}",
+        CHROMA_DB_PATH=str(tmp_path / "chroma_db"),
+        UPLOAD_DIR=str(tmp_path / "uploads"),
+        EMBEDDING_CACHE_PATH=str(tmp_path / "embedding_cache.db"),
+        LEXICAL_INDEX_PATH=str(tmp_path / "lexical_index.db"),
+        **env
+    )
+    return subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, timeout=120, check=True
+    )
+
+def test_importing_the_app_opens_nothing(tmp_path):
+    """Heavy clients and the database are left to the lifespan hooks."""
+    result = run_python(
+        "import sys, app.main\n"
+        "print(sorted(m for m in ('chromadb', 'openai', 'httpx', 'PyPDF2', 'passlib', 'jose') if m in sys.modules))",
+        tmp_path
+    )
+    assert result.stdout.strip() == "[]"
+    assert not (tmp_path / "app.db").exists() and not (tmp_path / "chroma_db").exists()
+
+def test_blocking_warm_up_runs_before_serving(tmp_path):
+    result = run_python(
+        "from fastapi.testclient import TestClient\n"
+        "from app.main import app\n"
+        "from app.services.vector_store import vector_store\n"
+        "with TestClient(app) as client:\n"
+        "    assert vector_store._backend is not None\n"
+        "    assert client.get('/health').status_code == 200\n",
+        tmp_path,
+        WARMUP_MODE="blocking"
+    )
+    assert "Warm-up finished" in result.stdout
+    assert (tmp_path / "app.db").exists()
+
+def test_warm_up_loads_existing_collections(fake_server, tmp_path, monkeypatch):
+    VectorStore(path=str(tmp_path), partitioning="per_user", backend="chroma").add_documents(
+        documents=["pump torque"], embeddings=[[0.1] * 8], metadatas=[{"user_id": 7}], ids=["c1"]
+    )
+    store = VectorStore(path=str(tmp_path), partitioning="per_user", backend="chroma")
+    monkeypatch.setattr(vector_store_module, "vector_store", store)
+
+    timings = asyncio.run(warm_up())
+    assert list(timings) == [name for name, _ in BLOCKING_STEPS] + ["providers"]
+    assert list(store.backend._collections) == ["documents_user_7"]
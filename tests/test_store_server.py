@@ -0,0 +1,87 @@
+import uuid
+import pytest
+from app.core.concurrency import claim_once
+from app.core.config import settings
+from app.services.answer_cache import AnswerCache
+from app.services.lexical_index import LexicalIndex
+from app.services.numpy_index import NumpyBackend
+from app.services.store_server import (
+    Generations, RemoteBackend, RemoteGenerations, RemoteLexicalIndex, StoreClient, StoreServer
+)
+from app.services.vector_store import SearchResult
+
+@pytest.fixture
+def store_server(tmp_path):
+    server = StoreServer(
+        str(tmp_path / "store.sock"),
+        NumpyBackend(str(tmp_path / "numpy_index")),
+        LexicalIndex(str(tmp_path / "lexical.db"), memory_users=8)
+    ).start()
+    yield server
+    server.stop()
+
+def test_workers_share_the_vector_store_and_lexical_index(store_server):
+    writer, reader = StoreClient(store_server.address), StoreClient(store_server.address)
+    metadatas = [{"user_id": 1, "document_id": 5, "chunk_index": i} for i in range(2)]
+    RemoteBackend(writer).add("documents", ["c0", "c1"], ["pump torque 40 Nm", "invoice terms"], [[1.0, 0.0], [0.0, 1.0]], metadatas)
+    RemoteLexicalIndex(writer).add(["c0", "c1"], ["pump torque 40 Nm", "invoice terms"], metadatas)
+
+    backend = RemoteBackend(reader)
+    assert backend.list_collections() == ["documents"] and backend.has_collection("documents")
+    results = backend.query("documents", [1.0, 0.0], 1, user_id=1)
+    assert isinstance(results[0], SearchResult) and results[0].id == "c0"
+    assert [result.id for result in RemoteLexicalIndex(reader).search(1, "torque", 5)] == ["c0"]
+    assert RemoteLexicalIndex(reader).count(1) == 2
+
+def test_errors_are_raised_in_the_worker(store_server):
+    client = StoreClient(store_server.address)
+    with pytest.raises(ValueError, match="Unknown store server call 'vector.__init__'"):
+        client.call("vector", "__init__")
+    # The connection stays usable
+    assert client.call("generations", "get", 1) == 0
+
+def test_client_reconnects_after_server_restart(store_server, tmp_path):
+    client = StoreClient(store_server.address)
+    assert client.call("generations", "bump", 1) == 1
+    store_server.stop()
+    restarted = StoreServer(store_server.address, store_server.targets["vector"], store_server.targets["lexical"]).start()
+    try:
+        assert client.call("generations", "get", 1) == 0
+    finally:
+        restarted.stop()
+
+def test_invalidation_reaches_other_workers_answer_caches(store_server):
+    first, second = (
+        AnswerCache(60, 0.9, 10, generations=RemoteGenerations(StoreClient(store_server.address))) for _ in range(2)
+    )
+    second.put(1, "What is the torque?", [1.0, 0.0], ["c0"], "40 Nm")
+    assert second.get_exact(1, "What is the torque?") == "40 Nm"
+
+    first.invalidate_user(1)
+    assert second.get_exact(1, "What is the torque?") is None
+    assert second.get_semantic(1, [1.0, 0.0], ["c0"]) is None
+
+def test_answer_cache_without_shared_generations_is_unchanged():
+    cache = AnswerCache(60, 0.9, 10)
+    cache.put(1, "q", [1.0], ["c0"], "a")
+    assert cache.get_exact(1, "q") == "a"
+    assert Generations().get(1) == 0
+
+def test_startup_tasks_are_claimed_once_per_worker_group(monkeypatch, tmp_path):
+    import tempfile
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))  # claim markers go here
+    assert claim_once("resume_ingestion")
+    monkeypatch.setattr(settings, "worker_group_id", uuid.uuid4().hex)
+    assert claim_once("resume_ingestion")
+    assert not claim_once("resume_ingestion")
+    assert claim_once("other_task")
+
+def test_server_only_accepts_its_own_random_key(store_server):
+    import os
+    import stat
+    from multiprocessing.connection import Client
+    from app.services.store_server import authkey_path
+    assert stat.S_IMODE(os.stat(authkey_path(store_server.address)).st_mode) == 0o600
+    with pytest.raises(Exception):
+        Client(store_server.address, family="AF_UNIX", authkey=settings.secret_key.encode("utf-8"))
+    assert StoreClient(store_server.address).call("generations", "get", 1) == 0
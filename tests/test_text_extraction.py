@@ -0,0 +1,43 @@
+import pytest
+from app.core.config import settings
+from app.services import text_extraction
+from app.services.text_extraction import iter_document_text
+from tests.pdf_factory import build_pdf, generated_pages
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / "manual.pdf"
+    path.write_bytes(build_pdf(generated_pages(40, lines_per_page=3)))
+    return str(path)
+
+def test_pages_are_yielded_in_order(pdf_path):
+    """Serial extraction yields one text per page, in order."""
+    pages = list(text_extraction.iter_pdf_pages(pdf_path))
+    assert len(pages) == 40
+    assert all(text.startswith(f"Page {i} line 0") for i, text in enumerate(pages))
+
+def test_parallel_extraction_matches_serial(pdf_path, monkeypatch):
+    """The process pool returns the same pages as serial extraction."""
+    serial = list(text_extraction.iter_pdf_pages(pdf_path))
+
+    monkeypatch.setattr(settings, "pdf_workers", 2)
+    monkeypatch.setattr(settings, "pdf_parallel_min_pages", 10)
+    monkeypatch.setattr(settings, "pdf_pages_per_task", 7)
+    try:
+        assert list(text_extraction.iter_pdf_pages(pdf_path)) == serial
+    finally:
+        text_extraction.shutdown_pdf_pool()
+
+def test_document_text_reports_progress(pdf_path):
+    """Progress reaches 1.0 once every page has been read."""
+    progress = []
+    pieces = list(iter_document_text(pdf_path, "pdf", progress.append))
+    assert len(pieces) == 40
+    assert progress[-1] == 1.0
+
+def test_invalid_pdf_raises(tmp_path):
+    """Unparseable files surface a PDF extraction error."""
+    path = tmp_path / "broken.pdf"
+    path.write_bytes(b"not a pdf")
+    with pytest.raises(Exception, match="Error extracting PDF text"):
+        list(text_extraction.iter_pdf_pages(str(path)))
@@ -0,0 +1,126 @@
+import pytest
+from app.db.migrate_vector_store import migrate_vector_store
+from app.services.vector_store import VectorStore
+from tests.fake_openai import fake_embedding
+
+BACKENDS = ["chroma", "numpy"]
+
+@pytest.fixture(params=BACKENDS)
+def make_store(request, tmp_path):
+    """Build stores on one backend (the whole suite runs against each)."""
+    def make(partitioning="per_user", shards=None, path=None):
+        return VectorStore(path=str(path or tmp_path), partitioning=partitioning, shards=shards, backend=request.param)
+    make.backend = request.param
+    return make
+
+def add_chunks(store, user_id, texts, collection_name=None):
+    store.add_documents(
+        documents=texts,
+        embeddings=[fake_embedding(text) for text in texts],
+        metadatas=[{"user_id": user_id, "chunk_index": i} for i in range(len(texts))],
+        ids=[f"{user_id}_{i}" for i in range(len(texts))],
+        collection_name=collection_name
+    )
+
+@pytest.mark.parametrize("partitioning", ["shared", "per_user", "sharded"])
+def test_users_only_see_their_own_chunks(make_store, partitioning):
+    """Every layout keeps users' chunks apart."""
+    store = make_store(partitioning=partitioning, shards=2)
+    add_chunks(store, 1, ["alpha one", "alpha two"])
+    add_chunks(store, 2, ["beta one", "beta two", "beta three"])
+
+    results = store.search(fake_embedding("beta one"), k=3, user_id=2)
+    assert results[0].text == "beta one"
+    assert {result.metadata["user_id"] for result in results} == {2}
+    assert store.search(fake_embedding("alpha one"), k=2, user_id=1)[0].text == "alpha one"
+    assert store.search(fake_embedding("alpha one"), k=2, user_id=3) == []
+
+def test_results_are_ordered_by_distance(make_store):
+    """Both backends rank the same chunks in the same order."""
+    store = make_store()
+    texts = [f"chunk {i}" for i in range(20)]
+    add_chunks(store, 1, texts)
+
+    results = store.search(fake_embedding("chunk 7"), k=5, user_id=1)
+    assert results[0].id == "1_7"
+    assert results[0].distance == pytest.approx(0.0, abs=1e-5)
+    assert [r.distance for r in results] == sorted(r.distance for r in results)
+    assert len(store.search(fake_embedding("chunk 7"), k=50, user_id=1)) == 20
+
+def test_collection_names_follow_partitioning(make_store):
+    assert make_store(partitioning="per_user").collection_name_for(7) == "documents_user_7"
+    assert make_store(partitioning="sharded", shards=4).collection_name_for(7) == "documents_shard_3"
+    assert make_store(partitioning="shared").collection_name_for(7) == "documents"
+    with pytest.raises(ValueError, match="Unknown vector store partitioning"):
+        make_store(partitioning="nope")
+
+def test_unknown_backend_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="Unknown vector store backend"):
+        VectorStore(path=str(tmp_path), backend="nope")
+
+def test_chroma_collection_handles_are_cached(tmp_path, monkeypatch):
+    """Repeated searches don't look the collection up again."""
+    store = VectorStore(path=str(tmp_path), partitioning="per_user", backend="chroma")
+    add_chunks(store, 1, ["cached chunk"])
+    calls = []
+    client = store.backend.client
+    get_collection = client.get_collection
+    monkeypatch.setattr(client, "get_collection", lambda **kw: calls.append(kw) or get_collection(**kw))
+
+    for _ in range(5):
+        assert store.search(fake_embedding("cached chunk"), k=1, user_id=1)[0].text == "cached chunk"
+    assert calls == []
+    assert store.search(fake_embedding("x"), k=1, user_id=2) == []
+
+def test_migration_moves_shared_chunks_into_user_collections(make_store):
+    """The one-shot migration reproduces each user's results in the partitioned layout."""
+    shared = make_store(partitioning="shared")
+    for user_id in (1, 2, 3):
+        add_chunks(shared, user_id, [f"user {user_id} chunk {i}" for i in range(5)])
+    before = {user_id: shared.search(fake_embedding(f"user {user_id} chunk 2"), k=3, user_id=user_id) for user_id in (1, 2, 3)}
+
+    partitioned = make_store(partitioning="per_user")
+    summary = migrate_vector_store(partitioned, batch_size=4, delete_source=True)
+    assert summary == {"migrated": 15, "skipped": 0, "collections": 3}
+    assert "documents" not in partitioned.get_collection_names()
+    for user_id, results in before.items():
+        after = partitioned.search(fake_embedding(f"user {user_id} chunk 2"), k=3, user_id=user_id)
+        assert [result.id for result in after] == [result.id for result in results]
+
+    # Re-running is harmless
+    assert migrate_vector_store(partitioned)["migrated"] == 0
+
+def test_migration_between_backends(tmp_path):
+    """Chunks can move from the shared Chroma collection to the NumPy backend."""
+    chroma = VectorStore(path=str(tmp_path / "chroma"), partitioning="shared", backend="chroma")
+    add_chunks(chroma, 1, ["one", "two", "three"])
+    numpy_store = VectorStore(path=str(tmp_path / "numpy"), partitioning="per_user", backend="numpy")
+
+    assert migrate_vector_store(numpy_store, source=chroma)["migrated"] == 3
+    assert numpy_store.search(fake_embedding("two"), k=1, user_id=1)[0].id == "1_1"
+
+@pytest.mark.parametrize("partitioning", ["shared", "per_user"])
+def test_document_chunks_can_be_found_updated_and_deleted(make_store, partitioning):
+    store = make_store(partitioning=partitioning)
+    texts = ["first part", "second part", "third part"]
+    store.add_documents(
+        documents=texts,
+        embeddings=[fake_embedding(text) for text in texts],
+        metadatas=[{"user_id": 1, "document_id": 5, "chunk_index": i} for i in range(3)],
+        ids=[f"doc5_{i}" for i in range(3)]
+    )
+    add_chunks(store, 1, ["other document"])
+    add_chunks(store, 2, ["another user"])
+
+    found = store.get_document_chunks(1, 5)
+    assert sorted(found) == ["doc5_0", "doc5_1", "doc5_2"]
+    assert found["doc5_1"]["chunk_index"] == 1
+
+    store.update_metadatas(1, ["doc5_1"], [{"user_id": 1, "document_id": 5, "chunk_index": 7}])
+    assert store.get_document_chunks(1, 5)["doc5_1"]["chunk_index"] == 7
+    assert store.search(fake_embedding("second part"), k=1, user_id=1)[0].id == "doc5_1"
+
+    assert sorted(store.delete_document(1, 5)) == ["doc5_0", "doc5_1", "doc5_2"]
+    assert store.get_document_chunks(1, 5) == {}
+    assert [r.id for r in store.search(fake_embedding("first part"), k=5, user_id=1)] == ["1_0"]
+    assert store.search(fake_embedding("another user"), k=5, user_id=2)[0].id == "2_0"